@@ -2,33 +2,70 @@
 Collaborators API endpoints - Unified view of employees from multiple sources
 """
 
+import json
 from calendar import monthrange
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 from typing import Any, Dict, List
 from typing import Optional
 from typing import Optional as Opt
 
-import holidays
-from fastapi import APIRouter, Depends, HTTPException
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import and_, or_, select
+from sqlalchemy import and_, distinct, func, or_, select, true
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
+from app.config import settings
 from app.dependencies import get_async_session, get_current_user
+from app.models.collaborator_directory import SCOPE_ACTIVE, SCOPE_ALL
 from app.models.forecast import Forecast
 from app.models.gryzzly import (
     GryzzlyCollaborator,
-    GryzzlyDeclaration,
     GryzzlyProject,
     GryzzlyTask,
 )
-from app.models.payfit import PayfitAbsence, PayfitContract, PayfitEmployee
+from app.models.payfit import PayfitContract, PayfitEmployee
 from app.models.person import User
 from app.models.tr_eligibility import TREligibilityOverride
+from app.services.collaborator_directory import (
+    CollaboratorDirectoryService,
+    to_collaborator_dict,
+)
+from app.services.columnar import (
+    FORMAT_COLUMNAR,
+    FORMAT_NESTED,
+    encode_forecast_month,
+)
+from app.services.forecast import ForecastService, working_days
+from app.services.plan_charge import (
+    MAX_RANGE_MONTHS,
+    MODE_AGGREGATED,
+    MODE_DETAILED,
+    PlanChargeService,
+    iter_months,
+    parse_month,
+)
+from app.services.plan_charge_cache import PlanChargeCache, etag_matches
+from app.services.plan_charge_export import (
+    EXPORT_CSV,
+    EXPORT_XLSX,
+    XLSX_MEDIA_TYPE,
+    PlanChargeExporter,
+    xlsx_available,
+)
+from app.utils.encoding import (
+    MSGPACK_MEDIA_TYPES,
+    json_to_msgpack,
+    msgpack_response,
+    wants_msgpack,
+)
 
 router = APIRouter()
 
+# Short-lived cache for /stats (a single entry, shared by the worker's requests)
+_stats_cache = TTLCache(maxsize=1, ttl=max(settings.COLLABORATOR_STATS_CACHE_TTL, 1))
+
 
 # Pydantic models for forecast operations
 class ForecastCreate(BaseModel):
@@ -49,22 +86,92 @@ class ForecastUpdate(BaseModel):
     description: Opt[str] = None
 
 
-class ForecastBatchCreate(BaseModel):
-    """Model for creating multiple forecast entries at once"""
+class ForecastTarget(BaseModel):
+    """Collaborator, project and optional task of a forecast batch"""
 
     collaborator_id: str
     project_id: str
     task_id: Opt[str] = None
+
+
+class ForecastBatchCreate(BaseModel):
+    """Model for creating multiple forecast entries at once
+
+    Either a single collaborator_id/project_id/task_id, or several `targets`
+    (both can be combined) receiving the same hours over the date range.
+    """
+
+    collaborator_id: Opt[str] = None
+    project_id: Opt[str] = None
+    task_id: Opt[str] = None
+    targets: List[ForecastTarget] = []
     start_date: date
     end_date: date
     hours_per_day: float = 7.0
     description: Opt[str] = None
 
+    def all_targets(self) -> List[ForecastTarget]:
+        """Every target of the batch, the single one included"""
+        targets = list(self.targets)
+        if self.collaborator_id and self.project_id:
+            targets.append(
+                ForecastTarget(
+                    collaborator_id=self.collaborator_id,
+                    project_id=self.project_id,
+                    task_id=self.task_id,
+                )
+            )
+        return targets
+
 
 class ForecastGroupDelete(BaseModel):
-    """Model for deleting a group of forecast entries"""
+    """Model for deleting a group of forecast entries, by ids and/or batch"""
 
-    forecast_ids: List[str]
+    forecast_ids: List[str] = []
+    batch_id: Opt[str] = None
+
+
+class ForecastSelection(BaseModel):
+    """Predicate selecting forecast entries for bulk operations"""
+
+    forecast_ids: Opt[List[str]] = None
+    batch_id: Opt[str] = None
+    collaborator_id: Opt[str] = None
+    project_id: Opt[str] = None
+    task_id: Opt[str] = None
+    start_date: Opt[date] = None
+    end_date: Opt[date] = None
+
+
+class ForecastBulkUpdate(ForecastSelection):
+    """Model for setting the hours of every forecast entry matching a selection"""
+
+    hours: float
+    description: Opt[str] = None
+
+
+def _snapshot_response(
+    snapshot: Dict[str, str], if_none_match: Opt[str], accept: Opt[str] = None
+) -> Response:
+    """Serve a cached plan de charge payload, or a 304 when the client has it"""
+    use_msgpack = wants_msgpack(accept)
+    etag = snapshot["etag"]
+    if use_msgpack:
+        # Same content, different representation: give it its own validator
+        etag = etag[:-1] + '-msgpack"'
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    if use_msgpack:
+        return Response(
+            content=json_to_msgpack(snapshot["payload"]),
+            media_type=MSGPACK_MEDIA_TYPES[0],
+            headers=headers,
+        )
+    return Response(
+        content=snapshot["payload"], media_type="application/json", headers=headers
+    )
 
 
 @router.get("")
@@ -76,147 +183,15 @@ async def get_collaborators(
     """
     Get unified list of collaborators from both Payfit and Gryzzly
     Merges data from both sources based on email matching
-    """
-
-    # Get all Gryzzly collaborators
-    gryzzly_query = select(GryzzlyCollaborator)
-    if active_only:
-        gryzzly_query = gryzzly_query.where(GryzzlyCollaborator.is_active == True)
-
-    gryzzly_result = await session.execute(gryzzly_query)
-    gryzzly_collaborators = gryzzly_result.scalars().all()
 
-    # Get all Payfit employees with their contracts
-    payfit_query = select(PayfitEmployee).options(
-        selectinload(PayfitEmployee.contracts)
+    Served from the unified collaborator directory, rebuilt after each sync
+    and on every edit (see CollaboratorDirectoryService).
+    """
+    directory = CollaboratorDirectoryService(session)
+    rows = await directory.list_collaborators(
+        SCOPE_ACTIVE if active_only else SCOPE_ALL
     )
-    if active_only:
-        payfit_query = payfit_query.where(PayfitEmployee.is_active == True)
-
-    payfit_result = await session.execute(payfit_query)
-    payfit_employees = payfit_result.scalars().all()
-
-    # Get all TR eligibility overrides
-    overrides_result = await session.execute(select(TREligibilityOverride))
-    overrides = overrides_result.scalars().all()
-    overrides_by_email = {override.email.lower(): override for override in overrides}
-
-    # Deduplicate Payfit employees by email (keep the most recent one)
-    # This handles cases where employees have multiple records (e.g., internship → permanent contract)
-    payfit_employees_by_email = {}
-    for emp in payfit_employees:
-        if emp.email:
-            email_lower = emp.email.lower()
-            # Keep the most recently created employee record
-            if email_lower not in payfit_employees_by_email:
-                payfit_employees_by_email[email_lower] = emp
-            elif emp.created_at and payfit_employees_by_email[email_lower].created_at:
-                if emp.created_at > payfit_employees_by_email[email_lower].created_at:
-                    payfit_employees_by_email[email_lower] = emp
-
-    # Create a map for quick lookup
-    gryzzly_map = {
-        collab.email.lower(): collab for collab in gryzzly_collaborators if collab.email
-    }
-    payfit_map = payfit_employees_by_email  # Already deduplicated by email
-
-    # Merge collaborators
-    collaborators = []
-    processed_emails = set()
-
-    # Process Gryzzly collaborators first (they have matricules)
-    for gryzzly_collab in gryzzly_collaborators:
-        if not gryzzly_collab.email:
-            continue
-
-        email_lower = gryzzly_collab.email.lower()
-        processed_emails.add(email_lower)
-
-        # Try to find matching Payfit employee
-        payfit_emp = payfit_map.get(email_lower)
-
-        # Determine eligibility for TR
-        # First check for manual override
-        override = overrides_by_email.get(email_lower)
-        if override:
-            eligible_tr = override.is_eligible
-        else:
-            # Otherwise, base on active contract
-            eligible_tr = False
-            if payfit_emp and payfit_emp.contracts:
-                # Check if there's an active contract
-                active_contracts = [c for c in payfit_emp.contracts if c.is_active]
-                eligible_tr = len(active_contracts) > 0
-
-        collaborator = {
-            "id": str(gryzzly_collab.id),
-            "nom": f"{gryzzly_collab.first_name or ''} {gryzzly_collab.last_name or ''}".strip()
-            or gryzzly_collab.email,
-            "email": gryzzly_collab.email,
-            "matricule": gryzzly_collab.matricule,
-            "department": gryzzly_collab.department
-            or (payfit_emp.department if payfit_emp else None),
-            "position": gryzzly_collab.position
-            or (payfit_emp.position if payfit_emp else None),
-            "actif": gryzzly_collab.is_active,
-            "eligibleTR": eligible_tr,
-            "source": "both" if payfit_emp else "gryzzly",
-            "gryzzly_id": gryzzly_collab.gryzzly_id,
-            "payfit_id": payfit_emp.payfit_id if payfit_emp else None,
-            "has_active_contract": eligible_tr,
-            "last_synced_at": (
-                gryzzly_collab.last_synced_at.isoformat()
-                if gryzzly_collab.last_synced_at
-                else None
-            ),
-        }
-
-        collaborators.append(collaborator)
-
-    # Process remaining Payfit employees not in Gryzzly
-    for email_lower, payfit_emp in payfit_map.items():
-        if email_lower in processed_emails:
-            continue
-
-        # Determine eligibility for TR
-        # First check for manual override
-        override = overrides_by_email.get(email_lower)
-        if override:
-            eligible_tr = override.is_eligible
-        else:
-            # Otherwise, base on active contract
-            eligible_tr = False
-            if payfit_emp.contracts:
-                active_contracts = [c for c in payfit_emp.contracts if c.is_active]
-                eligible_tr = len(active_contracts) > 0
-
-        collaborator = {
-            "id": f"payfit_{payfit_emp.id}",
-            "nom": f"{payfit_emp.first_name or ''} {payfit_emp.last_name or ''}".strip()
-            or payfit_emp.email,
-            "email": payfit_emp.email,
-            "matricule": None,  # No matricule from Payfit only
-            "department": payfit_emp.department,
-            "position": payfit_emp.position,
-            "actif": payfit_emp.is_active,
-            "eligibleTR": eligible_tr,
-            "source": "payfit",
-            "gryzzly_id": None,
-            "payfit_id": payfit_emp.payfit_id,
-            "has_active_contract": eligible_tr,
-            "last_synced_at": (
-                payfit_emp.last_synced_at.isoformat()
-                if payfit_emp.last_synced_at
-                else None
-            ),
-        }
-
-        collaborators.append(collaborator)
-
-    # Sort by name
-    collaborators.sort(key=lambda x: x["nom"].lower())
-
-    return collaborators
+    return [to_collaborator_dict(row) for row in rows]
 
 
 @router.patch("/{collaborator_id}")
@@ -320,6 +295,11 @@ async def update_collaborator(
 
         await session.commit()
 
+    # Names, matricules, active flags and TR eligibility are precomputed
+    await CollaboratorDirectoryService(session).refresh()
+    await PlanChargeCache(session).invalidate()
+    await session.commit()
+
     return {
         "success": True,
         "message": "Collaborator updated successfully",
@@ -334,261 +314,205 @@ async def get_collaborator_stats(
 ) -> Dict[str, Any]:
     """
     Get statistics about collaborators
+    Computed by a single aggregate query, cached for a few seconds
     """
-
-    # Count Gryzzly collaborators
-    gryzzly_count_result = await session.execute(
-        select(GryzzlyCollaborator).where(GryzzlyCollaborator.is_active == True)
+    cached = _stats_cache.get("stats")
+    if cached is not None:
+        return cached
+
+    gryzzly = (
+        select(
+            func.count().label("total"),
+            func.count().filter(GryzzlyCollaborator.is_active == True).label("active"),
+        )
+        .select_from(GryzzlyCollaborator)
+        .subquery()
     )
-    gryzzly_active = len(gryzzly_count_result.scalars().all())
-
-    gryzzly_total_result = await session.execute(select(GryzzlyCollaborator))
-    gryzzly_total = len(gryzzly_total_result.scalars().all())
-
-    # Count Payfit employees
-    payfit_count_result = await session.execute(
-        select(PayfitEmployee).where(PayfitEmployee.is_active == True)
+    payfit = (
+        select(
+            func.count().label("total"),
+            func.count().filter(PayfitEmployee.is_active == True).label("active"),
+        )
+        .select_from(PayfitEmployee)
+        .subquery()
     )
-    payfit_active = len(payfit_count_result.scalars().all())
-
-    payfit_total_result = await session.execute(select(PayfitEmployee))
-    payfit_total = len(payfit_total_result.scalars().all())
-
-    # Count employees with active contracts (eligible for TR)
-    contracts_result = await session.execute(
-        select(PayfitContract).where(PayfitContract.is_active == True)
+    contracts = (
+        select(
+            func.count().label("active"),
+            func.count(distinct(PayfitContract.payfit_employee_id)).label("employees"),
+        )
+        .where(PayfitContract.is_active == True)
+        .subquery()
     )
-    active_contracts = contracts_result.scalars().all()
-
-    # Get unique employee IDs with active contracts
-    employees_with_contracts = set()
-    for contract in active_contracts:
-        employees_with_contracts.add(contract.payfit_employee_id)
 
-    return {
+    result = await session.execute(
+        select(
+            gryzzly.c.total,
+            gryzzly.c.active,
+            payfit.c.total,
+            payfit.c.active,
+            contracts.c.active,
+            contracts.c.employees,
+        ).select_from(gryzzly.join(payfit, true()).join(contracts, true()))
+    )
+    (
+        gryzzly_total,
+        gryzzly_active,
+        payfit_total,
+        payfit_active,
+        active_contracts,
+        employees_with_contracts,
+    ) = result.one()
+
+    stats = {
         "total_collaborators": max(
             gryzzly_total, payfit_total
         ),  # Use max to avoid double counting
         "active_collaborators": max(gryzzly_active, payfit_active),
         "gryzzly": {"total": gryzzly_total, "active": gryzzly_active},
         "payfit": {"total": payfit_total, "active": payfit_active},
-        "eligible_tr": len(employees_with_contracts),
-        "active_contracts": len(active_contracts),
+        "eligible_tr": employees_with_contracts,
+        "active_contracts": active_contracts,
     }
+    if settings.COLLABORATOR_STATS_CACHE_TTL > 0:
+        _stats_cache["stats"] = stats
+    return stats
 
 
 @router.get("/plan-charge")
 async def get_plan_charge(
     year: int,
     month: int,
+    neighbours: int = Query(0, ge=0, le=6),
+    mode: str = Query(MODE_DETAILED, pattern=f"^({MODE_DETAILED}|{MODE_AGGREGATED})$"),
+    response_format: str = Query(
+        FORMAT_NESTED, alias="format", pattern=f"^({FORMAT_NESTED}|{FORMAT_COLUMNAR})$"
+    ),
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
     session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
-) -> Dict[str, Any]:
+) -> Response:
     """
     Get plan de charge data for a specific month
     Returns Gryzzly declarations and Payfit absences for all active collaborators
-    """
 
-    # Get the date range for the month (for display)
-    _, last_day = monthrange(year, month)
-    month_start_date = date(year, month, 1)
-    month_end_date = date(year, month, last_day)
-
-    # Query declarations from 6 months before to 6 months after the requested month
-    # This ensures we have data available when navigating between months
-    query_start_date = month_start_date - timedelta(days=180)
-    query_end_date = month_end_date + timedelta(days=180)
-
-    # Get all active collaborators using the existing get_collaborators logic
-    # Get all Gryzzly collaborators
-    gryzzly_query = select(GryzzlyCollaborator).where(
-        GryzzlyCollaborator.is_active == True
-    )
-    gryzzly_result = await session.execute(gryzzly_query)
-    gryzzly_collaborators = gryzzly_result.scalars().all()
-
-    # Get all active Payfit employees with their contracts
-    payfit_query = (
-        select(PayfitEmployee)
-        .options(selectinload(PayfitEmployee.contracts))
-        .where(PayfitEmployee.is_active == True)
-    )
-    payfit_result = await session.execute(payfit_query)
-    payfit_employees = payfit_result.scalars().all()
-
-    # Deduplicate Payfit employees by email
-    payfit_employees_by_email = {}
-    for emp in payfit_employees:
-        if emp.email:
-            email_lower = emp.email.lower()
-            if email_lower not in payfit_employees_by_email:
-                payfit_employees_by_email[email_lower] = emp
-            elif emp.created_at and payfit_employees_by_email[email_lower].created_at:
-                if emp.created_at > payfit_employees_by_email[email_lower].created_at:
-                    payfit_employees_by_email[email_lower] = emp
-
-    # Get all Gryzzly declarations for the wider date range with project info
-    # We fetch 6 months before and after to have data ready for navigation
-    declarations_query = (
-        select(GryzzlyDeclaration)
-        .options(
-            selectinload(GryzzlyDeclaration.project),
-            selectinload(GryzzlyDeclaration.collaborator),
-        )
-        .where(
-            and_(
-                GryzzlyDeclaration.date >= query_start_date,
-                GryzzlyDeclaration.date <= query_end_date,
-            )
-        )
+    Set `neighbours` to also receive the N months before and after the
+    requested one (computed from the same queries) to prefetch navigation.
+    With `mode=aggregated`, declarations are replaced by hours summed per day
+    and project: a `projects` table of [id, name, code] and, per collaborator,
+    `hours` rows of [day, project index, hours]. Details of a cell are served
+    by /plan-charge/cell.
+    With `format=columnar`, each month is encoded as project and collaborator
+    tables plus dense per-day hour vectors (see app.services.columnar).
+    Send `Accept: application/msgpack` to receive MessagePack instead of JSON.
+    Months are served from a materialized cache with an ETag; send it back in
+    If-None-Match to get a 304 when the month did not change.
+    """
+    service = PlanChargeService(session)
+    snapshot = await service.get_month_snapshot(
+        year,
+        month,
+        neighbour_months=neighbours,
+        mode=mode,
+        response_format=response_format,
     )
-    declarations_result = await session.execute(declarations_query)
-    all_declarations = declarations_result.scalars().all()
-
-    # Get all Payfit absences for the month
-    absences_query = (
-        select(PayfitAbsence)
-        .options(selectinload(PayfitAbsence.employee))
-        .where(
-            and_(
-                PayfitAbsence.start_date <= month_end_date,
-                PayfitAbsence.end_date >= month_start_date,
-                PayfitAbsence.status.in_(
-                    ["approved", "pending"]
-                ),  # Only show approved or pending absences
-            )
+    return _snapshot_response(snapshot, if_none_match, accept)
+
+
+@router.get("/plan-charge/range")
+async def get_plan_charge_range(
+    start: str = Query(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$"),
+    end: str = Query(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$"),
+    mode: str = Query(MODE_DETAILED, pattern=f"^({MODE_DETAILED}|{MODE_AGGREGATED})$"),
+    response_format: str = Query(
+        FORMAT_NESTED, alias="format", pattern=f"^({FORMAT_NESTED}|{FORMAT_COLUMNAR})$"
+    ),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    Stream the plan de charge of every month from `start` to `end` (YYYY-MM)
+    One JSON document per line (NDJSON), in month order, each sent as soon as
+    it is computed. Months carry forecasts next to declarations and absences;
+    `mode` and `format` behave as on /plan-charge.
+    """
+    months = iter_months(parse_month(start), parse_month(end))
+    if not months:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if len(months) > MAX_RANGE_MONTHS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range is limited to {MAX_RANGE_MONTHS} months",
         )
+
+    service = PlanChargeService(session)
+
+    async def lines():
+        async for payload in service.stream_months(
+            months, mode=mode, response_format=response_format
+        ):
+            yield json.dumps(payload, separators=(",", ":"), default=str) + "\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "private, no-cache"},
     )
-    absences_result = await session.execute(absences_query)
-    all_absences = absences_result.scalars().all()
-
-    # Build the response structure
-    plan_charge_data = []
-
-    # Process Gryzzly collaborators
-    for gryzzly_collab in gryzzly_collaborators:
-        if not gryzzly_collab.email:
-            continue
-
-        email_lower = gryzzly_collab.email.lower()
-        payfit_emp = payfit_employees_by_email.get(email_lower)
-
-        # Get declarations for this collaborator within the requested month
-        collab_declarations = [
-            d
-            for d in all_declarations
-            if d.collaborator_id == gryzzly_collab.id
-            and d.date >= month_start_date
-            and d.date <= month_end_date
-        ]
-
-        # Get absences for this collaborator (if they have a Payfit record)
-        collab_absences = []
-        if payfit_emp:
-            collab_absences = [
-                a for a in all_absences if a.payfit_employee_id == payfit_emp.id
-            ]
-
-        # Format declarations by date
-        declarations_by_date = {}
-        for decl in collab_declarations:
-            date_str = decl.date.isoformat()
-            if date_str not in declarations_by_date:
-                declarations_by_date[date_str] = []
-
-            declarations_by_date[date_str].append(
-                {
-                    "project_id": str(decl.project_id),
-                    "project_name": decl.project.name if decl.project else "Unknown",
-                    "project_code": decl.project.code if decl.project else None,
-                    "hours": decl.duration_hours,
-                    "description": decl.description,
-                    "status": decl.status,
-                    "is_billable": decl.is_billable,
-                }
-            )
 
-        # Format absences
-        absences_list = []
-        for absence in collab_absences:
-            # Calculate which days of the month this absence covers
-            absence_start = max(absence.start_date, month_start_date)
-            absence_end = min(absence.end_date, month_end_date)
-
-            absences_list.append(
-                {
-                    "type": absence.absence_type,
-                    "start_date": absence_start.isoformat(),
-                    "end_date": absence_end.isoformat(),
-                    "duration_days": absence.duration_days,
-                    "status": absence.status,
-                }
-            )
 
-        plan_charge_data.append(
-            {
-                "collaborator_id": str(gryzzly_collab.id),
-                "name": f"{gryzzly_collab.first_name or ''} {gryzzly_collab.last_name or ''}".strip()
-                or gryzzly_collab.email,
-                "email": gryzzly_collab.email,
-                "matricule": gryzzly_collab.matricule,
-                "gryzzly_id": gryzzly_collab.gryzzly_id,
-                "payfit_id": payfit_emp.payfit_id if payfit_emp else None,
-                "declarations": declarations_by_date,
-                "absences": absences_list,
-            }
+@router.get("/plan-charge/export")
+async def export_plan_charge(
+    start_date: date,
+    end_date: date,
+    export_format: str = Query(
+        EXPORT_CSV, alias="format", pattern=f"^({EXPORT_CSV}|{EXPORT_XLSX})$"
+    ),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    Export declarations, forecasts and absences of a date range as CSV or XLSX
+    One row per collaborator, day and item; absences are expanded to working days.
+    Rows are read in batches from server-side cursors and written as they come.
+    """
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=400, detail="end_date must not be before start_date"
         )
 
-    # Process Payfit-only employees (no Gryzzly record)
-    processed_emails = {c.email.lower() for c in gryzzly_collaborators if c.email}
-
-    for email_lower, payfit_emp in payfit_employees_by_email.items():
-        if email_lower in processed_emails:
-            continue
-
-        # Get absences for this employee
-        collab_absences = [
-            a for a in all_absences if a.payfit_employee_id == payfit_emp.id
-        ]
-
-        # Format absences
-        absences_list = []
-        for absence in collab_absences:
-            # Calculate which days of the month this absence covers
-            absence_start = max(absence.start_date, month_start_date)
-            absence_end = min(absence.end_date, month_end_date)
-
-            absences_list.append(
-                {
-                    "type": absence.absence_type,
-                    "start_date": absence_start.isoformat(),
-                    "end_date": absence_end.isoformat(),
-                    "duration_days": absence.duration_days,
-                    "status": absence.status,
-                }
-            )
+    exporter = PlanChargeExporter(session)
+    filename = f"plan_de_charge_{start_date.isoformat()}_{end_date.isoformat()}"
 
-        plan_charge_data.append(
-            {
-                "collaborator_id": f"payfit_{payfit_emp.id}",
-                "name": f"{payfit_emp.first_name or ''} {payfit_emp.last_name or ''}".strip()
-                or payfit_emp.email,
-                "email": payfit_emp.email,
-                "matricule": None,
-                "gryzzly_id": None,
-                "payfit_id": payfit_emp.payfit_id,
-                "declarations": {},  # No Gryzzly declarations
-                "absences": absences_list,
-            }
+    if export_format == EXPORT_XLSX:
+        if not xlsx_available():
+            raise HTTPException(status_code=501, detail="XLSX export is not available")
+        return StreamingResponse(
+            exporter.stream_xlsx(start_date, end_date),
+            media_type=XLSX_MEDIA_TYPE,
+            headers={"Content-Disposition": f"attachment; filename={filename}.xlsx"},
         )
 
-    return {
-        "year": year,
-        "month": month,
-        "start_date": month_start_date.isoformat(),
-        "end_date": month_end_date.isoformat(),
-        "collaborators": plan_charge_data,
-    }
+    return StreamingResponse(
+        exporter.stream_csv(start_date, end_date),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f"attachment; filename={filename}.csv"},
+    )
+
+
+@router.get("/plan-charge/cell")
+async def get_plan_charge_cell(
+    collaborator_id: str,
+    date: date,
+    project_id: Opt[str] = None,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+) -> List[Dict[str, Any]]:
+    """
+    Get the declarations behind one cell of the aggregated plan de charge
+    """
+    service = PlanChargeService(session)
+    return await service.get_cell_details(collaborator_id, date, project_id)
 
 
 @router.get("/projects-with-tasks")
@@ -660,60 +584,33 @@ async def create_forecast(
 ) -> Dict[str, Any]:
     """
     Create a single forecast entry
+    Updates the existing entry of the same collaborator, project, task and date
     """
-    # Check if forecast already exists for this date/collaborator/project
-    existing_query = select(Forecast).where(
-        and_(
-            Forecast.collaborator_id == forecast_data.collaborator_id,
-            Forecast.project_id == forecast_data.project_id,
-            Forecast.date == forecast_data.date,
-        )
+    service = ForecastService(session)
+    result = await service.upsert_slots(
+        [
+            (
+                forecast_data.collaborator_id,
+                forecast_data.project_id,
+                forecast_data.task_id,
+            )
+        ],
+        [forecast_data.date],
+        forecast_data.hours,
+        description=forecast_data.description,
+        user_id=current_user.id if current_user else None,
     )
 
-    if forecast_data.task_id:
-        existing_query = existing_query.where(Forecast.task_id == forecast_data.task_id)
-    else:
-        existing_query = existing_query.where(Forecast.task_id == None)
-
-    existing_result = await session.execute(existing_query)
-    existing = existing_result.scalar_one_or_none()
-
-    if existing:
-        # Update existing forecast
-        existing.hours = forecast_data.hours
-        existing.description = forecast_data.description
-        existing.modified_by = current_user.id if current_user else None
-        existing.updated_at = datetime.utcnow()
-
-        await session.commit()
-
-        return {
-            "id": str(existing.id),
-            "message": "Forecast updated",
-            "action": "updated",
-        }
-    else:
-        # Create new forecast
-        forecast = Forecast(
-            collaborator_id=forecast_data.collaborator_id,
-            project_id=forecast_data.project_id,
-            task_id=forecast_data.task_id,
-            date=forecast_data.date,
-            hours=forecast_data.hours,
-            description=forecast_data.description,
-            created_by=current_user.id if current_user else None,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
-        )
-
-        session.add(forecast)
-        await session.commit()
+    await PlanChargeCache(session).invalidate(forecast_data.date, forecast_data.date)
+    await session.commit()
 
-        return {
-            "id": str(forecast.id),
-            "message": "Forecast created",
-            "action": "created",
-        }
+    action = "created" if result["created"] else "updated"
+    return {
+        "id": str(result["ids"][0]),
+        "batch_id": str(result["batch_id"]),
+        "message": f"Forecast {action}",
+        "action": action,
+    }
 
 
 @router.post("/forecast/batch")
@@ -725,75 +622,44 @@ async def create_forecast_batch(
     """
     Create multiple forecast entries for a date range
     Skips weekends and holidays
-    """
-    from app.models.gryzzly import GryzzlyTask
 
-    # Get list of dates in range (excluding weekends and holidays)
-    fr_holidays = holidays.France()
-    dates_to_create = []
-    current_date = forecast_data.start_date
-
-    while current_date <= forecast_data.end_date:
-        # Skip weekends and holidays
-        if (
-            current_date.weekday() < 5 and current_date not in fr_holidays
-        ):  # Monday = 0, Friday = 4
-            dates_to_create.append(current_date)
-        current_date += timedelta(days=1)
-
-    created_count = 0
-    updated_count = 0
-
-    for forecast_date in dates_to_create:
-        # Check if forecast already exists
-        existing_query = select(Forecast).where(
-            and_(
-                Forecast.collaborator_id == forecast_data.collaborator_id,
-                Forecast.project_id == forecast_data.project_id,
-                Forecast.date == forecast_date,
-            )
+    All working days of every target are written by a single
+    INSERT ... ON CONFLICT DO UPDATE per chunk of rows.
+    """
+    targets = forecast_data.all_targets()
+    if not targets:
+        raise HTTPException(
+            status_code=400,
+            detail="Provide collaborator_id and project_id, or targets",
         )
 
-        if forecast_data.task_id:
-            existing_query = existing_query.where(
-                Forecast.task_id == forecast_data.task_id
-            )
-        else:
-            existing_query = existing_query.where(Forecast.task_id == None)
-
-        existing_result = await session.execute(existing_query)
-        existing = existing_result.scalar_one_or_none()
-
-        if existing:
-            # Update existing forecast
-            existing.hours = forecast_data.hours_per_day
-            existing.description = forecast_data.description
-            existing.modified_by = current_user.id if current_user else None
-            existing.updated_at = datetime.utcnow()
-            updated_count += 1
-        else:
-            # Create new forecast
-            forecast = Forecast(
-                collaborator_id=forecast_data.collaborator_id,
-                project_id=forecast_data.project_id,
-                task_id=forecast_data.task_id,
-                date=forecast_date,
-                hours=forecast_data.hours_per_day,
-                description=forecast_data.description,
-                created_by=current_user.id if current_user else None,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow(),
-            )
-            session.add(forecast)
-            created_count += 1
+    # Get list of dates in range (excluding weekends and holidays)
+    dates_to_create = working_days(forecast_data.start_date, forecast_data.end_date)
+
+    service = ForecastService(session)
+    result = await service.upsert_slots(
+        [
+            (target.collaborator_id, target.project_id, target.task_id)
+            for target in targets
+        ],
+        dates_to_create,
+        forecast_data.hours_per_day,
+        description=forecast_data.description,
+        user_id=current_user.id if current_user else None,
+    )
 
+    await PlanChargeCache(session).invalidate(
+        forecast_data.start_date, forecast_data.end_date
+    )
     await session.commit()
 
     return {
-        "message": f"Batch forecast operation completed",
-        "created": created_count,
-        "updated": updated_count,
+        "message": "Batch forecast operation completed",
+        "created": result["created"],
+        "updated": result["updated"],
         "total_days": len(dates_to_create),
+        "targets": len(targets),
+        "batch_id": str(result["batch_id"]),
     }
 
 
@@ -802,11 +668,18 @@ async def get_forecasts(
     year: int,
     month: int,
     collaborator_id: Opt[str] = None,
+    response_format: str = Query(
+        FORMAT_NESTED, alias="format", pattern=f"^({FORMAT_NESTED}|{FORMAT_COLUMNAR})$"
+    ),
+    accept: Optional[str] = Header(None),
     session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ) -> Dict[str, Any]:
     """
     Get forecast entries for a specific month
+
+    `format=columnar` returns per-(collaborator, project, task) hour vectors,
+    and `Accept: application/msgpack` switches the encoding to MessagePack.
     """
     from sqlalchemy.orm import selectinload
 
@@ -836,6 +709,12 @@ async def get_forecasts(
     result = await session.execute(query)
     forecasts = result.scalars().all()
 
+    if response_format == FORMAT_COLUMNAR:
+        data = encode_forecast_month(year, month, start_date, end_date, forecasts)
+        if wants_msgpack(accept):
+            return msgpack_response(data, headers={"Vary": "Accept"})
+        return data
+
     # Group forecasts by collaborator and date
     forecasts_by_collaborator = {}
 
@@ -879,13 +758,16 @@ async def get_forecasts(
             }
         )
 
-    return {
+    data = {
         "year": year,
         "month": month,
         "start_date": start_date.isoformat(),
         "end_date": end_date.isoformat(),
         "collaborators": list(forecasts_by_collaborator.values()),
     }
+    if wants_msgpack(accept):
+        return msgpack_response(data, headers={"Vary": "Accept"})
+    return data
 
 
 @router.put("/forecast/{forecast_id}")
@@ -911,6 +793,7 @@ async def update_forecast(
     forecast.modified_by = current_user.id if current_user else None
     forecast.updated_at = datetime.utcnow()
 
+    await PlanChargeCache(session).invalidate(forecast.date, forecast.date)
     await session.commit()
 
     return {"id": str(forecast.id), "message": "Forecast updated successfully"}
@@ -924,27 +807,138 @@ async def delete_forecast_group(
 ) -> Dict[str, Any]:
     """
     Delete a group of forecast entries
+    Entries are selected by `forecast_ids`, or by `batch_id` when given
     """
-    deleted_count = 0
+    if group_data.batch_id:
+        deleted_dates = await ForecastService(session).delete_where(
+            batch_id=group_data.batch_id
+        )
+    elif group_data.forecast_ids:
+        deleted_dates = await ForecastService(session).delete_where(
+            forecast_ids=group_data.forecast_ids
+        )
+    else:
+        deleted_dates = []
 
-    for forecast_id in group_data.forecast_ids:
-        result = await session.execute(
-            select(Forecast).where(Forecast.id == forecast_id)
+    await _invalidate_forecast_dates(session, deleted_dates)
+    await session.commit()
+
+    return {
+        "message": f"Deleted {len(deleted_dates)} forecast entries",
+        "deleted_count": len(deleted_dates),
+    }
+
+
+@router.delete("/forecast/batch/{batch_id}")
+async def delete_forecast_batch(
+    batch_id: str,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    Delete every forecast entry of a batch in one statement
+    """
+    deleted_dates = await ForecastService(session).delete_where(batch_id=batch_id)
+
+    await _invalidate_forecast_dates(session, deleted_dates)
+    await session.commit()
+
+    return {
+        "message": f"Deleted {len(deleted_dates)} forecast entries",
+        "deleted_count": len(deleted_dates),
+    }
+
+
+@router.put("/forecast/batch/{batch_id}")
+async def update_forecast_batch(
+    batch_id: str,
+    update_data: ForecastUpdate,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    Update hours and description of every forecast entry of a batch
+    A description left out of the request is kept.
+    """
+    updated_dates = await ForecastService(session).update_where(
+        update_data.model_dump(exclude_unset=True),
+        user_id=current_user.id if current_user else None,
+        batch_id=batch_id,
+    )
+
+    await _invalidate_forecast_dates(session, updated_dates)
+    await session.commit()
+
+    return {
+        "message": f"Updated {len(updated_dates)} forecast entries",
+        "updated_count": len(updated_dates),
+    }
+
+
+@router.post("/forecast/bulk-delete")
+async def bulk_delete_forecasts(
+    selection: ForecastSelection,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    Delete every forecast entry matching ids, batch and/or a date-range predicate
+    """
+    try:
+        deleted_dates = await ForecastService(session).delete_where(
+            **selection.model_dump(exclude_none=True)
         )
-        forecast = result.scalar_one_or_none()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        if forecast:
-            await session.delete(forecast)
-            deleted_count += 1
+    await _invalidate_forecast_dates(session, deleted_dates)
+    await session.commit()
+
+    return {
+        "message": f"Deleted {len(deleted_dates)} forecast entries",
+        "deleted_count": len(deleted_dates),
+    }
+
+
+@router.post("/forecast/bulk-update")
+async def bulk_update_forecasts(
+    update_data: ForecastBulkUpdate,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    Set the hours of every forecast entry matching a selection
+    The description is only changed when sent
+    """
+    values = {"hours": update_data.hours}
+    if "description" in update_data.model_fields_set:
+        values["description"] = update_data.description
+
+    criteria = update_data.model_dump(
+        exclude_none=True, exclude={"hours", "description"}
+    )
+    try:
+        updated_dates = await ForecastService(session).update_where(
+            values, user_id=current_user.id if current_user else None, **criteria
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
+    await _invalidate_forecast_dates(session, updated_dates)
     await session.commit()
 
     return {
-        "message": f"Deleted {deleted_count} forecast entries",
-        "deleted_count": deleted_count,
+        "message": f"Updated {len(updated_dates)} forecast entries",
+        "updated_count": len(updated_dates),
     }
 
 
+async def _invalidate_forecast_dates(session: AsyncSession, dates: List[date]) -> None:
+    """Drop the cached plan de charge months covering the given dates"""
+    if dates:
+        await PlanChargeCache(session).invalidate(min(dates), max(dates))
+
+
 @router.delete("/forecast/{forecast_id}")
 async def delete_forecast(
     forecast_id: str,
@@ -962,6 +956,7 @@ async def delete_forecast(
         raise HTTPException(status_code=404, detail="Forecast not found")
 
     # Delete the forecast
+    await PlanChargeCache(session).invalidate(forecast.date, forecast.date)
     await session.delete(forecast)
     await session.commit()
 
@@ -976,16 +971,14 @@ async def get_forecast_group(
 ) -> Dict[str, Any]:
     """
     Get the group of forecasts that were created together.
-    Identifies forecasts that belong to the same batch based on:
+    Forecasts written since batch ids exist are grouped by `batch_id` and target
+    (collaborator, project, task).
+    Older entries are identified based on:
     - Same collaborator, project, task
     - Same hours per day
     - Same description
     - Created within a small time window
     """
-    from datetime import timedelta
-
-    from sqlalchemy import func
-
     # Get the reference forecast
     result = await session.execute(select(Forecast).where(Forecast.id == forecast_id))
     reference_forecast = result.scalar_one_or_none()
@@ -993,51 +986,16 @@ async def get_forecast_group(
     if not reference_forecast:
         raise HTTPException(status_code=404, detail="Forecast not found")
 
-    # Define time window for grouping (forecasts created within 2 seconds of each other)
-    from datetime import timezone
-
-    # Ensure created_at is timezone-aware for comparison
-    if reference_forecast.created_at.tzinfo is None:
-        # If naive, assume UTC
-        created_at_aware = reference_forecast.created_at.replace(tzinfo=timezone.utc)
-    else:
-        created_at_aware = reference_forecast.created_at
-
-    time_window = timedelta(seconds=2)
-    min_time = created_at_aware - time_window
-    max_time = created_at_aware + time_window
-
-    # Find all forecasts in the same group
-    # Use func.timezone to ensure proper comparison in database
-    group_query = select(Forecast).where(
-        and_(
+    if reference_forecast.batch_id:
+        # A batch can span several targets: keep the reference forecast's own
+        group_query = select(Forecast).where(
+            Forecast.batch_id == reference_forecast.batch_id,
             Forecast.collaborator_id == reference_forecast.collaborator_id,
             Forecast.project_id == reference_forecast.project_id,
-            Forecast.hours == reference_forecast.hours,
-            func.coalesce(
-                func.timezone("UTC", Forecast.created_at), Forecast.created_at
-            )
-            >= min_time,
-            func.coalesce(
-                func.timezone("UTC", Forecast.created_at), Forecast.created_at
-            )
-            <= max_time,
+            Forecast.task_id.is_not_distinct_from(reference_forecast.task_id),
         )
-    )
-
-    # Handle task_id (can be None)
-    if reference_forecast.task_id:
-        group_query = group_query.where(Forecast.task_id == reference_forecast.task_id)
     else:
-        group_query = group_query.where(Forecast.task_id == None)
-
-    # Handle description (can be None)
-    if reference_forecast.description:
-        group_query = group_query.where(
-            Forecast.description == reference_forecast.description
-        )
-    else:
-        group_query = group_query.where(Forecast.description == None)
+        group_query = _legacy_forecast_group_query(reference_forecast)
 
     result = await session.execute(group_query.order_by(Forecast.date))
     group_forecasts = result.scalars().all()
@@ -1066,6 +1024,9 @@ async def get_forecast_group(
 
     return {
         "forecast_ids": [str(f.id) for f in group_forecasts],
+        "batch_id": (
+            str(reference_forecast.batch_id) if reference_forecast.batch_id else None
+        ),
         "collaborator_id": str(reference_forecast.collaborator_id),
         "project_id": str(reference_forecast.project_id),
         "project_name": project.name if project else None,
@@ -1079,3 +1040,56 @@ async def get_forecast_group(
         "description": reference_forecast.description,
         "total_days": len(group_forecasts),
     }
+
+
+def _legacy_forecast_group_query(reference_forecast: Forecast):
+    """
+    Rediscover the group of a forecast written before batch ids existed
+    Forecasts with the same slot data created within 2 seconds of each other
+    """
+    from datetime import timedelta, timezone
+
+    # Ensure created_at is timezone-aware for comparison
+    if reference_forecast.created_at.tzinfo is None:
+        # If naive, assume UTC
+        created_at_aware = reference_forecast.created_at.replace(tzinfo=timezone.utc)
+    else:
+        created_at_aware = reference_forecast.created_at
+
+    time_window = timedelta(seconds=2)
+    min_time = created_at_aware - time_window
+    max_time = created_at_aware + time_window
+
+    # Use func.timezone to ensure proper comparison in database
+    group_query = select(Forecast).where(
+        and_(
+            Forecast.batch_id == None,
+            Forecast.collaborator_id == reference_forecast.collaborator_id,
+            Forecast.project_id == reference_forecast.project_id,
+            Forecast.hours == reference_forecast.hours,
+            func.coalesce(
+                func.timezone("UTC", Forecast.created_at), Forecast.created_at
+            )
+            >= min_time,
+            func.coalesce(
+                func.timezone("UTC", Forecast.created_at), Forecast.created_at
+            )
+            <= max_time,
+        )
+    )
+
+    # Handle task_id (can be None)
+    if reference_forecast.task_id:
+        group_query = group_query.where(Forecast.task_id == reference_forecast.task_id)
+    else:
+        group_query = group_query.where(Forecast.task_id == None)
+
+    # Handle description (can be None)
+    if reference_forecast.description:
+        group_query = group_query.where(
+            Forecast.description == reference_forecast.description
+        )
+    else:
+        group_query = group_query.where(Forecast.description == None)
+
+    return group_query
@@ -18,8 +18,13 @@ from app.models.gryzzly import (
     GryzzlyTask,
 )
 from app.models.person import User
-from app.services.gryzzly_client import GryzzlyAPIClient
-from app.services.gryzzly_sync import GryzzlySyncService
+from app.services.gryzzly_client import GryzzlyAPIClient, gryzzly_rate_limiter
+from app.services.gryzzly_sync import (
+    SYNC_MODE_AUTO,
+    SYNC_MODE_FULL,
+    SYNC_MODE_INCREMENTAL,
+    GryzzlySyncService,
+)
 
 router = APIRouter()
 
@@ -84,6 +89,7 @@ async def get_sync_status(
             "declarations": declaration_count,
         },
         "api_connected": api_connected,
+        "rate_limiter": gryzzly_rate_limiter.stats(),
     }
 
 
@@ -205,7 +211,7 @@ async def sync_collaborators(
         result = await sync_service.sync_collaborators()
         return {
             "status": "completed",
-            "message": f"Synchronisation terminée: {result['created']} créés, {result['updated']} mis à jour",
+            "message": f"Synchronisation terminée: {result['created']} créés, {result['updated']} mis à jour, {result['unchanged']} inchangés",
             "details": result,
         }
     except Exception as e:
@@ -227,7 +233,7 @@ async def sync_projects(
         result = await sync_service.sync_projects()
         return {
             "status": "completed",
-            "message": f"Synchronisation terminée: {result['created']} créés, {result['updated']} mis à jour",
+            "message": f"Synchronisation terminée: {result['created']} créés, {result['updated']} mis à jour, {result['unchanged']} inchangés",
             "details": result,
         }
     except Exception as e:
@@ -249,7 +255,7 @@ async def sync_tasks(
         result = await sync_service.sync_tasks()
         return {
             "status": "completed",
-            "message": f"Synchronisation terminée: {result['created']} créés, {result['updated']} mis à jour",
+            "message": f"Synchronisation terminée: {result['created']} créés, {result['updated']} mis à jour, {result['unchanged']} inchangés",
             "details": result,
         }
     except Exception as e:
@@ -263,17 +269,28 @@ async def sync_tasks(
 async def sync_declarations(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    mode: str = Query(
+        SYNC_MODE_AUTO,
+        pattern=f"^({SYNC_MODE_AUTO}|{SYNC_MODE_FULL}|{SYNC_MODE_INCREMENTAL})$",
+    ),
     background_tasks: BackgroundTasks = None,
     session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ) -> Dict[str, Any]:
-    """Trigger declaration synchronization from Gryzzly"""
+    """
+    Trigger declaration synchronization from Gryzzly
+
+    `mode=incremental` only applies declarations changed since the last run;
+    `auto` does so too, with a full reconciliation when one is due.
+    """
     sync_service = GryzzlySyncService(session)
     try:
-        result = await sync_service.sync_declarations(start_date, end_date)
+        result = await sync_service.sync_declarations(
+            start_date, end_date, mode=mode, triggered_by=current_user.email
+        )
         return {
             "status": "completed",
-            "message": f"Synchronisation terminée: {result['created']} créés, {result['updated']} mis à jour",
+            "message": f"Synchronisation terminée: {result['created']} créés, {result['updated']} mis à jour, {result['unchanged']} inchangés",
             "details": result,
         }
     except Exception as e:
@@ -539,6 +556,7 @@ async def get_sync_logs(
             "records_synced": log.records_synced,
             "records_created": log.records_created,
             "records_updated": log.records_updated,
+            "records_unchanged": log.records_unchanged,
             "records_failed": log.records_failed,
             "error_message": log.error_message,
             "triggered_by": log.triggered_by,
@@ -18,7 +18,12 @@ from app.models.payfit import (
 )
 from app.models.person import User
 from app.services.payfit_client import PayfitAPIClient
-from app.services.payfit_sync import PayfitSyncService
+from app.services.payfit_sync import (
+    SYNC_MODE_AUTO,
+    SYNC_MODE_FULL,
+    SYNC_MODE_INCREMENTAL,
+    PayfitSyncService,
+)
 
 router = APIRouter()
 
@@ -294,10 +299,19 @@ async def sync_absences(
 @router.post("/sync/full")
 async def sync_full(
     background_tasks: BackgroundTasks,
+    mode: str = Query(
+        SYNC_MODE_AUTO,
+        pattern=f"^({SYNC_MODE_AUTO}|{SYNC_MODE_FULL}|{SYNC_MODE_INCREMENTAL})$",
+    ),
     session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ) -> Dict[str, Any]:
-    """Trigger full synchronization from Payfit"""
+    """
+    Trigger full synchronization from Payfit
+
+    `mode=incremental` only re-reads recent absences, and employees when due;
+    `auto` does so too, with a weekly full reconciliation.
+    """
 
     # Check if any sync is already running
     result = await session.execute(
@@ -317,7 +331,7 @@ async def sync_full(
         sync_service = PayfitSyncService(session)
 
         # Start full sync in background
-        background_tasks.add_task(sync_service.sync_all, "manual")
+        background_tasks.add_task(sync_service.sync_all, "manual", mode)
 
         return {
             "status": "triggered",
@@ -551,6 +565,7 @@ async def get_sync_logs(
             "records_synced": log.records_synced,
             "records_created": log.records_created,
             "records_updated": log.records_updated,
+            "records_unchanged": log.records_unchanged,
             "records_failed": log.records_failed,
             "error_message": log.error_message,
             "triggered_by": log.triggered_by,
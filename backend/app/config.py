@@ -107,10 +107,43 @@ class Settings(BaseSettings):
     PAYFIT_API_URL: str = "https://partner-api.payfit.com"
     PAYFIT_API_KEY: Optional[str] = None
     PAYFIT_COMPANY_ID: Optional[str] = None
+    PAYFIT_MAX_CONCURRENCY: int = 4  # in-flight requests to the Payfit host
+    PAYFIT_ABSENCE_SHARD_CONCURRENCY: int = 4  # monthly absence shards paged at once
+    # Incremental syncs re-read absences this many days back and pull employees
+    # at most this often; a full reconciliation runs weekly
+    PAYFIT_INCREMENTAL_LOOKBACK_DAYS: int = 35
+    PAYFIT_EMPLOYEE_SYNC_INTERVAL_HOURS: int = 24
+    PAYFIT_FULL_SYNC_INTERVAL_HOURS: int = 168
+    # Retries of 429, 5xx and transport errors, with jittered exponential
+    # back-off unless the API sends Retry-After
+    PAYFIT_MAX_RETRIES: int = 5
+    PAYFIT_RETRY_BASE_DELAY: float = 1.0  # seconds
+    PAYFIT_RETRY_MAX_DELAY: float = 30.0  # seconds
 
     GRYZZLY_API_URL: str = "https://api.gryzzly.io/v1"
     GRYZZLY_API_KEY: Optional[str] = None
     GRYZZLY_USE_MOCK: bool = True
+    GRYZZLY_RATE_LIMIT_REQUESTS: int = 50
+    GRYZZLY_RATE_LIMIT_WINDOW: float = 10.0  # seconds
+    # Optional stricter budgets per RPC over the same window, e.g.
+    # {"declarations.list": 30}
+    GRYZZLY_ENDPOINT_RATE_LIMITS: Dict[str, int] = {}
+    # Incremental declaration syncs re-read this many days back; older edits
+    # are picked up by the periodic full reconciliation
+    GRYZZLY_INCREMENTAL_LOOKBACK_DAYS: int = 35
+    GRYZZLY_FULL_SYNC_INTERVAL_HOURS: int = 24
+    GRYZZLY_MAX_CONCURRENCY: int = 10  # in-flight per-user declaration requests
+    GRYZZLY_REFERENCE_CACHE_TTL: int = 300  # seconds, task and user maps
+    GRYZZLY_DECLARATION_QUEUE_SIZE: int = 4  # user batches fetched ahead of writes
+    # The next incremental run re-reads declarations updated this long before the
+    # start of the previous one, covering edits made during it and late commits
+    GRYZZLY_WATERMARK_SAFETY_MARGIN_MINUTES: int = 30
+
+    # Outbound HTTP connection pool shared by the API clients
+    HTTP_POOL_MAX_CONNECTIONS: int = 20
+    HTTP_POOL_MAX_KEEPALIVE: int = 10
+    HTTP_POOL_KEEPALIVE_EXPIRY: float = 30.0  # seconds
+    HTTP2_ENABLED: bool = True  # used when the h2 package is installed
 
     # Azure AD Configuration
     AZURE_AD_TENANT_ID: Optional[str] = None
@@ -159,6 +192,8 @@ class Settings(BaseSettings):
     CACHE_TTL_DEFAULT: int = 300  # 5 minutes
     CACHE_TTL_REPORTS: int = 900  # 15 minutes
     CACHE_TTL_STATIC: int = 3600  # 1 hour
+    PLAN_CHARGE_CACHE_ENABLED: bool = True  # Materialized plan de charge months
+    COLLABORATOR_STATS_CACHE_TTL: int = 30  # seconds, 0 disables
 
     # Business Rules
     MAX_ALLOCATION_PERCENTAGE: int = 200  # Allow up to 200% allocation for detection
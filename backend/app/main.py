@@ -19,6 +19,7 @@ from app.database import close_db, init_db
 from app.middleware.logging import LoggingMiddleware
 from app.middleware.rate_limiting import RateLimitMiddleware
 from app.middleware.request_id import RequestIDMiddleware
+from app.services.http_client import close_http_client, start_http_client
 from app.utils.logging import setup_logging
 
 # Setup logging
@@ -36,11 +37,13 @@ async def lifespan(app: FastAPI):
         await init_db()
 
     # Initialize other services here (Redis, etc.)
+    await start_http_client()
 
     yield
 
     # Cleanup
     logger.info("Shutting down Plan Charge v9 backend...")
+    await close_http_client()
     await close_db()
 
 
@@ -5,6 +5,7 @@ from app.models.audit import ApiToken, AuditLog, RefreshToken
 from app.models.base import BaseModel, SoftDeleteMixin, TimestampMixin
 from app.models.benefit import BenefitPolicy, BenefitType, PersonBenefit
 from app.models.calendar import Absence, Calendar, Capacity, Holiday
+from app.models.collaborator_directory import UnifiedCollaborator
 from app.models.forecast import Forecast
 from app.models.gryzzly import (
     GryzzlyCollaborator,
@@ -42,6 +43,7 @@ from app.models.person import (
     User,
     UserOrgRole,
 )
+from app.models.plan_charge import PlanChargeCacheState, PlanChargeSnapshot
 from app.models.project import (
     Epic,
     Project,
@@ -125,4 +127,9 @@ __all__ = [
     "TREligibilityOverride",
     # Forecast
     "Forecast",
+    # Plan de charge
+    "PlanChargeSnapshot",
+    "PlanChargeCacheState",
+    # Collaborator directory
+    "UnifiedCollaborator",
 ]
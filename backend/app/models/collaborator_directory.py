@@ -0,0 +1,73 @@
+"""
+Unified collaborator directory
+Precomputed merge of Gryzzly collaborators, Payfit employees, their contracts
+and TR eligibility overrides
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Index, String
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import BaseModel
+
+# Directory scopes: merge of every record, or of active records only
+SCOPE_ALL = "all"
+SCOPE_ACTIVE = "active"
+
+
+class UnifiedCollaborator(BaseModel):
+    """One merged collaborator per email, rebuilt after each sync and override edit"""
+
+    __tablename__ = "unified_collaborators"
+    __table_args__ = (
+        Index(
+            "uq_unified_collaborators_scope_key",
+            "scope",
+            "collaborator_key",
+            unique=True,
+        ),
+        Index("ix_unified_collaborators_scope_name", "scope", "sort_name"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # Merge scope (see SCOPE_ALL / SCOPE_ACTIVE)
+    scope = Column(String(20), nullable=False)
+
+    # Identifier exposed by the API: Gryzzly UUID or "payfit_<uuid>"
+    collaborator_key = Column(String(64), nullable=False)
+    source = Column(String(20), nullable=False)  # gryzzly, payfit or both
+
+    # Identity
+    email = Column(String(255), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
+    sort_name = Column(String(255, collation="C"), nullable=False)  # lowercased name
+    first_name = Column(String(100), nullable=True)
+    last_name = Column(String(100), nullable=True)
+    matricule = Column(String(50), nullable=True)
+    department = Column(String(255), nullable=True)
+    position = Column(String(255), nullable=True)
+    is_active = Column(Boolean, nullable=False, default=True)
+
+    # Source records
+    gryzzly_collaborator_id = Column(UUID(as_uuid=True), nullable=True, index=True)
+    gryzzly_id = Column(String(255), nullable=True)
+    payfit_employee_id = Column(UUID(as_uuid=True), nullable=True)
+    payfit_id = Column(String(255), nullable=True, index=True)
+
+    # TR eligibility inputs and result
+    has_contracts = Column(Boolean, nullable=False, default=False)
+    has_active_contract = Column(Boolean, nullable=False, default=False)
+    override_eligible = Column(Boolean, nullable=True)
+    eligible_tr = Column(Boolean, nullable=False, default=False)
+
+    last_synced_at = Column(DateTime, nullable=True)
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return (
+            f"<UnifiedCollaborator(scope={self.scope}, "
+            f"key={self.collaborator_key}, email={self.email})>"
+        )
@@ -4,7 +4,7 @@ Forecast model for plan de charge predictions
 
 import uuid
 
-from sqlalchemy import Column, Date, Float, ForeignKey, Index, Text
+from sqlalchemy import Column, Date, Float, ForeignKey, Index, Text, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -19,6 +19,7 @@ class Forecast(BaseModel):
         Index("ix_forecasts_collaborator_date", "collaborator_id", "date"),
         Index("ix_forecasts_date", "date"),
         Index("ix_forecasts_project", "project_id"),
+        Index("ix_forecasts_batch_id", "batch_id"),
     )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -43,6 +44,9 @@ class Forecast(BaseModel):
     # Optional description
     description = Column(Text, nullable=True)
 
+    # Batch (one create or batch call) this entry was last written by
+    batch_id = Column(UUID(as_uuid=True), nullable=True)
+
     # Who created/modified this
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
     modified_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
@@ -62,3 +66,17 @@ class Forecast(BaseModel):
             f"<Forecast(id={self.id}, collaborator_id={self.collaborator_id}, "
             f"date={self.date}, hours={self.hours})>"
         )
+
+
+# A forecast slot is unique per collaborator, project, task (or none) and day;
+# NULL task ids are folded to the nil UUID so they collide too
+forecast_slot = (
+    Forecast.collaborator_id,
+    Forecast.project_id,
+    func.coalesce(
+        Forecast.task_id, text("'00000000-0000-0000-0000-000000000000'::uuid")
+    ),
+    Forecast.date,
+)
+
+Index("uq_forecasts_slot", *forecast_slot, unique=True)
@@ -16,6 +16,7 @@ from sqlalchemy import (
     Integer,
     String,
     Text,
+    UniqueConstraint,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -48,6 +49,7 @@ class GryzzlyCollaborator(BaseModel):
 
     # Metadata
     raw_data = Column(JSON, default={})
+    source_hash = Column(String(64), nullable=True)  # hash of the synced values
     last_synced_at = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -89,6 +91,7 @@ class GryzzlyProject(BaseModel):
 
     # Metadata
     raw_data = Column(JSON, default={})
+    source_hash = Column(String(64), nullable=True)  # hash of the synced values
     last_synced_at = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -127,6 +130,7 @@ class GryzzlyTask(BaseModel):
 
     # Metadata
     raw_data = Column(JSON, default={})
+    source_hash = Column(String(64), nullable=True)  # hash of the synced values
     last_synced_at = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -171,6 +175,7 @@ class GryzzlyDeclaration(BaseModel):
 
     # Metadata
     raw_data = Column(JSON, default={})
+    source_hash = Column(String(64), nullable=True)  # hash of the synced values
     last_synced_at = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -185,6 +190,13 @@ class GryzzlyCollaboratorProject(BaseModel):
     """Association table for collaborators and projects"""
 
     __tablename__ = "gryzzly_collaborator_projects"
+    __table_args__ = (
+        UniqueConstraint(
+            "collaborator_id",
+            "project_id",
+            name="uq_gryzzly_collaborator_projects_collaborator_project",
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     collaborator_id = Column(
@@ -228,6 +240,7 @@ class GryzzlySyncLog(BaseModel):
     records_synced = Column(Integer, default=0)
     records_created = Column(Integer, default=0)
     records_updated = Column(Integer, default=0)
+    records_unchanged = Column(Integer, default=0)
     records_failed = Column(Integer, default=0)
 
     # Error tracking
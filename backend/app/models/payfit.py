@@ -55,6 +55,7 @@ class PayfitEmployee(BaseModel):
 
     # Metadata
     raw_data = Column(JSON, default={})
+    source_hash = Column(String(64), nullable=True)  # hash of the synced values
     last_synced_at = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -94,6 +95,7 @@ class PayfitContract(BaseModel):
 
     # Metadata
     raw_data = Column(JSON, default={})
+    source_hash = Column(String(64), nullable=True)  # hash of the synced values
     last_synced_at = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -136,6 +138,7 @@ class PayfitAbsence(BaseModel):
 
     # Metadata
     raw_data = Column(JSON, default={})
+    source_hash = Column(String(64), nullable=True)  # hash of the synced values
     last_synced_at = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -165,6 +168,7 @@ class PayfitSyncLog(BaseModel):
     records_synced = Column(Integer, default=0)
     records_created = Column(Integer, default=0)
     records_updated = Column(Integer, default=0)
+    records_unchanged = Column(Integer, default=0)
     records_failed = Column(Integer, default=0)
 
     # Error tracking
@@ -0,0 +1,62 @@
+"""
+Materialized plan de charge snapshots
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, Date, DateTime, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import BaseModel
+
+
+class PlanChargeSnapshot(BaseModel):
+    """Store the serialized plan de charge of a month, one row per response variant"""
+
+    __tablename__ = "plan_charge_snapshots"
+    __table_args__ = (
+        Index(
+            "uq_plan_charge_snapshots_month_variant",
+            "year",
+            "month",
+            "variant",
+            unique=True,
+        ),
+        Index("ix_plan_charge_snapshots_range", "range_start", "range_end"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # Requested month and response variant (query options)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    variant = Column(String(255), nullable=False, default="default")
+
+    # Dates covered by the payload (wider than the month when neighbours are included)
+    range_start = Column(Date, nullable=False)
+    range_end = Column(Date, nullable=False)
+
+    # Serialized response and its entity tag
+    etag = Column(String(64), nullable=False)
+    payload = Column(Text, nullable=False)
+
+    generated_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return (
+            f"<PlanChargeSnapshot(year={self.year}, month={self.month}, "
+            f"variant={self.variant})>"
+        )
+
+
+class PlanChargeCacheState(BaseModel):
+    """Single-row cache generation, bumped by every snapshot invalidation"""
+
+    __tablename__ = "plan_charge_cache_state"
+
+    id = Column(Integer, primary_key=True, default=1)
+
+    # Snapshots built from data read under an older generation are not stored
+    generation = Column(BigInteger, nullable=False, default=0)
+    invalidated_at = Column(DateTime, nullable=True)
@@ -174,6 +174,7 @@ class GryzzlySyncLogInDB(BaseModel):
     records_synced: int = 0
     records_created: int = 0
     records_updated: int = 0
+    records_unchanged: int = 0
     records_failed: int = 0
     error_message: Optional[str] = None
     error_details: Optional[Dict[str, Any]] = None
@@ -102,6 +102,7 @@ class PayfitSyncLogResponse(BaseModel):
     records_synced: int = 0
     records_created: int = 0
     records_updated: int = 0
+    records_unchanged: int = 0
     records_failed: int = 0
     error_message: Optional[str] = None
     triggered_by: Optional[str] = None
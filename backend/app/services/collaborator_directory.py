@@ -0,0 +1,244 @@
+"""
+Unified collaborator directory service
+Merges Gryzzly collaborators, Payfit employees, contracts and TR overrides once,
+into the unified_collaborators table, so readers query one indexed row set
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.collaborator_directory import (
+    SCOPE_ACTIVE,
+    SCOPE_ALL,
+    UnifiedCollaborator,
+)
+from app.models.gryzzly import GryzzlyCollaborator
+from app.models.payfit import PayfitEmployee
+from app.models.tr_eligibility import TREligibilityOverride
+
+logger = logging.getLogger(__name__)
+
+# Serializes concurrent refreshes (sync jobs and override edits)
+DIRECTORY_LOCK_KEY = 7201002
+
+# TR eligibility for meal vouchers: manual override first, then active contract;
+# collaborators without Payfit contracts are eligible by default
+tr_rights_eligibility = func.coalesce(
+    UnifiedCollaborator.override_eligible,
+    case(
+        (UnifiedCollaborator.has_contracts, UnifiedCollaborator.has_active_contract),
+        else_=True,
+    ),
+)
+
+
+class CollaboratorDirectoryService:
+    """Service maintaining and reading the unified collaborator directory"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def refresh(self) -> int:
+        """
+        Rebuild the directory for every scope
+        Runs in the caller's transaction and does not commit
+        """
+        await self.session.execute(
+            select(func.pg_advisory_xact_lock(DIRECTORY_LOCK_KEY))
+        )
+
+        gryzzly_result = await self.session.execute(select(GryzzlyCollaborator))
+        gryzzly_collaborators = list(gryzzly_result.scalars().all())
+
+        payfit_result = await self.session.execute(
+            select(PayfitEmployee).options(selectinload(PayfitEmployee.contracts))
+        )
+        payfit_employees = list(payfit_result.scalars().all())
+
+        overrides_result = await self.session.execute(
+            select(TREligibilityOverride.email, TREligibilityOverride.is_eligible)
+        )
+        overrides = {row.email.lower(): row.is_eligible for row in overrides_result}
+
+        rows = directory_rows(gryzzly_collaborators, payfit_employees, overrides)
+
+        await self.session.execute(delete(UnifiedCollaborator))
+        if rows:
+            await self.session.execute(insert(UnifiedCollaborator), rows)
+
+        logger.info(f"Collaborator directory refreshed: {len(rows)} rows")
+        return len(rows)
+
+    async def list_collaborators(
+        self, scope: str = SCOPE_ALL, *conditions: Any
+    ) -> List[UnifiedCollaborator]:
+        """
+        Directory rows of a scope sorted by name
+        Reads never build the directory: it stays empty until the first sync
+        """
+        result = await self.session.execute(
+            select(UnifiedCollaborator)
+            .where(UnifiedCollaborator.scope == scope, *conditions)
+            .order_by(UnifiedCollaborator.sort_name)
+        )
+        return list(result.scalars().all())
+
+
+def directory_rows(
+    gryzzly_collaborators: List[GryzzlyCollaborator],
+    payfit_employees: List[PayfitEmployee],
+    overrides: Dict[str, bool],
+) -> List[Dict[str, Any]]:
+    """
+    Directory rows of every scope, from Gryzzly collaborators, Payfit employees
+    with their contracts loaded, and TR overrides keyed by lowercase email
+    """
+    now = datetime.utcnow()
+    rows = _merge(SCOPE_ALL, gryzzly_collaborators, payfit_employees, overrides, now)
+    rows += _merge(
+        SCOPE_ACTIVE,
+        [collab for collab in gryzzly_collaborators if collab.is_active],
+        [emp for emp in payfit_employees if emp.is_active],
+        overrides,
+        now,
+    )
+    return rows
+
+
+def to_collaborator_dict(row: UnifiedCollaborator) -> Dict[str, Any]:
+    """Serialize a directory row as returned by GET /collaborators"""
+    return {
+        "id": row.collaborator_key,
+        "nom": row.name,
+        "email": row.email,
+        "matricule": row.matricule,
+        "department": row.department,
+        "position": row.position,
+        "actif": row.is_active,
+        "eligibleTR": row.eligible_tr,
+        "source": row.source,
+        "gryzzly_id": row.gryzzly_id,
+        "payfit_id": row.payfit_id,
+        "has_active_contract": row.eligible_tr,
+        "last_synced_at": (
+            row.last_synced_at.isoformat() if row.last_synced_at else None
+        ),
+    }
+
+
+def _merge(
+    scope: str,
+    gryzzly_collaborators: Iterable[GryzzlyCollaborator],
+    payfit_employees: Iterable[PayfitEmployee],
+    overrides: Dict[str, bool],
+    refreshed_at: datetime,
+) -> List[Dict[str, Any]]:
+    """Merge both sources by email, Gryzzly first, then Payfit-only employees"""
+    # Deduplicate Payfit employees by email (keep the most recent one)
+    # This handles cases where employees have multiple records (e.g., internship → permanent contract)
+    payfit_by_email: Dict[str, PayfitEmployee] = {}
+    for emp in payfit_employees:
+        if not emp.email:
+            continue
+        email_lower = emp.email.lower()
+        current = payfit_by_email.get(email_lower)
+        if current is None:
+            payfit_by_email[email_lower] = emp
+        elif emp.created_at and current.created_at:
+            if emp.created_at > current.created_at:
+                payfit_by_email[email_lower] = emp
+
+    rows = []
+    processed_emails = set()
+
+    for collab in gryzzly_collaborators:
+        if not collab.email:
+            continue
+
+        email_lower = collab.email.lower()
+        processed_emails.add(email_lower)
+        payfit_emp = payfit_by_email.get(email_lower)
+
+        rows.append(
+            _row(
+                scope,
+                key=str(collab.id),
+                source="both" if payfit_emp else "gryzzly",
+                person=collab,
+                payfit_emp=payfit_emp,
+                override=overrides.get(email_lower),
+                refreshed_at=refreshed_at,
+                matricule=collab.matricule,
+                department=collab.department
+                or (payfit_emp.department if payfit_emp else None),
+                position=collab.position
+                or (payfit_emp.position if payfit_emp else None),
+                gryzzly_collaborator_id=collab.id,
+                gryzzly_id=collab.gryzzly_id,
+            )
+        )
+
+    for email_lower, payfit_emp in payfit_by_email.items():
+        if email_lower in processed_emails:
+            continue
+
+        rows.append(
+            _row(
+                scope,
+                key=f"payfit_{payfit_emp.id}",
+                source="payfit",
+                person=payfit_emp,
+                payfit_emp=payfit_emp,
+                override=overrides.get(email_lower),
+                refreshed_at=refreshed_at,
+                matricule=None,  # No matricule from Payfit only
+                department=payfit_emp.department,
+                position=payfit_emp.position,
+                gryzzly_collaborator_id=None,
+                gryzzly_id=None,
+            )
+        )
+
+    return rows
+
+
+def _row(
+    scope: str,
+    key: str,
+    source: str,
+    person: Any,
+    payfit_emp: Optional[PayfitEmployee],
+    override: Optional[bool],
+    refreshed_at: datetime,
+    **columns: Any,
+) -> Dict[str, Any]:
+    """Build one directory row from the record carrying name and activity"""
+    name = f"{person.first_name or ''} {person.last_name or ''}".strip() or person.email
+    contracts = payfit_emp.contracts if payfit_emp else []
+    has_active_contract = any(contract.is_active for contract in contracts)
+
+    return {
+        "scope": scope,
+        "collaborator_key": key,
+        "source": source,
+        "email": person.email,
+        "name": name,
+        "sort_name": name.lower(),
+        "first_name": person.first_name,
+        "last_name": person.last_name,
+        "is_active": bool(person.is_active),
+        "payfit_employee_id": payfit_emp.id if payfit_emp else None,
+        "payfit_id": payfit_emp.payfit_id if payfit_emp else None,
+        "has_contracts": bool(contracts),
+        "has_active_contract": has_active_contract,
+        "override_eligible": override,
+        "eligible_tr": override if override is not None else has_active_contract,
+        "last_synced_at": person.last_synced_at,
+        "refreshed_at": refreshed_at,
+        **columns,
+    }
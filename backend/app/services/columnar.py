@@ -0,0 +1,192 @@
+"""
+Columnar encoding for plan de charge and forecast months
+Replaces date-keyed nested dicts with dictionary-encoded tables and dense
+per-day hour vectors indexed by day of month (index 0 = day 1)
+"""
+
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+FORMAT_NESTED = "nested"
+FORMAT_COLUMNAR = "columnar"
+
+PLAN_CHARGE_COLLABORATOR_COLUMNS = [
+    "collaborator_id",
+    "name",
+    "email",
+    "matricule",
+    "gryzzly_id",
+    "payfit_id",
+]
+PROJECT_COLUMNS = ["id", "name", "code"]
+ABSENCE_COLUMNS = [
+    "collaborator",
+    "type",
+    "start_day",
+    "end_day",
+    "duration_days",
+    "status",
+]
+
+
+def _days_in_month(payload: Dict[str, Any]) -> int:
+    """Number of days covered by a month payload"""
+    return date.fromisoformat(payload["end_date"]).day
+
+
+def encode_plan_charge_month(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Encode an aggregated plan de charge month in columnar form
+
+    `hours` rows are [collaborator index, project index, [hours per day]] and
+    `absences` rows follow ABSENCE_COLUMNS with days of month instead of dates.
+    Forecast hours, when present, are encoded like `hours` in `forecast_hours`.
+    """
+    days = _days_in_month(payload)
+    collaborator_rows = []
+    hour_rows = []
+    forecast_rows = []
+    absence_rows = []
+    with_forecasts = False
+
+    for collaborator_index, collaborator in enumerate(payload["collaborators"]):
+        collaborator_rows.append(
+            [collaborator[column] for column in PLAN_CHARGE_COLLABORATOR_COLUMNS]
+        )
+
+        hour_rows.extend(
+            _hour_vectors(collaborator_index, collaborator.get("hours", []), days)
+        )
+        if "forecast_hours" in collaborator:
+            with_forecasts = True
+            forecast_rows.extend(
+                _hour_vectors(collaborator_index, collaborator["forecast_hours"], days)
+            )
+
+        for absence in collaborator["absences"]:
+            absence_rows.append(
+                [
+                    collaborator_index,
+                    absence["type"],
+                    date.fromisoformat(absence["start_date"]).day,
+                    date.fromisoformat(absence["end_date"]).day,
+                    absence["duration_days"],
+                    absence["status"],
+                ]
+            )
+
+    encoded = {
+        "format": FORMAT_COLUMNAR,
+        "year": payload["year"],
+        "month": payload["month"],
+        "start_date": payload["start_date"],
+        "end_date": payload["end_date"],
+        "days": days,
+        "projects": {"columns": PROJECT_COLUMNS, "rows": payload.get("projects", [])},
+        "collaborators": {
+            "columns": PLAN_CHARGE_COLLABORATOR_COLUMNS,
+            "rows": collaborator_rows,
+        },
+        "hours": hour_rows,
+        "absences": {"columns": ABSENCE_COLUMNS, "rows": absence_rows},
+    }
+    if with_forecasts:
+        encoded["forecast_hours"] = forecast_rows
+    return encoded
+
+
+def _hour_vectors(
+    collaborator_index: int, triplets: List[List[Any]], days: int
+) -> List[List[Any]]:
+    """Turn [day, project index, hours] triplets into per-project day vectors"""
+    vectors: Dict[int, List[float]] = OrderedDict()
+    for day, project_index, hours in triplets:
+        vector = vectors.setdefault(project_index, [0] * days)
+        vector[day - 1] += hours or 0
+    return [
+        [collaborator_index, project_index, vector]
+        for project_index, vector in vectors.items()
+    ]
+
+
+class _Dictionary:
+    """Assign stable indexes to values in first-seen order"""
+
+    def __init__(self):
+        self.index: Dict[Any, int] = {}
+        self.rows: List[List[Any]] = []
+
+    def add(self, key: Any, row: List[Any]) -> int:
+        if key not in self.index:
+            self.index[key] = len(self.rows)
+            self.rows.append(row)
+        return self.index[key]
+
+
+def encode_forecast_month(
+    year: int, month: int, start_date: date, end_date: date, forecasts: List[Any]
+) -> Dict[str, Any]:
+    """
+    Encode forecast entries of a month in columnar form
+
+    `hours` rows are [collaborator index, project index, task index or None,
+    [hours per day], [forecast id per day]] so cells stay editable.
+    """
+    days = end_date.day
+    collaborators = _Dictionary()
+    projects = _Dictionary()
+    tasks = _Dictionary()
+    series: Dict[tuple, Dict[str, List[Optional[Any]]]] = OrderedDict()
+
+    for forecast in forecasts:
+        collaborator = forecast.collaborator
+        collaborator_index = collaborators.add(
+            forecast.collaborator_id,
+            [
+                str(forecast.collaborator_id),
+                (
+                    f"{collaborator.first_name or ''} {collaborator.last_name or ''}".strip()
+                    if collaborator
+                    else "Unknown"
+                ),
+            ],
+        )
+        project = forecast.project
+        project_index = projects.add(
+            forecast.project_id,
+            [
+                str(forecast.project_id),
+                project.name if project else "Unknown",
+                project.code if project else None,
+            ],
+        )
+        task_index = None
+        if forecast.task_id:
+            task_index = tasks.add(
+                forecast.task_id,
+                [str(forecast.task_id), forecast.task.name if forecast.task else None],
+            )
+
+        key = (collaborator_index, project_index, task_index)
+        entry = series.setdefault(key, {"hours": [0] * days, "ids": [None] * days})
+        day_index = forecast.date.day - 1
+        entry["hours"][day_index] += forecast.hours or 0
+        if entry["ids"][day_index] is None:
+            entry["ids"][day_index] = str(forecast.id)
+
+    return {
+        "format": FORMAT_COLUMNAR,
+        "year": year,
+        "month": month,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "days": days,
+        "collaborators": {"columns": ["id", "name"], "rows": collaborators.rows},
+        "projects": {"columns": PROJECT_COLUMNS, "rows": projects.rows},
+        "tasks": {"columns": ["id", "name"], "rows": tasks.rows},
+        "hours": [
+            [key[0], key[1], key[2], entry["hours"], entry["ids"]]
+            for key, entry in series.items()
+        ],
+    }
@@ -0,0 +1,68 @@
+"""
+External data synchronization
+Runs the Gryzzly and Payfit sync stages as one dependency graph, so fetches
+from both APIs overlap
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.gryzzly import GryzzlySyncLog
+from app.models.payfit import PayfitSyncLog
+from app.services import gryzzly_sync, payfit_sync
+from app.services.gryzzly_sync import GryzzlySyncService
+from app.services.payfit_sync import PayfitSyncService
+from app.services.plan_charge_cache import PlanChargeCache
+from app.services.sync_orchestrator import SyncOrchestrator, record_stages
+
+logger = logging.getLogger(__name__)
+
+
+async def sync_external_data(
+    session: AsyncSession, triggered_by: str = "system"
+) -> Dict[str, Any]:
+    """
+    Sync every configured provider in one orchestrated run
+    Each provider gets its own full sync log with per-stage durations.
+    """
+    providers = []
+    stages = []
+
+    try:
+        gryzzly = GryzzlySyncService(session)
+    except ValueError as e:
+        logger.warning(f"Gryzzly sync skipped: {str(e)}")
+    else:
+        stages += await gryzzly.sync_stages(triggered_by)
+        providers.append(("gryzzly", GryzzlySyncLog, gryzzly_sync.STAGE_KEYS))
+
+    payfit = PayfitSyncService(session)
+    if payfit.client.is_configured:
+        stages += await payfit.sync_stages(triggered_by)
+        providers.append(("payfit", PayfitSyncLog, payfit_sync.STAGE_KEYS))
+    else:
+        logger.info("Payfit API is in mock mode - skipping sync")
+
+    sync_logs = {}
+    for name, log_model, _ in providers:
+        sync_logs[name] = log_model(
+            sync_type="full",
+            sync_status="started",
+            started_at=datetime.utcnow(),
+            triggered_by=triggered_by,
+        )
+        session.add(sync_logs[name])
+    await session.commit()
+
+    reports = await SyncOrchestrator(session, stages).run()
+
+    results = {}
+    for name, _, keys in providers:
+        results[name] = await record_stages(session, sync_logs[name], reports, keys)
+
+    await PlanChargeCache(session).invalidate()
+    await session.commit()
+    return results
@@ -0,0 +1,164 @@
+"""
+Forecast write service
+Set-based writes of forecast slots for the plan de charge
+"""
+
+import logging
+import uuid
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import holidays
+from sqlalchemy import delete, func, literal_column, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.forecast import Forecast, forecast_slot
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement (8 bind parameters each, well under asyncpg's limit)
+UPSERT_CHUNK_SIZE = 1000
+
+
+def working_days(start_date: date, end_date: date) -> List[date]:
+    """List the days of a range, skipping weekends and French public holidays"""
+    fr_holidays = holidays.France(years=range(start_date.year, end_date.year + 1))
+    days = []
+    current_date = start_date
+    while current_date <= end_date:
+        # Monday = 0, Friday = 4
+        if current_date.weekday() < 5 and current_date not in fr_holidays:
+            days.append(current_date)
+        current_date += timedelta(days=1)
+    return days
+
+
+class ForecastService:
+    """Service writing forecast entries in bulk"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def upsert_slots(
+        self,
+        targets: Iterable[Tuple[Any, Any, Optional[Any]]],
+        days: List[date],
+        hours: float,
+        description: Optional[str] = None,
+        user_id: Optional[Any] = None,
+        batch_id: Optional[uuid.UUID] = None,
+    ) -> Dict[str, Any]:
+        """
+        Write `hours` on every (collaborator, project, task) target for every day
+
+        Existing slots are updated in place through ON CONFLICT on the
+        uq_forecasts_slot index and move to the new batch; created and updated
+        counts come from RETURNING. Does not commit.
+        """
+        batch_id = batch_id or uuid.uuid4()
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "collaborator_id": collaborator_id,
+                "project_id": project_id,
+                "task_id": task_id,
+                "date": day,
+                "hours": hours,
+                "description": description,
+                "created_by": user_id,
+                "batch_id": batch_id,
+            }
+            # A slot may only appear once per statement
+            for collaborator_id, project_id, task_id in dict.fromkeys(targets)
+            for day in days
+        ]
+
+        ids = []
+        created = 0
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            statement = insert(Forecast).values(rows[start : start + UPSERT_CHUNK_SIZE])
+            statement = statement.on_conflict_do_update(
+                index_elements=list(forecast_slot),
+                set_={
+                    "hours": statement.excluded.hours,
+                    "description": statement.excluded.description,
+                    "modified_by": user_id,
+                    "batch_id": statement.excluded.batch_id,
+                    "updated_at": func.now(),
+                },
+            ).returning(Forecast.id, literal_column("xmax = 0").label("inserted"))
+            result = await self.session.execute(statement)
+            for row in result:
+                ids.append(row.id)
+                created += bool(row.inserted)
+
+        return {
+            "batch_id": batch_id,
+            "ids": ids,
+            "created": created,
+            "updated": len(ids) - created,
+        }
+
+    async def delete_where(self, **criteria: Any) -> List[date]:
+        """
+        Delete the selected forecasts in one statement (see _selection)
+        Returns the dates of the deleted entries. Does not commit.
+        """
+        result = await self.session.execute(
+            delete(Forecast)
+            .where(*_selection(**criteria))
+            .returning(Forecast.date)
+            .execution_options(synchronize_session=False)
+        )
+        return [row.date for row in result]
+
+    async def update_where(
+        self, values: Dict[str, Any], user_id: Optional[Any] = None, **criteria: Any
+    ) -> List[date]:
+        """
+        Apply `values` to the selected forecasts in one statement (see _selection)
+        Returns the dates of the updated entries. Does not commit.
+        """
+        result = await self.session.execute(
+            update(Forecast)
+            .where(*_selection(**criteria))
+            .values(**values, modified_by=user_id, updated_at=func.now())
+            .returning(Forecast.date)
+            .execution_options(synchronize_session=False)
+        )
+        return [row.date for row in result]
+
+
+def _selection(
+    forecast_ids: Optional[List[Any]] = None,
+    batch_id: Optional[Any] = None,
+    collaborator_id: Optional[Any] = None,
+    project_id: Optional[Any] = None,
+    task_id: Optional[Any] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> List[Any]:
+    """
+    Conditions selecting forecasts by id set, batch and/or date-range predicate
+    Refuses an empty selection, which would match every forecast
+    """
+    conditions = []
+    if forecast_ids is not None:
+        conditions.append(Forecast.id.in_(forecast_ids))
+    if batch_id is not None:
+        conditions.append(Forecast.batch_id == batch_id)
+    if collaborator_id is not None:
+        conditions.append(Forecast.collaborator_id == collaborator_id)
+    if project_id is not None:
+        conditions.append(Forecast.project_id == project_id)
+    if task_id is not None:
+        conditions.append(Forecast.task_id == task_id)
+    if start_date is not None:
+        conditions.append(Forecast.date >= start_date)
+    if end_date is not None:
+        conditions.append(Forecast.date <= end_date)
+
+    if not conditions:
+        raise ValueError("A forecast selection needs at least one criterion")
+    return conditions
@@ -5,14 +5,16 @@ Gryzzly API Client for interacting with Gryzzly RPC API
 import asyncio
 import logging
 import os
-from collections import deque
-from datetime import date, datetime, timedelta
-from typing import Any, Dict, List, Optional
+import time
+from datetime import date, datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import httpx
-from httpx import AsyncClient, HTTPStatusError
+from cachetools import TTLCache
+from httpx import HTTPStatusError
 
 from app.config import settings
+from app.services.http_client import get_http_client, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
@@ -24,55 +26,126 @@ if USE_MOCK:
 
     logger.info("Gryzzly API Client running in MOCK mode")
 
+# Items per *.list request (maximum allowed by the API)
+PAGE_SIZE = 1000
+
+# Task and user lists used to resolve declarations, shared by client instances
+_reference_cache = TTLCache(maxsize=2, ttl=max(settings.GRYZZLY_REFERENCE_CACHE_TTL, 1))
+
+
+class GryzzlyNotFoundError(Exception):
+    """The API answered 404 (unknown or disabled resource)"""
+
 
 class RateLimiter:
     """
     Rate limiter for API requests
-    Implements sliding window algorithm
+    Implements GCRA (a token bucket tracked as a theoretical arrival time)
+
+    Each acquire reserves the next free slot and sleeps until it without
+    holding any lock, so concurrent waiters are served in order and the bucket
+    can be shared by every client and sync worker of the process.
     """
 
-    def __init__(self, max_requests: int, time_window: int):
+    def __init__(
+        self,
+        max_requests: int,
+        time_window: float,
+        endpoint_limits: Optional[Dict[str, int]] = None,
+    ):
         """
         Initialize rate limiter
 
         Args:
             max_requests: Maximum number of requests allowed
             time_window: Time window in seconds
+            endpoint_limits: Optional per-endpoint request budgets over the
+                same time window, applied on top of the global one
         """
         self.max_requests = max_requests
         self.time_window = time_window
-        self.requests = deque()
-        self._lock = asyncio.Lock()
+        self.interval = time_window / max_requests
+        # Requests may burst up to max_requests before being spaced out
+        self.tolerance = time_window - self.interval
+        self._tat = 0.0
+        self.endpoint_limiters = {
+            endpoint: RateLimiter(limit, time_window)
+            for endpoint, limit in (endpoint_limits or {}).items()
+        }
 
-    async def acquire(self):
+        # Metrics
+        self.requests = 0
+        self.throttled_requests = 0
+        self.throttled_seconds = 0.0
+        self.penalties = 0
+
+    def reserve(self, endpoint: Optional[str] = None) -> float:
+        """Reserve the next slot and return the seconds to wait before using it"""
+        now = time.monotonic()
+        tat = max(self._tat, now)
+        self._tat = tat + self.interval
+        delay = max(tat - self.tolerance - now, 0.0)
+
+        endpoint_limiter = self.endpoint_limiters.get(endpoint)
+        if endpoint_limiter is not None:
+            delay = max(delay, endpoint_limiter.reserve())
+        return delay
+
+    async def acquire(self, endpoint: Optional[str] = None):
         """
         Wait if necessary to respect rate limits
         """
-        async with self._lock:
-            now = datetime.now()
-
-            # Remove old requests outside the time window
-            while self.requests and self.requests[0] < now - timedelta(
-                seconds=self.time_window
-            ):
-                self.requests.popleft()
-
-            # If we've hit the limit, wait
-            if len(self.requests) >= self.max_requests:
-                sleep_time = (
-                    self.requests[0] + timedelta(seconds=self.time_window) - now
-                ).total_seconds()
-                if sleep_time > 0:
-                    logger.debug(
-                        f"Rate limit reached, sleeping for {sleep_time:.2f} seconds"
-                    )
-                    await asyncio.sleep(sleep_time)
-                    # Recursive call to recheck after sleep
-                    await self.acquire()
-                    return
+        delay = self.reserve(endpoint)
+        self.requests += 1
+        if delay > 0:
+            self.throttled_requests += 1
+            self.throttled_seconds += delay
+            logger.debug(f"Rate limit reached, sleeping for {delay:.2f} seconds")
+            await asyncio.sleep(delay)
+
+    def penalize(self, retry_after: float, endpoint: Optional[str] = None):
+        """
+        Hold back every request for retry_after seconds (429 responses), then
+        resume at the steady rate without a new burst. The endpoint's own
+        budget, if any, is held back as well.
+        """
+        limiters = [self]
+        if endpoint in self.endpoint_limiters:
+            limiters.append(self.endpoint_limiters[endpoint])
+        for limiter in limiters:
+            limiter._tat = max(
+                limiter._tat, time.monotonic() + retry_after + limiter.tolerance
+            )
+        self.penalties += 1
+        logger.warning(f"Rate limited by the API, backing off {retry_after:.2f}s")
 
-            # Record this request
-            self.requests.append(now)
+    def stats(self) -> Dict[str, Any]:
+        """Throttling metrics since startup"""
+        return {
+            "requests": self.requests,
+            "throttled_requests": self.throttled_requests,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+            "penalties": self.penalties,
+        }
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an API ISO timestamp as an aware datetime (UTC when unqualified)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+# Shared by every client instance so concurrent syncs split one API budget
+gryzzly_rate_limiter = RateLimiter(
+    settings.GRYZZLY_RATE_LIMIT_REQUESTS,
+    settings.GRYZZLY_RATE_LIMIT_WINDOW,
+    settings.GRYZZLY_ENDPOINT_RATE_LIMITS,
+)
 
 
 class GryzzlyAPIClient:
@@ -81,7 +154,7 @@ class GryzzlyAPIClient:
     def __init__(self):
         self.base_url = settings.GRYZZLY_API_URL
         self.api_key = settings.GRYZZLY_API_KEY
-        self.rate_limiter = RateLimiter(50, 10)  # 50 requests per 10 seconds
+        self.rate_limiter = gryzzly_rate_limiter
         self.timeout = httpx.Timeout(30.0, connect=10.0)
         self.max_retries = 3
         self.retry_delay = 1.0
@@ -100,7 +173,7 @@ class GryzzlyAPIClient:
     ) -> Any:
         """Make RPC request to Gryzzly API with rate limiting and retries"""
         # Respect rate limits
-        await self.rate_limiter.acquire()
+        await self.rate_limiter.acquire(endpoint)
 
         url = f"{self.base_url}/{endpoint}"
 
@@ -109,49 +182,45 @@ class GryzzlyAPIClient:
         json_data = params or {}
 
         try:
-            async with AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    url=url, headers=self.headers, json=json_data
-                )
+            client = get_http_client()
+            response = await client.post(
+                url=url, headers=self.headers, json=json_data, timeout=self.timeout
+            )
 
-                if response.status_code == 200:
-                    return response.json()
+            if response.status_code == 200:
+                return response.json()
 
-                elif response.status_code == 429:  # Rate limited
-                    # Wait and retry
-                    if retry_count < self.max_retries:
+            elif response.status_code == 429:  # Rate limited
+                # Back off the shared limiter, so every waiter slows down, and
+                # retry once it lets us through
+                if retry_count < self.max_retries:
+                    wait_time = parse_retry_after(response.headers.get("Retry-After"))
+                    if wait_time is None:
                         wait_time = self.retry_delay * (2**retry_count)
-                        logger.warning(
-                            f"Rate limited, retrying in {wait_time} seconds..."
-                        )
-                        await asyncio.sleep(wait_time)
-                        return await self._make_request(
-                            endpoint, params, retry_count + 1
-                        )
-                    else:
-                        raise Exception(f"Max retries reached for rate limiting")
+                    self.rate_limiter.penalize(wait_time, endpoint)
+                    return await self._make_request(endpoint, params, retry_count + 1)
                 else:
-                    error_msg = (
-                        f"API request failed: {response.status_code} - {response.text}"
-                    )
-                    # Use debug for 404 errors (common for disabled users)
-                    if response.status_code == 404:
-                        logger.debug(error_msg)
-                    else:
-                        logger.error(error_msg)
-
-                    # Retry on server errors
-                    if response.status_code >= 500 and retry_count < self.max_retries:
-                        wait_time = self.retry_delay * (2**retry_count)
-                        logger.warning(
-                            f"Server error, retrying in {wait_time} seconds..."
-                        )
-                        await asyncio.sleep(wait_time)
-                        return await self._make_request(
-                            endpoint, params, retry_count + 1
-                        )
+                    raise Exception(f"Max retries reached for rate limiting")
+            else:
+                error_msg = (
+                    f"API request failed: {response.status_code} - {response.text}"
+                )
+                # Use debug for 404 errors (common for disabled users)
+                if response.status_code == 404:
+                    logger.debug(error_msg)
+                else:
+                    logger.error(error_msg)
+
+                # Retry on server errors
+                if response.status_code >= 500 and retry_count < self.max_retries:
+                    wait_time = self.retry_delay * (2**retry_count)
+                    logger.warning(f"Server error, retrying in {wait_time} seconds...")
+                    await asyncio.sleep(wait_time)
+                    return await self._make_request(endpoint, params, retry_count + 1)
 
-                    raise Exception(error_msg)
+                if response.status_code == 404:
+                    raise GryzzlyNotFoundError(error_msg)
+                raise Exception(error_msg)
 
         except httpx.TimeoutException as e:
             if retry_count < self.max_retries:
@@ -181,45 +250,68 @@ class GryzzlyAPIClient:
             logger.error(f"Failed to connect to Gryzzly API: {e}")
             return False
 
+    async def _paginate(
+        self, endpoint: str, params: Optional[Dict] = None, prefetch: bool = True
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Yield the pages of a *.list RPC as they arrive
+
+        While the caller processes a full page, the next one is already
+        requested when prefetch is set. A short page ends the listing.
+        """
+        offset = 0
+        next_page = asyncio.ensure_future(self._fetch_page(endpoint, params, offset))
+        try:
+            while next_page is not None:
+                items = await next_page
+                next_page = None
+                offset += PAGE_SIZE
+                if len(items) >= PAGE_SIZE:
+                    next_page = self._fetch_page(endpoint, params, offset)
+                    if prefetch:
+                        next_page = asyncio.ensure_future(next_page)
+                if items:
+                    yield items
+        finally:
+            if isinstance(next_page, asyncio.Future):
+                next_page.cancel()
+            elif next_page is not None:
+                next_page.close()
+
+    async def _fetch_page(
+        self, endpoint: str, params: Optional[Dict], offset: int
+    ) -> List[Dict]:
+        """Fetch one page of a *.list RPC"""
+        result = await self._make_request(
+            endpoint, {**(params or {}), "limit": PAGE_SIZE, "offset": offset}
+        )
+        # Gryzzly API returns data in "data" field, some RPCs a bare list
+        if isinstance(result, list):
+            return result
+        return result.get("data", []) if isinstance(result, dict) else []
+
     # User methods (previously called collaborators)
-    async def get_collaborators(self, active_only: bool = False) -> List[Dict]:
-        """Get list of users"""
+    async def iter_collaborators(
+        self, active_only: bool = False
+    ) -> AsyncIterator[Dict]:
+        """Stream users page by page"""
         if USE_MOCK:
-            return await mock_service.get_collaborators(active_only)
-
-        params = {"limit": 1000, "offset": 0}  # Maximum allowed
-
-        result = await self._make_request("users.list", params)
-
-        # Transform to our expected format
-        # Gryzzly API returns data in "data" field
-        users = result.get("data", []) if isinstance(result, dict) else []
-
-        collaborators = []
-        for user in users:
-            # Parse the name field to get first and last name
-            name = user.get("name", "")
-            name_parts = name.split(" ", 1) if name else ["", ""]
-            first_name = name_parts[0] if len(name_parts) > 0 else ""
-            last_name = name_parts[1] if len(name_parts) > 1 else ""
-
-            collaborators.append(
-                {
-                    "id": user.get("id"),
-                    "email": user.get("email"),
-                    "firstName": first_name,
-                    "lastName": last_name,
-                    "isActive": not user.get("is_disabled", False),
-                    "isAdmin": user.get("role") == "manager",
-                    "createdAt": user.get("created_at"),
-                    "updatedAt": user.get("updated_at"),
-                }
-            )
+            for collaborator in await mock_service.get_collaborators(active_only):
+                yield collaborator
+            return
 
-        if active_only:
-            collaborators = [c for c in collaborators if c["isActive"]]
+        async for users in self._paginate("users.list"):
+            for user in users:
+                collaborator = _transform_user(user)
+                if active_only and not collaborator["isActive"]:
+                    continue
+                yield collaborator
 
-        return collaborators
+    async def get_collaborators(self, active_only: bool = False) -> List[Dict]:
+        """Get list of users"""
+        return [
+            collaborator async for collaborator in self.iter_collaborators(active_only)
+        ]
 
     async def get_collaborator(self, collaborator_id: str) -> Dict:
         """Get single user by ID"""
@@ -241,43 +333,23 @@ class GryzzlyAPIClient:
         }
 
     # Project methods
-    async def get_projects(self, active_only: bool = False) -> List[Dict]:
-        """Get list of projects"""
+    async def iter_projects(self, active_only: bool = False) -> AsyncIterator[Dict]:
+        """Stream projects page by page"""
         if USE_MOCK:
-            return await mock_service.get_projects(active_only)
-
-        params = {"limit": 1000, "offset": 0}
-
-        result = await self._make_request("projects.list", params)
-
-        # Transform to our expected format
-        # Gryzzly API returns data in "data" field
-        projects = result.get("data", []) if isinstance(result, dict) else []
-
-        transformed = []
-        for project in projects:
-            transformed.append(
-                {
-                    "id": project.get("id"),
-                    "name": project.get("name"),
-                    "code": project.get("code"),
-                    "description": project.get("description"),
-                    "customerId": project.get("customer_id"),
-                    "startDate": project.get("start_at"),
-                    "endDate": project.get("end_at"),
-                    "isActive": project.get("status") == "active",
-                    "isBillable": project.get("is_billable", False),
-                    "budgetHours": project.get("budget_hours"),
-                    "budgetAmount": project.get("budget_amount"),
-                    "createdAt": project.get("created_at"),
-                    "updatedAt": project.get("updated_at"),
-                }
-            )
+            for project in await mock_service.get_projects(active_only):
+                yield project
+            return
 
-        if active_only:
-            transformed = [p for p in transformed if p["isActive"]]
+        async for projects in self._paginate("projects.list"):
+            for project in projects:
+                transformed = _transform_project(project)
+                if active_only and not transformed["isActive"]:
+                    continue
+                yield transformed
 
-        return transformed
+    async def get_projects(self, active_only: bool = False) -> List[Dict]:
+        """Get list of projects"""
+        return [project async for project in self.iter_projects(active_only)]
 
     async def get_project(self, project_id: str) -> Dict:
         """Get single project by ID"""
@@ -299,6 +371,7 @@ class GryzzlyAPIClient:
             "isBillable": result.get("is_billable", False),
             "budgetHours": result.get("budget_hours"),
             "budgetAmount": result.get("budget_amount"),
+            "contributors": result.get("contributors", []),
             "createdAt": result.get("created_at"),
             "updatedAt": result.get("updated_at"),
         }
@@ -308,56 +381,29 @@ class GryzzlyAPIClient:
         if USE_MOCK:
             return await mock_service.get_project_collaborators(project_id)
 
-        # Get project details to get contributors
+        # Resolve contributors from the cached user list, not one users.get each
         project = await self.get_project(project_id)
-        contributor_ids = project.get("contributors", [])
+        contributor_ids = set(project.get("contributors", []))
+        users = await self._reference("users", self.get_collaborators)
 
-        # Get user details for each contributor
-        collaborators = []
-        for user_id in contributor_ids:
-            try:
-                user = await self.get_collaborator(user_id)
-                collaborators.append(user)
-            except:
-                pass  # Skip if user not found
-
-        return collaborators
+        return [user for user in users if user["id"] in contributor_ids]
 
     # Task methods
-    async def get_tasks(self, project_id: Optional[str] = None) -> List[Dict]:
-        """Get list of tasks"""
+    async def iter_tasks(self, project_id: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Stream tasks page by page"""
         if USE_MOCK:
-            return await mock_service.get_tasks(project_id)
-
-        params = {"limit": 1000, "offset": 0}
-
-        if project_id:
-            params["project_ids"] = [project_id]
-
-        result = await self._make_request("tasks.list", params)
-
-        # Transform to our expected format
-        # Gryzzly API returns data in "data" field
-        tasks = result.get("data", []) if isinstance(result, dict) else []
-
-        transformed = []
-        for task in tasks:
-            transformed.append(
-                {
-                    "id": task.get("id"),
-                    "projectId": task.get("project_id"),
-                    "parentId": task.get("parent_id"),  # For subtasks
-                    "name": task.get("name"),
-                    "code": task.get("code"),
-                    "description": task.get("description"),
-                    "isActive": task.get("status") == "active",
-                    "isBillable": task.get("is_billable", False),
-                    "createdAt": task.get("created_at"),
-                    "updatedAt": task.get("updated_at"),
-                }
-            )
+            for task in await mock_service.get_tasks(project_id):
+                yield task
+            return
+
+        params = {"project_ids": [project_id]} if project_id else None
+        async for tasks in self._paginate("tasks.list", params):
+            for task in tasks:
+                yield _transform_task(task)
 
-        return transformed
+    async def get_tasks(self, project_id: Optional[str] = None) -> List[Dict]:
+        """Get list of tasks"""
+        return [task async for task in self.iter_tasks(project_id)]
 
     async def get_task(self, task_id: str) -> Dict:
         """Get single task by ID"""
@@ -381,34 +427,43 @@ class GryzzlyAPIClient:
         }
 
     # Declaration methods
-    async def get_declarations(
+    async def iter_declaration_batches(
         self,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         collaborator_id: Optional[str] = None,
         project_id: Optional[str] = None,
         status: Optional[str] = None,
-    ) -> List[Dict]:
-        """Get time declarations with filters"""
+        updated_since: Optional[datetime] = None,
+        failed_users: Optional[List[str]] = None,
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Stream time declarations with filters, one batch per user
+
+        At most GRYZZLY_MAX_CONCURRENCY users are fetched ahead of the
+        consumer, so memory does not grow with the date window or headcount.
+        declarations.list cannot filter on modification time, so with
+        updated_since, declarations last updated before it are dropped here,
+        after download. Users whose request failed (other than 404 for
+        disabled users) are skipped and appended to `failed_users`.
+        """
         if USE_MOCK:
-            return await mock_service.get_declarations(
+            yield await mock_service.get_declarations(
                 start_date, end_date, collaborator_id, project_id, status
             )
+            return
 
-        # First, get all tasks to create a mapping of task_id to project_id
-        tasks = await self.get_tasks()
+        # Map task_id to project_id and billable flag
+        tasks = await self._reference("tasks", self.get_tasks)
         task_project_map = {t["id"]: t.get("projectId") for t in tasks}
         task_billable_map = {t["id"]: t.get("isBillable", False) for t in tasks}
 
         # For declarations, we need to fetch for each user
-        users = await self.get_collaborators()
-        all_declarations = []
-
-        for user in users:
-            # Skip if filtering by collaborator and this isn't the one
-            if collaborator_id and user["id"] != collaborator_id:
-                continue
+        users = await self._reference("users", self.get_collaborators)
+        if collaborator_id:
+            users = [user for user in users if user["id"] == collaborator_id]
 
+        async def fetch(user: Dict) -> List[Dict]:
             params = {
                 "user_ids": [user["id"]],
                 "task_ids": [],  # Required but can be empty for all tasks
@@ -420,58 +475,111 @@ class GryzzlyAPIClient:
                 params["to"] = end_date.isoformat()
 
             try:
-                result = await self._make_request("declarations.list", params)
-
-                # Gryzzly API returns data in "data" field
-                declarations = []
-                if isinstance(result, dict) and "data" in result:
-                    declarations = result["data"]
-                elif isinstance(result, list):
-                    declarations = result
-                elif isinstance(result, dict):
-                    declarations = [result]
-
-                for decl in declarations:
-                    # Get the task to find the project ID
-                    task_id = decl.get("task_id")
-                    project_id_from_task = (
-                        task_project_map.get(task_id) if task_id else None
-                    )
-                    is_billable_from_task = (
-                        task_billable_map.get(task_id, False) if task_id else False
+                # Pages of one user are read in turn: concurrency is per user
+                declarations = [
+                    decl
+                    async for page in self._paginate(
+                        "declarations.list", params, prefetch=False
                     )
+                    for decl in page
+                ]
+            except GryzzlyNotFoundError as e:
+                # Disabled users have no declarations to read
+                logger.debug(f"Skipping declarations for user {user['id']}: {str(e)}")
+                return []
+            except Exception as e:
+                # Continue with other users, reporting the failure to the caller
+                logger.warning(
+                    f"Failed to fetch declarations for user {user['id']}: {str(e)}"
+                )
+                if failed_users is not None:
+                    failed_users.append(user["id"])
+                return []
 
-                    # Skip if filtering by project and this isn't it
-                    if project_id and project_id_from_task != project_id:
+            batch = []
+            for decl in declarations:
+                # Skip declarations unchanged since the previous sync
+                if updated_since:
+                    updated_at = parse_timestamp(decl.get("updated_at"))
+                    if updated_at and updated_at < updated_since:
                         continue
 
-                    # Transform to our expected format
-                    all_declarations.append(
-                        {
-                            "id": decl.get("id"),
-                            "collaboratorId": decl.get("user_id"),
-                            "projectId": project_id_from_task,  # Get from task mapping
-                            "taskId": task_id,
-                            "date": decl.get("date"),
-                            "durationSeconds": decl.get("duration", 0),
-                            "durationHours": (
-                                decl.get("duration", 0) / 3600
-                                if decl.get("duration")
-                                else 0
-                            ),
-                            "description": decl.get("description"),
-                            "status": "submitted",  # Gryzzly doesn't return status in list
-                            "isBillable": is_billable_from_task,  # Get from task mapping
-                            "createdAt": decl.get("created_at"),
-                            "updatedAt": decl.get("updated_at"),
-                        }
+                # Get the task to find the project ID
+                task_id = decl.get("task_id")
+                project_id_from_task = (
+                    task_project_map.get(task_id) if task_id else None
+                )
+
+                # Skip if filtering by project and this isn't it
+                if project_id and project_id_from_task != project_id:
+                    continue
+
+                batch.append(
+                    _transform_declaration(
+                        decl,
+                        project_id_from_task,
+                        task_billable_map.get(task_id, False) if task_id else False,
                     )
-            except Exception as e:
-                # Log but continue with other users - some might be disabled
-                logger.debug(f"Skipping declarations for user {user['id']}: {str(e)}")
-                continue
+                )
+            return batch
+
+        # Bounded fan-out: a window of in-flight requests, refilled as batches
+        # are consumed, while the rate limiter spaces them within the API budget
+        remaining = iter(users)
+        in_flight = set()
+        try:
+            while True:
+                for user in remaining:
+                    in_flight.add(asyncio.ensure_future(fetch(user)))
+                    if len(in_flight) >= max(settings.GRYZZLY_MAX_CONCURRENCY, 1):
+                        break
+                if not in_flight:
+                    return
+
+                done, in_flight = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
+                )
+                for future in done:
+                    batch = future.result()
+                    if batch:
+                        yield batch
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    async def get_declarations(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        collaborator_id: Optional[str] = None,
+        project_id: Optional[str] = None,
+        status: Optional[str] = None,
+        updated_since: Optional[datetime] = None,
+    ) -> List[Dict]:
+        """Get time declarations with filters (see iter_declaration_batches)"""
+        return [
+            declaration
+            async for batch in self.iter_declaration_batches(
+                start_date,
+                end_date,
+                collaborator_id,
+                project_id,
+                status,
+                updated_since,
+            )
+            for declaration in batch
+        ]
 
-        return all_declarations
+    async def _reference(self, key: str, fetch) -> List[Dict]:
+        """
+        Return a reference list (tasks, users) from the shared TTL cache,
+        fetching it on a miss
+        """
+        cached = _reference_cache.get(key)
+        if cached is None:
+            cached = await fetch()
+            _reference_cache[key] = cached
+        return cached
 
     async def get_declaration(self, declaration_id: str) -> Dict:
         """Get single declaration by ID"""
@@ -727,3 +835,83 @@ class GryzzlyAPIClient:
                 else total_hours
             ),
         }
+
+
+def _transform_user(user: Dict) -> Dict:
+    """Transform a users.list item to our expected format"""
+    # Parse the name field to get first and last name
+    name = user.get("name", "")
+    name_parts = name.split(" ", 1) if name else ["", ""]
+    first_name = name_parts[0] if len(name_parts) > 0 else ""
+    last_name = name_parts[1] if len(name_parts) > 1 else ""
+
+    return {
+        "id": user.get("id"),
+        "email": user.get("email"),
+        "firstName": first_name,
+        "lastName": last_name,
+        "isActive": not user.get("is_disabled", False),
+        "isAdmin": user.get("role") == "manager",
+        "createdAt": user.get("created_at"),
+        "updatedAt": user.get("updated_at"),
+    }
+
+
+def _transform_project(project: Dict) -> Dict:
+    """Transform a projects.list item to our expected format"""
+    return {
+        "id": project.get("id"),
+        "name": project.get("name"),
+        "code": project.get("code"),
+        "description": project.get("description"),
+        "customerId": project.get("customer_id"),
+        "startDate": project.get("start_at"),
+        "endDate": project.get("end_at"),
+        "isActive": project.get("status") == "active",
+        "isBillable": project.get("is_billable", False),
+        "budgetHours": project.get("budget_hours"),
+        "budgetAmount": project.get("budget_amount"),
+        # User ids: model.Project in docs/gryzzly_swagger.json, returned by both
+        # projects.list and projects.get. None when missing from the payload
+        "contributors": project.get("contributors"),
+        "createdAt": project.get("created_at"),
+        "updatedAt": project.get("updated_at"),
+    }
+
+
+def _transform_task(task: Dict) -> Dict:
+    """Transform a tasks.list item to our expected format"""
+    return {
+        "id": task.get("id"),
+        "projectId": task.get("project_id"),
+        "parentId": task.get("parent_id"),  # For subtasks
+        "name": task.get("name"),
+        "code": task.get("code"),
+        "description": task.get("description"),
+        "isActive": task.get("status") == "active",
+        "isBillable": task.get("is_billable", False),
+        "createdAt": task.get("created_at"),
+        "updatedAt": task.get("updated_at"),
+    }
+
+
+def _transform_declaration(
+    decl: Dict, project_id: Optional[str], is_billable: bool
+) -> Dict:
+    """Transform a declarations.list item, with its task's project and billing"""
+    return {
+        "id": decl.get("id"),
+        "collaboratorId": decl.get("user_id"),
+        "projectId": project_id,  # Get from task mapping
+        "taskId": decl.get("task_id"),
+        "date": decl.get("date"),
+        "durationSeconds": decl.get("duration", 0),
+        "durationHours": (
+            decl.get("duration", 0) / 3600 if decl.get("duration") else 0
+        ),
+        "description": decl.get("description"),
+        "status": "submitted",  # Gryzzly doesn't return status in list
+        "isBillable": is_billable,  # Get from task mapping
+        "createdAt": decl.get("created_at"),
+        "updatedAt": decl.get("updated_at"),
+    }
@@ -170,6 +170,12 @@ class GryzzlyMockService:
                         datetime.now() - timedelta(days=random.randint(30, 365))
                     ).isoformat(),
                     "updatedAt": datetime.now().isoformat(),
+                    "contributors": [
+                        collab["id"]
+                        for collab in random.sample(
+                            self.collaborators, min(5, len(self.collaborators))
+                        )
+                    ],
                 }
             )
 
@@ -335,8 +341,9 @@ class GryzzlyMockService:
 
     async def get_project_collaborators(self, project_id: str) -> List[Dict[str, Any]]:
         """Get collaborators assigned to a project"""
-        # Return a random subset of collaborators
-        return random.sample(self.collaborators, min(5, len(self.collaborators)))
+        project = await self.get_project(project_id)
+        contributor_ids = set(project.get("contributors", []))
+        return [c for c in self.collaborators if c["id"] in contributor_ids]
 
     async def get_tasks(self, project_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get mock tasks"""
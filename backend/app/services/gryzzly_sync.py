@@ -2,13 +2,27 @@
 Gryzzly synchronization service for managing data sync operations
 """
 
+import asyncio
 import logging
-from datetime import date, datetime, timedelta
-from typing import Any, Dict, List, Optional
+import uuid
+from contextlib import aclosing
+from datetime import date, datetime, timedelta, timezone
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
-from sqlalchemy import and_, func, or_, select
+from sqlalchemy import and_, func, literal_column, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models.gryzzly import (
     GryzzlyCollaborator,
     GryzzlyCollaboratorProject,
@@ -18,10 +32,35 @@ from app.models.gryzzly import (
     GryzzlyTask,
 )
 from app.models.person import User
-from app.services.gryzzly_client import GryzzlyAPIClient
+from app.services.collaborator_directory import CollaboratorDirectoryService
+from app.services.gryzzly_client import GryzzlyAPIClient, parse_timestamp
+from app.services.plan_charge_cache import PlanChargeCache
+from app.services.sync_orchestrator import SyncOrchestrator, SyncStage, record_stages
+from app.utils.hashing import content_hash
 
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT ... ON CONFLICT statement
+SYNC_CHUNK_SIZE = 1000
+
+# Declaration sync modes
+SYNC_MODE_AUTO = "auto"
+SYNC_MODE_FULL = "full"
+SYNC_MODE_INCREMENTAL = "incremental"
+SYNC_MODE_RANGE = "range"  # explicit date range, watermark untouched
+
+# Orchestrator stage names and their keys in sync results
+STAGE_COLLABORATORS = "gryzzly.collaborators"
+STAGE_PROJECTS = "gryzzly.projects"
+STAGE_TASKS = "gryzzly.tasks"
+STAGE_DECLARATIONS = "gryzzly.declarations"
+STAGE_KEYS = {
+    STAGE_COLLABORATORS: "collaborators",
+    STAGE_PROJECTS: "projects",
+    STAGE_TASKS: "tasks",
+    STAGE_DECLARATIONS: "declarations",
+}
+
 
 class GryzzlySyncService:
     """Service for synchronizing data from Gryzzly API to local database"""
@@ -41,129 +80,84 @@ class GryzzlySyncService:
         self.session.add(sync_log)
         await self.session.commit()
 
-        results = {
-            "collaborators": {"created": 0, "updated": 0, "failed": 0},
-            "projects": {"created": 0, "updated": 0, "failed": 0},
-            "tasks": {"created": 0, "updated": 0, "failed": 0},
-            "declarations": {"created": 0, "updated": 0, "failed": 0},
-            "errors": [],
-        }
-
-        try:
-            # Sync collaborators first
-            collaborator_result = await self.sync_collaborators()
-            results["collaborators"] = collaborator_result
-
-            # Then sync projects
-            project_result = await self.sync_projects()
-            results["projects"] = project_result
-
-            # Then sync tasks
-            task_result = await self.sync_tasks()
-            results["tasks"] = task_result
-
-            # Finally sync declarations
-            declaration_result = await self.sync_declarations()
-            results["declarations"] = declaration_result
-
-            # Update sync log
-            sync_log.sync_status = "success"
-            sync_log.completed_at = datetime.utcnow()
-            sync_log.duration_seconds = int(
-                (sync_log.completed_at - sync_log.started_at).total_seconds()
-            )
-            sync_log.records_synced = (
-                results["collaborators"]["created"]
-                + results["collaborators"]["updated"]
-                + results["projects"]["created"]
-                + results["projects"]["updated"]
-                + results["tasks"]["created"]
-                + results["tasks"]["updated"]
-                + results["declarations"]["created"]
-                + results["declarations"]["updated"]
-            )
-            sync_log.records_created = (
-                results["collaborators"]["created"]
-                + results["projects"]["created"]
-                + results["tasks"]["created"]
-                + results["declarations"]["created"]
-            )
-            sync_log.records_updated = (
-                results["collaborators"]["updated"]
-                + results["projects"]["updated"]
-                + results["tasks"]["updated"]
-                + results["declarations"]["updated"]
-            )
-            sync_log.records_failed = (
-                results["collaborators"]["failed"]
-                + results["projects"]["failed"]
-                + results["tasks"]["failed"]
-                + results["declarations"]["failed"]
-            )
-
-        except Exception as e:
-            logger.error(f"Full sync failed: {str(e)}")
-            sync_log.sync_status = "failed"
-            sync_log.completed_at = datetime.utcnow()
-            sync_log.error_message = str(e)
-            results["errors"].append(str(e))
+        stages = await self.sync_stages(triggered_by)
+        reports = await SyncOrchestrator(self.session, stages).run()
+        results = await record_stages(self.session, sync_log, reports, STAGE_KEYS)
 
+        await PlanChargeCache(self.session).invalidate()
         await self.session.commit()
         return results
 
-    async def sync_collaborators(self) -> Dict[str, int]:
-        """Sync collaborators from Gryzzly"""
-        result = {"created": 0, "updated": 0, "failed": 0}
+    async def sync_stages(self, triggered_by: str = "system") -> List[SyncStage]:
+        """
+        Stages of a full sync for the SyncOrchestrator: every list is fetched
+        concurrently; writes follow the foreign keys (memberships need
+        collaborators, tasks need projects, declarations need all three);
+        declarations are streamed by their write instead of fetched up front
+        """
+        plan = await self.plan_declaration_sync()
+
+        return [
+            SyncStage(
+                STAGE_COLLABORATORS,
+                fetch=lambda: self.client.get_collaborators(active_only=False),
+                write=self.sync_collaborators,
+            ),
+            SyncStage(
+                STAGE_PROJECTS,
+                fetch=lambda: self.client.get_projects(active_only=False),
+                write=self.sync_projects,
+                after=[STAGE_COLLABORATORS],
+            ),
+            SyncStage(
+                STAGE_TASKS,
+                fetch=self.client.get_tasks,
+                write=self.sync_tasks,
+                after=[STAGE_PROJECTS],
+            ),
+            SyncStage(
+                STAGE_DECLARATIONS,
+                write=lambda _: self.sync_declarations(
+                    triggered_by=triggered_by, plan=plan
+                ),
+                after=[STAGE_COLLABORATORS, STAGE_PROJECTS, STAGE_TASKS],
+            ),
+        ]
+
+    async def sync_collaborators(
+        self, collaborators: Optional[List[Dict]] = None
+    ) -> Dict[str, int]:
+        """Sync collaborators from Gryzzly, or the already fetched ones"""
+        result = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0}
 
         try:
-            # Get all collaborators from Gryzzly
-            gryzzly_collaborators = await self.client.get_collaborators(
-                active_only=False
-            )
+            # Stream all collaborators from Gryzzly, page by page
+            if collaborators is None:
+                collaborators = self.client.iter_collaborators(active_only=False)
+            async for batch in _batched(collaborators, SYNC_CHUNK_SIZE):
+                rows = []
+                for collab_data in batch:
+                    try:
+                        # matricule is kept when Gryzzly does not provide it
+                        rows.append(
+                            {
+                                "matricule": None,
+                                **self._parse_collaborator_data(collab_data),
+                            }
+                        )
+                    except Exception as e:
+                        logger.error(
+                            f"Failed to sync collaborator {collab_data.get('id')}: {str(e)}"
+                        )
+                        result["failed"] += 1
 
-            for collab_data in gryzzly_collaborators:
-                try:
-                    # Check if collaborator already exists
-                    query = select(GryzzlyCollaborator).where(
-                        GryzzlyCollaborator.gryzzly_id == collab_data["id"]
-                    )
-                    existing_result = await self.session.execute(query)
-                    existing = existing_result.scalar_one_or_none()
-
-                    # Parse collaborator data
-                    collaborator_dict = self._parse_collaborator_data(collab_data)
-
-                    if existing:
-                        # Update existing collaborator, preserving matricule if not provided
-                        for key, value in collaborator_dict.items():
-                            # Skip matricule if it's not provided to preserve existing value
-                            if (
-                                key == "matricule"
-                                and value is None
-                                and getattr(existing, "matricule", None) is not None
-                            ):
-                                logger.info(
-                                    f"Gryzzly sync: Preserving existing matricule {getattr(existing, 'matricule')} for {existing.email}"
-                                )
-                                continue
-                            setattr(existing, key, value)
-                        existing.last_synced_at = datetime.utcnow()
-                        result["updated"] += 1
-                    else:
-                        # Create new collaborator
-                        new_collaborator = GryzzlyCollaborator(**collaborator_dict)
-                        self.session.add(new_collaborator)
-                        result["created"] += 1
-
-                        # Try to link with local user by email
-                        await self._link_collaborator_to_user(new_collaborator)
-
-                except Exception as e:
-                    logger.error(
-                        f"Failed to sync collaborator {collab_data.get('id')}: {str(e)}"
-                    )
-                    result["failed"] += 1
+                await self._upsert(
+                    GryzzlyCollaborator, rows, result, preserve=("matricule",)
+                )
 
+            await self._link_collaborators_to_users()
+            await CollaboratorDirectoryService(self.session).refresh()
+            await PlanChargeCache(self.session).invalidate()
             await self.session.commit()
             logger.info(f"Collaborator sync completed: {result}")
 
@@ -173,47 +167,47 @@ class GryzzlySyncService:
 
         return result
 
-    async def sync_projects(self) -> Dict[str, int]:
-        """Sync projects from Gryzzly"""
-        result = {"created": 0, "updated": 0, "failed": 0}
+    async def sync_projects(
+        self, projects: Optional[List[Dict]] = None
+    ) -> Dict[str, int]:
+        """Sync projects from Gryzzly, or the already fetched ones"""
+        result = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0}
 
         try:
-            # Get all projects from Gryzzly
-            gryzzly_projects = await self.client.get_projects(active_only=False)
-
-            for project_data in gryzzly_projects:
-                try:
-                    # Check if project already exists
-                    query = select(GryzzlyProject).where(
-                        GryzzlyProject.gryzzly_id == project_data["id"]
-                    )
-                    existing_result = await self.session.execute(query)
-                    existing = existing_result.scalar_one_or_none()
-
-                    # Parse project data
-                    project_dict = self._parse_project_data(project_data)
-
-                    if existing:
-                        # Update existing project
-                        for key, value in project_dict.items():
-                            setattr(existing, key, value)
-                        existing.last_synced_at = datetime.utcnow()
-                        result["updated"] += 1
-                    else:
-                        # Create new project
-                        new_project = GryzzlyProject(**project_dict)
-                        self.session.add(new_project)
-                        result["created"] += 1
-
-                    # Sync project collaborators
-                    await self._sync_project_collaborators(project_data["id"])
-
-                except Exception as e:
-                    logger.error(
-                        f"Failed to sync project {project_data.get('id')}: {str(e)}"
-                    )
-                    result["failed"] += 1
+            # Contributor user ids per project, from the fetched project list
+            contributors = {}
+            missing_contributors = 0
+
+            # Stream all projects from Gryzzly, page by page
+            if projects is None:
+                projects = self.client.iter_projects(active_only=False)
+            async for batch in _batched(projects, SYNC_CHUNK_SIZE):
+                rows = []
+                for project_data in batch:
+                    try:
+                        rows.append(self._parse_project_data(project_data))
+                        if project_data.get("contributors") is None:
+                            missing_contributors += 1
+                        else:
+                            contributors[project_data["id"]] = project_data[
+                                "contributors"
+                            ]
+                    except Exception as e:
+                        logger.error(
+                            f"Failed to sync project {project_data.get('id')}: {str(e)}"
+                        )
+                        result["failed"] += 1
+
+                await self._upsert(GryzzlyProject, rows, result)
 
+            if missing_contributors:
+                # Memberships are only ever added, so this would go unnoticed
+                logger.warning(
+                    f"{missing_contributors} projects listed without contributors "
+                    "- their memberships were not synced"
+                )
+            await self._sync_project_collaborators(contributors)
+            await PlanChargeCache(self.session).invalidate()
             await self.session.commit()
             logger.info(f"Project sync completed: {result}")
 
@@ -223,61 +217,43 @@ class GryzzlySyncService:
 
         return result
 
-    async def sync_tasks(self) -> Dict[str, int]:
-        """Sync tasks from Gryzzly"""
-        result = {"created": 0, "updated": 0, "failed": 0}
+    async def sync_tasks(self, tasks: Optional[List[Dict]] = None) -> Dict[str, int]:
+        """Sync tasks from Gryzzly, or the already fetched ones"""
+        result = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0}
 
         try:
-            # Get all tasks from Gryzzly
-            gryzzly_tasks = await self.client.get_tasks()
-
-            for task_data in gryzzly_tasks:
-                try:
-                    # Get the project ID in our database
-                    gryzzly_project_id = task_data.get("projectId")
-                    if not gryzzly_project_id:
-                        logger.warning(f"No project ID for task {task_data['id']}")
-                        result["failed"] += 1
-                        continue
-
-                    project_query = select(GryzzlyProject).where(
-                        GryzzlyProject.gryzzly_id == gryzzly_project_id
-                    )
-                    project_result = await self.session.execute(project_query)
-                    project = project_result.scalar_one_or_none()
+            project_ids = await self._id_map(GryzzlyProject)
+
+            # Stream all tasks from Gryzzly, page by page
+            if tasks is None:
+                tasks = self.client.iter_tasks()
+            async for batch in _batched(tasks, SYNC_CHUNK_SIZE):
+                rows = []
+                for task_data in batch:
+                    try:
+                        # Get the project ID in our database
+                        gryzzly_project_id = task_data.get("projectId")
+                        if not gryzzly_project_id:
+                            logger.warning(f"No project ID for task {task_data['id']}")
+                            result["failed"] += 1
+                            continue
+
+                        project_id = project_ids.get(gryzzly_project_id)
+                        if not project_id:
+                            logger.warning(
+                                f"Project {gryzzly_project_id} not found for task {task_data['id']}"
+                            )
+                            result["failed"] += 1
+                            continue
 
-                    if not project:
-                        logger.warning(
-                            f"Project {gryzzly_project_id} not found for task {task_data['id']}"
+                        rows.append(self._parse_task_data(task_data, project_id))
+                    except Exception as e:
+                        logger.error(
+                            f"Failed to sync task {task_data.get('id')}: {str(e)}"
                         )
                         result["failed"] += 1
-                        continue
 
-                    # Check if task already exists
-                    query = select(GryzzlyTask).where(
-                        GryzzlyTask.gryzzly_id == task_data["id"]
-                    )
-                    existing_result = await self.session.execute(query)
-                    existing = existing_result.scalar_one_or_none()
-
-                    # Parse task data
-                    task_dict = self._parse_task_data(task_data, project.id)
-
-                    if existing:
-                        # Update existing task
-                        for key, value in task_dict.items():
-                            setattr(existing, key, value)
-                        existing.last_synced_at = datetime.utcnow()
-                        result["updated"] += 1
-                    else:
-                        # Create new task
-                        new_task = GryzzlyTask(**task_dict)
-                        self.session.add(new_task)
-                        result["created"] += 1
-
-                except Exception as e:
-                    logger.error(f"Failed to sync task {task_data.get('id')}: {str(e)}")
-                    result["failed"] += 1
+                await self._upsert(GryzzlyTask, rows, result)
 
             await self.session.commit()
             logger.info(f"Task sync completed: {result}")
@@ -288,17 +264,56 @@ class GryzzlySyncService:
 
         return result
 
-    async def sync_declarations(
-        self, start_date: Optional[date] = None, end_date: Optional[date] = None
-    ) -> Dict[str, int]:
-        """Sync time declarations from Gryzzly"""
-        result = {"created": 0, "updated": 0, "failed": 0}
+    async def plan_declaration_sync(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        mode: str = SYNC_MODE_AUTO,
+    ) -> Dict[str, Any]:
+        """
+        Resolve the mode, window and watermarks of a declaration sync
+
+        A full sync reads the whole 13-month window; an incremental one only
+        re-reads the last GRYZZLY_INCREMENTAL_LOOKBACK_DAYS and keeps the
+        declarations updated since the watermark of the previous run. In auto
+        mode, a full reconciliation runs every GRYZZLY_FULL_SYNC_INTERVAL_HOURS.
+        An explicit date range is always synced in full and leaves the
+        watermark untouched.
+
+        declarations.list cannot filter on modification time: incremental runs
+        save API traffic only through their later start date, while the
+        watermark is applied after download and saves database writes.
+        """
+        previous = await self._last_declaration_sync_metadata()
+        watermark = parse_timestamp(previous.get("watermark"))
+        last_full_sync_at = parse_timestamp(previous.get("last_full_sync_at"))
+
+        if start_date or end_date:
+            mode = SYNC_MODE_RANGE
+        elif mode == SYNC_MODE_AUTO:
+            reconciliation_interval = timedelta(
+                hours=settings.GRYZZLY_FULL_SYNC_INTERVAL_HOURS
+            )
+            reconciliation_due = (
+                last_full_sync_at is None
+                or datetime.now(timezone.utc) - last_full_sync_at
+                >= reconciliation_interval
+            )
+            mode = SYNC_MODE_FULL if reconciliation_due else SYNC_MODE_INCREMENTAL
+        if mode == SYNC_MODE_INCREMENTAL and watermark is None:
+            mode = SYNC_MODE_FULL
 
         # Default to 6 months before and 6 months after current date if no dates provided
         if not start_date:
             # 6 months before current date, first day of that month
             six_months_ago = date.today() - timedelta(days=180)
             start_date = six_months_ago.replace(day=1)
+            if mode == SYNC_MODE_INCREMENTAL:
+                start_date = max(
+                    start_date,
+                    date.today()
+                    - timedelta(days=settings.GRYZZLY_INCREMENTAL_LOOKBACK_DAYS),
+                )
         if not end_date:
             # 6 months after current date, last day of that month
             six_months_later = date.today() + timedelta(days=180)
@@ -310,105 +325,135 @@ class GryzzlySyncService:
                     six_months_later.year, six_months_later.month + 1, 1
                 ) - timedelta(days=1)
 
-        logger.info(
-            f"Syncing declarations from {start_date} to {end_date} (approximately 13 months)"
-        )
-
-        try:
-            # Get all declarations from Gryzzly
-            gryzzly_declarations = await self.client.get_declarations(
-                start_date=start_date, end_date=end_date
-            )
-
-            for decl_data in gryzzly_declarations:
-                try:
-                    # Get related entities in our database
-                    # API returns camelCase fields
-                    collaborator_id = decl_data.get("collaboratorId")
-                    if not collaborator_id:
-                        logger.warning(
-                            f"No collaborator ID for declaration {decl_data.get('id')}"
-                        )
-                        result["failed"] += 1
-                        continue
+        return {
+            "mode": mode,
+            "start_date": start_date,
+            "end_date": end_date,
+            "watermark": watermark,
+            "last_full_sync_at": last_full_sync_at,
+        }
 
-                    collaborator_query = select(GryzzlyCollaborator).where(
-                        GryzzlyCollaborator.gryzzly_id == collaborator_id
-                    )
-                    collaborator_result = await self.session.execute(collaborator_query)
-                    collaborator = collaborator_result.scalar_one_or_none()
+    def fetch_declarations(
+        self, plan: Dict[str, Any], failed_users: Optional[List[str]] = None
+    ) -> AsyncIterator[List[Dict]]:
+        """Stream the declarations of a planned sync in batches (no database access)"""
+        return self.client.iter_declaration_batches(
+            start_date=plan["start_date"],
+            end_date=plan["end_date"],
+            updated_since=(
+                plan["watermark"] if plan["mode"] == SYNC_MODE_INCREMENTAL else None
+            ),
+            failed_users=failed_users,
+        )
 
-                    if not collaborator:
-                        logger.warning(
-                            f"Collaborator {collaborator_id} not found for declaration {decl_data.get('id')}"
-                        )
-                        result["failed"] += 1
-                        continue
-
-                    # Project ID might be null for some declarations
-                    project = None
-                    project_id = decl_data.get("projectId")
-                    if project_id:
-                        project_query = select(GryzzlyProject).where(
-                            GryzzlyProject.gryzzly_id == project_id
-                        )
-                        project_result = await self.session.execute(project_query)
-                        project = project_result.scalar_one_or_none()
+    async def sync_declarations(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        mode: str = SYNC_MODE_AUTO,
+        triggered_by: str = "system",
+        plan: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Sync time declarations from Gryzzly (see plan_declaration_sync)
+        Batches are fetched in a background task feeding a bounded queue and
+        written as they arrive, so memory stays flat whatever the window.
+        """
+        result = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0}
+        started_at = datetime.utcnow()
+
+        if plan is None:
+            plan = await self.plan_declaration_sync(start_date, end_date, mode)
+        mode = plan["mode"]
+        start_date = plan["start_date"]
+        end_date = plan["end_date"]
 
-                        if not project:
-                            logger.warning(
-                                f"Project {project_id} not found for declaration {decl_data.get('id')}"
-                            )
-                            # Try to continue without project for now
+        logger.info(
+            f"Syncing declarations from {start_date} to {end_date} ({mode} sync)"
+        )
+        if mode == SYNC_MODE_INCREMENTAL:
+            logger.info(
+                f"Keeping declarations updated since {plan['watermark'].isoformat()}"
+            )
 
-                    task = None
-                    task_id = decl_data.get("taskId")
-                    if task_id:
-                        task_query = select(GryzzlyTask).where(
-                            GryzzlyTask.gryzzly_id == task_id
+        try:
+            # Resolve foreign keys in memory
+            collaborator_ids = await self._id_map(GryzzlyCollaborator)
+            project_ids = await self._id_map(GryzzlyProject)
+            task_ids = await self._id_map(GryzzlyTask)
+
+            failed_users = []
+            fetched = 0
+            rows = []
+            # Dates actually written, for the cache invalidation
+            first_date, last_date = start_date, end_date
+
+            async with aclosing(
+                _buffered(
+                    self.fetch_declarations(plan, failed_users),
+                    settings.GRYZZLY_DECLARATION_QUEUE_SIZE,
+                )
+            ) as batches:
+                async for batch in batches:
+                    fetched += len(batch)
+                    for decl_data in batch:
+                        row = self._resolve_declaration(
+                            decl_data, collaborator_ids, project_ids, task_ids
                         )
-                        task_result = await self.session.execute(task_query)
-                        task = task_result.scalar_one_or_none()
-
-                    # Check if declaration already exists
-                    query = select(GryzzlyDeclaration).where(
-                        GryzzlyDeclaration.gryzzly_id == decl_data["id"]
-                    )
-                    existing_result = await self.session.execute(query)
-                    existing = existing_result.scalar_one_or_none()
-
-                    # Parse declaration data
-                    # Skip if no project (required field)
-                    if not project:
-                        result["failed"] += 1
-                        continue
-
-                    declaration_dict = self._parse_declaration_data(
-                        decl_data,
-                        collaborator.id,
-                        project.id,
-                        task.id if task else None,
-                    )
+                        if row is None:
+                            result["failed"] += 1
+                        else:
+                            rows.append(row)
+                            if row["date"]:
+                                first_date = min(first_date, row["date"])
+                                last_date = max(last_date, row["date"])
+
+                    if len(rows) >= SYNC_CHUNK_SIZE:
+                        await self._upsert(GryzzlyDeclaration, rows, result)
+                        rows = []
+
+            await self._upsert(GryzzlyDeclaration, rows, result)
+
+            if failed_users:
+                logger.warning(
+                    f"Declarations of {len(failed_users)} users could not be "
+                    "fetched - keeping the previous watermarks"
+                )
+            watermark, last_full_sync_at = _next_watermarks(
+                plan, started_at, complete=not failed_users
+            )
 
-                    if existing:
-                        # Update existing declaration
-                        for key, value in declaration_dict.items():
-                            setattr(existing, key, value)
-                        existing.last_synced_at = datetime.utcnow()
-                        result["updated"] += 1
-                    else:
-                        # Create new declaration
-                        new_declaration = GryzzlyDeclaration(**declaration_dict)
-                        self.session.add(new_declaration)
-                        result["created"] += 1
-
-                except Exception as e:
-                    logger.error(
-                        f"Failed to sync declaration {decl_data.get('id')}: {str(e)}"
-                    )
-                    result["failed"] += 1
+            completed_at = datetime.utcnow()
+            self.session.add(
+                GryzzlySyncLog(
+                    sync_type="declarations",
+                    sync_status="success",
+                    started_at=started_at,
+                    completed_at=completed_at,
+                    duration_seconds=int((completed_at - started_at).total_seconds()),
+                    records_synced=result["created"] + result["updated"],
+                    records_created=result["created"],
+                    records_updated=result["updated"],
+                    records_unchanged=result["unchanged"],
+                    records_failed=result["failed"],
+                    triggered_by=triggered_by,
+                    sync_metadata={
+                        "mode": mode,
+                        "start_date": start_date.isoformat(),
+                        "end_date": end_date.isoformat(),
+                        "fetched": fetched,
+                        "failed_users": len(failed_users),
+                        "watermark": watermark.isoformat() if watermark else None,
+                        "last_full_sync_at": (
+                            last_full_sync_at.isoformat() if last_full_sync_at else None
+                        ),
+                    },
+                )
+            )
 
+            await PlanChargeCache(self.session).invalidate(first_date, last_date)
             await self.session.commit()
+            result["mode"] = mode
             logger.info(f"Declaration sync completed: {result}")
 
         except Exception as e:
@@ -417,69 +462,112 @@ class GryzzlySyncService:
 
         return result
 
-    async def _sync_project_collaborators(self, project_gryzzly_id: str):
-        """Sync collaborators assigned to a project"""
+    def _resolve_declaration(
+        self,
+        decl_data: Dict,
+        collaborator_ids: Dict[str, uuid.UUID],
+        project_ids: Dict[str, uuid.UUID],
+        task_ids: Dict[str, uuid.UUID],
+    ) -> Optional[Dict]:
+        """Parse a declaration with its local foreign keys, None when unresolved"""
         try:
-            # Get project in our database
-            project_query = select(GryzzlyProject).where(
-                GryzzlyProject.gryzzly_id == project_gryzzly_id
-            )
-            project_result = await self.session.execute(project_query)
-            project = project_result.scalar_one_or_none()
+            # API returns camelCase fields
+            collaborator_id = decl_data.get("collaboratorId")
+            if not collaborator_id:
+                logger.warning(
+                    f"No collaborator ID for declaration {decl_data.get('id')}"
+                )
+                return None
 
-            if not project:
-                return
+            collaborator = collaborator_ids.get(collaborator_id)
+            if not collaborator:
+                logger.warning(
+                    f"Collaborator {collaborator_id} not found for declaration {decl_data.get('id')}"
+                )
+                return None
+
+            # Project ID might be null for some declarations
+            project = None
+            project_id = decl_data.get("projectId")
+            if project_id:
+                project = project_ids.get(project_id)
+                if not project:
+                    logger.warning(
+                        f"Project {project_id} not found for declaration {decl_data.get('id')}"
+                    )
 
-            # Get project collaborators from API
-            project_collaborators = await self.client.get_project_collaborators(
-                project_gryzzly_id
+            # Skip if no project (required field)
+            if not project:
+                return None
+
+            task_id = decl_data.get("taskId")
+            return self._parse_declaration_data(
+                decl_data,
+                collaborator,
+                project,
+                task_ids.get(task_id) if task_id else None,
             )
 
-            for pc_data in project_collaborators:
-                # Get collaborator in our database
-                collab_query = select(GryzzlyCollaborator).where(
-                    GryzzlyCollaborator.gryzzly_id == pc_data["collaborator_id"]
-                )
-                collab_result = await self.session.execute(collab_query)
-                collaborator = collab_result.scalar_one_or_none()
-
-                if not collaborator:
-                    continue
+        except Exception as e:
+            logger.error(f"Failed to sync declaration {decl_data.get('id')}: {str(e)}")
+            return None
 
-                # Check if association exists
-                assoc_query = select(GryzzlyCollaboratorProject).where(
-                    and_(
-                        GryzzlyCollaboratorProject.collaborator_id == collaborator.id,
-                        GryzzlyCollaboratorProject.project_id == project.id,
-                    )
+    async def _last_declaration_sync_metadata(self) -> Dict[str, Any]:
+        """Metadata (watermarks) of the last successful declaration sync"""
+        query = (
+            select(GryzzlySyncLog.sync_metadata)
+            .where(
+                and_(
+                    GryzzlySyncLog.sync_type == "declarations",
+                    GryzzlySyncLog.sync_status == "success",
                 )
-                assoc_result = await self.session.execute(assoc_query)
-                existing = assoc_result.scalar_one_or_none()
-
-                if not existing:
-                    # Create association
-                    new_assoc = GryzzlyCollaboratorProject(
-                        collaborator_id=collaborator.id,
-                        project_id=project.id,
-                        role=pc_data.get("role"),
-                        allocation_percentage=pc_data.get("allocation_percentage"),
-                        start_date=self._parse_date(pc_data.get("start_date")),
-                        end_date=self._parse_date(pc_data.get("end_date")),
-                        is_active=pc_data.get("is_active", True),
-                    )
-                    self.session.add(new_assoc)
-                else:
-                    # Update existing association
-                    existing.role = pc_data.get("role")
-                    existing.allocation_percentage = pc_data.get(
-                        "allocation_percentage"
-                    )
-                    existing.start_date = self._parse_date(pc_data.get("start_date"))
-                    existing.end_date = self._parse_date(pc_data.get("end_date"))
-                    existing.is_active = pc_data.get("is_active", True)
+            )
+            .order_by(GryzzlySyncLog.started_at.desc())
+            .limit(1)
+        )
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none() or {}
+
+    async def _sync_project_collaborators(self, contributors: Dict[str, List[str]]):
+        """
+        Upsert project memberships from the contributor ids of the fetched
+        projects, resolved against stored collaborators, in one statement
+        """
+        collaborator_ids = await self._id_map(GryzzlyCollaborator)
+        project_ids = await self._id_map(GryzzlyProject)
+        now = datetime.utcnow()
+
+        rows = {}
+        for project_gryzzly_id, user_ids in contributors.items():
+            project_id = project_ids.get(project_gryzzly_id)
+            if not project_id:
+                continue
+            for user_id in user_ids:
+                collaborator_id = collaborator_ids.get(user_id)
+                if not collaborator_id:
+                    continue
+                rows[(collaborator_id, project_id)] = {
+                    "id": uuid.uuid4(),
+                    "collaborator_id": collaborator_id,
+                    "project_id": project_id,
+                    "is_active": True,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+
+        if not rows:
+            return
 
-        except Exception as e:
-            logger.error(f"Failed to sync project collaborators: {str(e)}")
+        statement = insert(GryzzlyCollaboratorProject)
+        statement = statement.on_conflict_do_update(
+            index_elements=[
+                GryzzlyCollaboratorProject.collaborator_id,
+                GryzzlyCollaboratorProject.project_id,
+            ],
+            set_={"is_active": True, "updated_at": now},
+        )
+        await self.session.execute(statement, list(rows.values()))
+        logger.info(f"Project memberships synced: {len(rows)}")
 
     def _parse_collaborator_data(self, data: Dict) -> Dict:
         """Parse Gryzzly collaborator data to match our model"""
@@ -606,21 +694,75 @@ class GryzzlySyncService:
         except:
             return None
 
-    async def _link_collaborator_to_user(self, collaborator: GryzzlyCollaborator):
-        """Try to link Gryzzly collaborator with local user by email"""
-        if not collaborator.email:
-            return
-
-        # Check if user exists with this email
-        query = select(User).where(User.email == collaborator.email)
-        result = await self.session.execute(query)
-        user = result.scalar_one_or_none()
-
-        if user:
-            collaborator.local_user_id = user.id
-            logger.info(
-                f"Linked Gryzzly collaborator {collaborator.gryzzly_id} to user {user.id}"
+    async def _upsert(
+        self,
+        model: Any,
+        rows: List[Dict[str, Any]],
+        result: Dict[str, int],
+        preserve: Iterable[str] = (),
+    ) -> None:
+        """
+        Write rows with INSERT ... ON CONFLICT (gryzzly_id) DO UPDATE, in chunks
+        Columns in `preserve` keep their stored value when the new one is null.
+        Rows whose source_hash did not change are left untouched. Created and
+        updated counts come from RETURNING, the rest is unchanged.
+        """
+        # A gryzzly_id may only appear once per statement (last one wins)
+        rows = list({row["gryzzly_id"]: row for row in rows}.values())
+        now = datetime.utcnow()
+
+        for start in range(0, len(rows), SYNC_CHUNK_SIZE):
+            chunk = [
+                {
+                    "id": uuid.uuid4(),
+                    **row,
+                    "source_hash": content_hash(row),
+                    "last_synced_at": now,
+                }
+                for row in rows[start : start + SYNC_CHUNK_SIZE]
+            ]
+            statement = insert(model).values(chunk)
+            columns = {
+                name: statement.excluded[name]
+                for name in chunk[0]
+                if name not in ("id", "gryzzly_id")
+            }
+            for name in preserve:
+                columns[name] = func.coalesce(
+                    statement.excluded[name], model.__table__.c[name]
+                )
+            statement = statement.on_conflict_do_update(
+                index_elements=[model.gryzzly_id],
+                set_={**columns, "updated_at": now},
+                where=model.source_hash.is_distinct_from(
+                    statement.excluded.source_hash
+                ),
+            ).returning(literal_column("xmax = 0").label("inserted"))
+
+            written = 0
+            for row in await self.session.execute(statement):
+                result["created" if row.inserted else "updated"] += 1
+                written += 1
+            result["unchanged"] += len(chunk) - written
+
+    async def _id_map(self, model: Any) -> Dict[str, uuid.UUID]:
+        """Map gryzzly_id to local id for every stored row of a model"""
+        result = await self.session.execute(select(model.gryzzly_id, model.id))
+        return {gryzzly_id: id_ for gryzzly_id, id_ in result}
+
+    async def _link_collaborators_to_users(self):
+        """Link unlinked Gryzzly collaborators with local users by email"""
+        await self.session.execute(
+            update(GryzzlyCollaborator)
+            .where(
+                and_(
+                    GryzzlyCollaborator.local_user_id.is_(None),
+                    GryzzlyCollaborator.email == User.email,
+                )
             )
+            .values(local_user_id=User.id)
+            .execution_options(synchronize_session=False)
+        )
 
     async def get_sync_status(self) -> Dict:
         """Get current synchronization status"""
@@ -671,3 +813,78 @@ class GryzzlySyncService:
             },
             "api_connected": await self.client.test_connection(),
         }
+
+
+def _next_watermarks(
+    plan: Dict[str, Any], started_at: datetime, complete: bool
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Watermark and last full sync time to record after a declaration sync
+    The watermark moves to the start of the run, less
+    GRYZZLY_WATERMARK_SAFETY_MARGIN_MINUTES: users are read concurrently, so
+    the latest modification seen says nothing about edits made to users read
+    earlier, nor about late commits upstream. It stays put for explicit ranges
+    and when some users could not be read, as their changes would fall behind it.
+    """
+    watermark = plan["watermark"]
+    last_full_sync_at = plan["last_full_sync_at"]
+    if not complete or plan["mode"] == SYNC_MODE_RANGE:
+        return watermark, last_full_sync_at
+
+    run_started_at = started_at.replace(tzinfo=timezone.utc)
+    watermark = run_started_at - timedelta(
+        minutes=settings.GRYZZLY_WATERMARK_SAFETY_MARGIN_MINUTES
+    )
+    if plan["mode"] == SYNC_MODE_FULL:
+        last_full_sync_at = run_started_at
+    return watermark, last_full_sync_at
+
+
+async def _batched(
+    items: Union[AsyncIterator[Any], List[Any]], size: int
+) -> AsyncIterator[List[Any]]:
+    """Group the items of an async iterator or a list into lists of at most `size`"""
+    if isinstance(items, list):
+        for start in range(0, len(items), size):
+            yield items[start : start + size]
+        return
+
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _buffered(items: AsyncIterator[Any], maxsize: int) -> AsyncIterator[Any]:
+    """
+    Pull items from an async iterator in a background task, at most `maxsize`
+    ahead of the consumer, and yield them in order
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(maxsize, 1))
+    done = object()
+
+    async def produce():
+        try:
+            async for item in items:
+                await queue.put((item, None))
+        except Exception as e:
+            await queue.put((done, e))
+        else:
+            await queue.put((done, None))
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            item, error = await queue.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
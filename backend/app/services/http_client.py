@@ -0,0 +1,119 @@
+"""
+Shared outbound HTTP client
+One long-lived httpx.AsyncClient with keep-alive connection pooling (and HTTP/2
+when available) reused by the external API clients, opened and closed by the
+application lifespan
+"""
+
+import asyncio
+import logging
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    HTTP2_AVAILABLE = False
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+# Per-host request limits, bound to the loop of the shared client
+_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def _use_http2() -> bool:
+    """HTTP/2 is negotiated only when enabled and h2 is installed"""
+    return settings.HTTP2_ENABLED and HTTP2_AVAILABLE
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Build a pooled client from the HTTP_POOL_* settings"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.HTTP_POOL_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(30.0, connect=10.0),
+        http2=_use_http2(),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared client of the running event loop
+
+    Pooled connections belong to the loop that opened them, so a new client
+    is created lazily when called from another loop (Celery tasks, scripts).
+    """
+    global _client, _client_loop
+
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = create_http_client()
+        _client_loop = loop
+        _host_semaphores.clear()
+    return _client
+
+
+def host_semaphore(host: str, limit: int) -> asyncio.Semaphore:
+    """
+    Return the semaphore capping in-flight requests to a host, created with
+    `limit` slots on first use in the running event loop
+    """
+    get_http_client()
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = _host_semaphores[host] = asyncio.Semaphore(max(limit, 1))
+    return semaphore
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential back-off with full jitter for a 0-based retry attempt"""
+    return random.uniform(0, min(cap, base * (2**attempt)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    """Open the shared client (application startup)"""
+    client = get_http_client()
+    logger.info(
+        f"HTTP client pool ready (max {settings.HTTP_POOL_MAX_CONNECTIONS} "
+        f"connections, http2={_use_http2()})"
+    )
+    return client
+
+
+async def close_http_client() -> None:
+    """Close the shared client and its pooled connections (application shutdown)"""
+    global _client, _client_loop
+
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+    _host_semaphores.clear()
@@ -2,17 +2,27 @@
 Payfit API Client for interacting with Payfit Partner API
 """
 
+import asyncio
 import logging
-from datetime import date, datetime
-from typing import Any, Dict, List, Optional
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 import httpx
-from httpx import AsyncClient, HTTPStatusError
 
 from app.config import settings
+from app.services.http_client import (
+    backoff_delay,
+    get_http_client,
+    host_semaphore,
+    parse_retry_after,
+)
 
 logger = logging.getLogger(__name__)
 
+# Responses worth retrying: rate limited or transient server errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
 
 class PayfitAPIClient:
     """Client for Payfit Partner API v1.0"""
@@ -42,6 +52,7 @@ class PayfitAPIClient:
             "Content-Type": "application/json",
             "Accept": "application/json",
         }
+        self.host = urlsplit(self.base_url).netloc
 
     async def _make_request(
         self,
@@ -51,30 +62,54 @@ class PayfitAPIClient:
         data: Optional[Dict] = None,
         timeout: int = 30,
     ) -> Dict:
-        """Make HTTP request to Payfit API"""
+        """
+        Make HTTP request to Payfit API on the shared pooled client
+        Rate limits, server errors and transport errors are retried with
+        jittered exponential back-off, waiting Retry-After when given.
+        """
         url = f"{self.base_url}{endpoint}"
+        max_retries = settings.PAYFIT_MAX_RETRIES
 
-        async with AsyncClient(timeout=timeout) as client:
+        for attempt in range(max_retries + 1):
             try:
-                response = await client.request(
-                    method=method,
-                    url=url,
-                    headers=self.headers,
-                    params=params,
-                    json=data,
-                )
-                response.raise_for_status()
-                return response.json()
-            except HTTPStatusError as e:
-                logger.error(
-                    f"Payfit API error: {e.response.status_code} - {e.response.text}"
+                async with host_semaphore(self.host, settings.PAYFIT_MAX_CONCURRENCY):
+                    response = await get_http_client().request(
+                        method=method,
+                        url=url,
+                        headers=self.headers,
+                        params=params,
+                        json=data,
+                        timeout=timeout,
+                    )
+            except httpx.TransportError as e:
+                if attempt >= max_retries:
+                    logger.error(f"Payfit API request failed: {str(e)}")
+                    raise
+                reason = str(e) or type(e).__name__
+                wait_time = None
+            else:
+                if response.status_code not in RETRYABLE_STATUSES or (
+                    attempt >= max_retries
+                ):
+                    if response.is_error:
+                        error_msg = f"Payfit API error: {response.status_code} - {response.text}"
+                        logger.error(error_msg)
+                        raise Exception(error_msg)
+                    return response.json()
+                reason = f"HTTP {response.status_code}"
+                wait_time = parse_retry_after(response.headers.get("Retry-After"))
+
+            if wait_time is None:
+                wait_time = backoff_delay(
+                    attempt,
+                    settings.PAYFIT_RETRY_BASE_DELAY,
+                    settings.PAYFIT_RETRY_MAX_DELAY,
                 )
-                raise Exception(
-                    f"Payfit API error: {e.response.status_code} - {e.response.text}"
-                )
-            except Exception as e:
-                logger.error(f"Payfit API request failed: {str(e)}")
-                raise
+            logger.warning(
+                f"Payfit API {reason} on {endpoint}, retry {attempt + 1}/{max_retries} "
+                f"in {wait_time:.1f}s"
+            )
+            await asyncio.sleep(wait_time)
 
     async def test_connection(self) -> bool:
         """Test API connection and authentication"""
@@ -221,33 +256,81 @@ class PayfitAPIClient:
 
         return await self._make_request("GET", endpoint, params=params)
 
+    async def iter_absences(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        status: str = "all",
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream absences, paging through monthly shards of the window
+        concurrently (at most PAYFIT_ABSENCE_SHARD_CONCURRENCY at once)
+        Absences returned by several shards are yielded once.
+        """
+        shards = iter(_monthly_shards(start_date, end_date))
+        pages: asyncio.Queue = asyncio.Queue()
+
+        async def page_through_shards():
+            try:
+                for shard_start, shard_end in shards:
+                    next_page_token = None
+                    while True:
+                        result = await self.get_absences(
+                            max_results=50,
+                            next_page_token=next_page_token,
+                            status=status,
+                            begin_date=shard_start,
+                            end_date=shard_end,
+                        )
+                        await pages.put(result.get("absences", []))
+
+                        # Check for next page
+                        meta = result.get("meta", {})
+                        next_page_token = meta.get("nextPageToken")
+                        if not next_page_token:
+                            break
+            except Exception as e:
+                await pages.put(e)
+            finally:
+                await pages.put(None)
+
+        workers = [
+            asyncio.ensure_future(page_through_shards())
+            for _ in range(max(settings.PAYFIT_ABSENCE_SHARD_CONCURRENCY, 1))
+        ]
+        running = len(workers)
+        seen = set()
+        try:
+            while running:
+                page = await pages.get()
+                if page is None:
+                    running -= 1
+                    continue
+                if isinstance(page, Exception):
+                    raise page
+                for absence in page:
+                    absence_id = absence.get("id")
+                    if absence_id is not None:
+                        if absence_id in seen:
+                            continue
+                        seen.add(absence_id)
+                    yield absence
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
     async def get_all_absences(
         self,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         status: str = "all",
     ) -> List[Dict]:
-        """Get all absences with pagination handling"""
-        all_absences = []
-        next_page_token = None
-
-        while True:
-            result = await self.get_absences(
-                max_results=50,
-                next_page_token=next_page_token,
-                status=status,
-                begin_date=start_date,
-                end_date=end_date,
-            )
-
-            absences = result.get("absences", [])
-            all_absences.extend(absences)
-
-            # Check for next page
-            meta = result.get("meta", {})
-            next_page_token = meta.get("nextPageToken")
-            if not next_page_token:
-                break
+        """Get all absences with pagination handling (see iter_absences)"""
+        all_absences = [
+            absence
+            async for absence in self.iter_absences(start_date, end_date, status)
+        ]
 
         logger.info(f"Retrieved {len(all_absences)} absences from Payfit")
         return all_absences
@@ -258,15 +341,7 @@ class PayfitAPIClient:
         collaborators = await self.get_all_collaborators(
             include_in_progress_contracts=True
         )
-
-        all_contracts = []
-        for collab in collaborators:
-            contracts = collab.get("contracts", [])
-            for contract in contracts:
-                # Add collaborator ID to contract for reference
-                contract["collaboratorId"] = collab["id"]
-                if not employee_id or collab["id"] == employee_id:
-                    all_contracts.append(contract)
+        all_contracts = extract_contracts(collaborators, employee_id)
 
         logger.info(f"Extracted {len(all_contracts)} contracts from collaborators")
         return all_contracts
@@ -292,3 +367,34 @@ class PayfitAPIClient:
         """Get specific payslip details"""
         endpoint = f"/companies/{self.company_id}/collaborators/{collaborator_id}/contracts/{contract_id}/payslips/{payslip_id}"
         return await self._make_request("GET", endpoint)
+
+
+def _monthly_shards(
+    start_date: Optional[date], end_date: Optional[date]
+) -> List[Tuple[Optional[date], Optional[date]]]:
+    """Split a date window at month boundaries; an open window is one shard"""
+    if not start_date or not end_date or start_date > end_date:
+        return [(start_date, end_date)]
+
+    shards = []
+    shard_start = start_date
+    while shard_start <= end_date:
+        next_month = (shard_start.replace(day=1) + timedelta(days=32)).replace(day=1)
+        shard_end = min(next_month - timedelta(days=1), end_date)
+        shards.append((shard_start, shard_end))
+        shard_start = next_month
+    return shards
+
+
+def extract_contracts(
+    collaborators: List[Dict], employee_id: Optional[str] = None
+) -> List[Dict]:
+    """Contracts nested in collaborators, each with its collaboratorId"""
+    all_contracts = []
+    for collab in collaborators:
+        if employee_id and collab["id"] != employee_id:
+            continue
+        for contract in collab.get("contracts", []):
+            # Add collaborator ID to a copy, collaborators stay as fetched
+            all_contracts.append({**contract, "collaboratorId": collab["id"]})
+    return all_contracts
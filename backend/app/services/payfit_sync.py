@@ -3,12 +3,15 @@ Payfit synchronization service for managing data sync operations
 """
 
 import logging
+import uuid
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy import and_, func, or_, select
+from sqlalchemy import and_, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models.payfit import (
     PayfitAbsence,
     PayfitContract,
@@ -16,10 +19,38 @@ from app.models.payfit import (
     PayfitSyncLog,
 )
 from app.models.person import User
-from app.services.payfit_client import PayfitAPIClient
+from app.services.collaborator_directory import CollaboratorDirectoryService
+from app.services.payfit_client import PayfitAPIClient, extract_contracts
+from app.services.plan_charge_cache import PlanChargeCache
+from app.services.sync_orchestrator import (
+    SYNC_COUNTERS,
+    SyncOrchestrator,
+    SyncStage,
+    record_stages,
+    shared_fetch,
+)
+from app.utils.hashing import content_hash
 
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT ... ON CONFLICT statement
+SYNC_CHUNK_SIZE = 1000
+
+# Sync modes
+SYNC_MODE_AUTO = "auto"
+SYNC_MODE_FULL = "full"
+SYNC_MODE_INCREMENTAL = "incremental"
+
+# Orchestrator stage names and their keys in sync results
+STAGE_EMPLOYEES = "payfit.employees"
+STAGE_CONTRACTS = "payfit.contracts"
+STAGE_ABSENCES = "payfit.absences"
+STAGE_KEYS = {
+    STAGE_EMPLOYEES: "employees",
+    STAGE_CONTRACTS: "contracts",
+    STAGE_ABSENCES: "absences",
+}
+
 
 class PayfitSyncService:
     """Service for synchronizing data from Payfit API to local database"""
@@ -28,8 +59,10 @@ class PayfitSyncService:
         self.db = db
         self.client = PayfitAPIClient()
 
-    async def sync_all(self, triggered_by: str = "system") -> Dict[str, Any]:
-        """Perform complete synchronization of all Payfit data"""
+    async def sync_all(
+        self, triggered_by: str = "system", mode: str = SYNC_MODE_AUTO
+    ) -> Dict[str, Any]:
+        """Perform synchronization of all Payfit data (see plan_sync)"""
         sync_log = PayfitSyncLog(
             sync_type="full",
             sync_status="started",
@@ -39,13 +72,6 @@ class PayfitSyncService:
         self.db.add(sync_log)
         await self.db.commit()
 
-        results = {
-            "employees": {"created": 0, "updated": 0, "failed": 0},
-            "contracts": {"created": 0, "updated": 0, "failed": 0},
-            "absences": {"created": 0, "updated": 0, "failed": 0},
-            "errors": [],
-        }
-
         # Check if Payfit is properly configured
         if not self.client.is_configured:
             logger.info("Payfit API is in mock mode - skipping sync")
@@ -53,66 +79,132 @@ class PayfitSyncService:
             sync_log.completed_at = datetime.utcnow()
             sync_log.duration_seconds = 0
             sync_log.records_synced = 0
-            results["errors"].append("Payfit API not configured - mock mode active")
             await self.db.commit()
-            return results
+            return {
+                **{key: dict.fromkeys(SYNC_COUNTERS, 0) for key in STAGE_KEYS.values()},
+                "errors": ["Payfit API not configured - mock mode active"],
+            }
 
-        try:
-            # Sync employees first
-            employee_result = await self.sync_employees()
-            results["employees"] = employee_result
+        stages = await self.sync_stages(triggered_by, mode)
+        reports = await SyncOrchestrator(self.db, stages).run()
+        results = await record_stages(self.db, sync_log, reports, STAGE_KEYS)
 
-            # Then sync contracts
-            contract_result = await self.sync_contracts()
-            results["contracts"] = contract_result
+        await PlanChargeCache(self.db).invalidate()
+        await self.db.commit()
+        return results
 
-            # Finally sync absences
-            absence_result = await self.sync_absences()
-            results["absences"] = absence_result
+    async def plan_sync(self, mode: str = SYNC_MODE_AUTO) -> Dict[str, Any]:
+        """
+        Resolve the mode, absence window and resources of a sync
+
+        The Partner API cannot filter on modification time, so the cursors
+        are the last window synced and the last employee pull. A full sync
+        pulls employees, contracts and the whole absence window. An
+        incremental one only re-reads absences from the last
+        PAYFIT_INCREMENTAL_LOOKBACK_DAYS on, and pulls employees and contracts
+        again once PAYFIT_EMPLOYEE_SYNC_INTERVAL_HOURS have passed. In auto
+        mode, a full reconciliation runs every PAYFIT_FULL_SYNC_INTERVAL_HOURS.
+        """
+        previous_absences = await self._last_sync_metadata("absences")
+        previous_employees = await self._last_sync_metadata("employees")
+        last_full_sync_at = self._parse_datetime(
+            previous_absences.get("last_full_sync_at")
+        )
+        employees_synced_at = self._parse_datetime(previous_employees.get("synced_at"))
+        now = datetime.utcnow()
 
-            # Update sync log
-            sync_log.sync_status = "success"
-            sync_log.completed_at = datetime.utcnow()
-            sync_log.duration_seconds = int(
-                (sync_log.completed_at - sync_log.started_at).total_seconds()
-            )
-            sync_log.records_synced = (
-                results["employees"]["created"]
-                + results["employees"]["updated"]
-                + results["contracts"]["created"]
-                + results["contracts"]["updated"]
-                + results["absences"]["created"]
-                + results["absences"]["updated"]
-            )
-            sync_log.records_created = (
-                results["employees"]["created"]
-                + results["contracts"]["created"]
-                + results["absences"]["created"]
+        if mode == SYNC_MODE_AUTO:
+            reconciliation_due = last_full_sync_at is None or (
+                now - last_full_sync_at
+                >= timedelta(hours=settings.PAYFIT_FULL_SYNC_INTERVAL_HOURS)
             )
-            sync_log.records_updated = (
-                results["employees"]["updated"]
-                + results["contracts"]["updated"]
-                + results["absences"]["updated"]
+            mode = SYNC_MODE_FULL if reconciliation_due else SYNC_MODE_INCREMENTAL
+
+        start_date, end_date = _absence_window()
+        if mode == SYNC_MODE_INCREMENTAL:
+            start_date = max(
+                start_date,
+                date.today()
+                - timedelta(days=settings.PAYFIT_INCREMENTAL_LOOKBACK_DAYS),
             )
-            sync_log.records_failed = (
-                results["employees"]["failed"]
-                + results["contracts"]["failed"]
-                + results["absences"]["failed"]
+
+        return {
+            "mode": mode,
+            "start_date": start_date,
+            "end_date": end_date,
+            "employees": mode == SYNC_MODE_FULL
+            or employees_synced_at is None
+            or now - employees_synced_at
+            >= timedelta(hours=settings.PAYFIT_EMPLOYEE_SYNC_INTERVAL_HOURS),
+            "last_full_sync_at": last_full_sync_at,
+        }
+
+    async def sync_stages(
+        self, triggered_by: str = "system", mode: str = SYNC_MODE_AUTO
+    ) -> List[SyncStage]:
+        """
+        Stages of a sync for the SyncOrchestrator: every list is fetched
+        concurrently; contracts and absences are written after the employees
+        they reference. Employees and contracts come from one collaborators
+        pull, left out when the plan does not need them.
+        """
+        plan = await self.plan_sync(mode)
+        start_date = plan["start_date"]
+        end_date = plan["end_date"]
+        logger.info(
+            f"Payfit {plan['mode']} sync: absences from {start_date} to {end_date}, "
+            f"employees {'included' if plan['employees'] else 'skipped'}"
+        )
+
+        stages = []
+        if plan["employees"]:
+            fetch_collaborators = shared_fetch(
+                lambda: self.client.get_all_collaborators(
+                    include_in_progress_contracts=True
+                )
             )
 
-        except Exception as e:
-            logger.error(f"Full sync failed: {str(e)}")
-            sync_log.sync_status = "failed"
-            sync_log.completed_at = datetime.utcnow()
-            sync_log.error_message = str(e)
-            results["errors"].append(str(e))
+            async def fetch_contracts() -> List[Dict]:
+                return extract_contracts(await fetch_collaborators())
 
-        await self.db.commit()
-        return results
+            stages += [
+                SyncStage(
+                    STAGE_EMPLOYEES,
+                    fetch=fetch_collaborators,
+                    write=lambda employees: self.sync_employees(
+                        employees, triggered_by
+                    ),
+                ),
+                SyncStage(
+                    STAGE_CONTRACTS,
+                    fetch=fetch_contracts,
+                    write=self.sync_contracts,
+                    after=[STAGE_EMPLOYEES],
+                ),
+            ]
 
-    async def sync_employees(self) -> Dict[str, int]:
-        """Sync employees from Payfit"""
-        sync_result = {"created": 0, "updated": 0, "failed": 0}
+        stages.append(
+            SyncStage(
+                STAGE_ABSENCES,
+                fetch=lambda: self.client.get_all_absences(
+                    start_date=start_date, end_date=end_date
+                ),
+                write=lambda absences: self.sync_absences(
+                    absences=absences, plan=plan, triggered_by=triggered_by
+                ),
+                after=[stage.name for stage in stages],
+            )
+        )
+        return stages
+
+    async def sync_employees(
+        self,
+        payfit_employees: Optional[List[Dict]] = None,
+        triggered_by: str = "system",
+    ) -> Dict[str, int]:
+        """Sync employees from Payfit, or the already fetched ones"""
+        sync_result = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0}
+        started_at = datetime.utcnow()
 
         # Check if Payfit is properly configured
         if not self.client.is_configured:
@@ -121,9 +213,10 @@ class PayfitSyncService:
 
         try:
             # Get all employees from Payfit
-            payfit_employees = await self.client.get_all_employees(
-                include_terminated=True
-            )
+            if payfit_employees is None:
+                payfit_employees = await self.client.get_all_employees(
+                    include_terminated=True
+                )
 
             for emp_data in payfit_employees:
                 try:
@@ -137,15 +230,22 @@ class PayfitSyncService:
                     # Parse employee data
                     employee_dict = self._parse_employee_data(emp_data)
 
-                    if existing:
+                    source_hash = content_hash(employee_dict)
+                    if existing and existing.source_hash == source_hash:
+                        # Nothing changed since the last sync
+                        sync_result["unchanged"] += 1
+                    elif existing:
                         # Update existing employee
                         for key, value in employee_dict.items():
                             setattr(existing, key, value)
+                        existing.source_hash = source_hash
                         existing.last_synced_at = datetime.utcnow()
                         sync_result["updated"] += 1
                     else:
                         # Create new employee
-                        new_employee = PayfitEmployee(**employee_dict)
+                        new_employee = PayfitEmployee(
+                            **employee_dict, source_hash=source_hash
+                        )
                         self.db.add(new_employee)
                         sync_result["created"] += 1
 
@@ -158,6 +258,15 @@ class PayfitSyncService:
                     )
                     sync_result["failed"] += 1
 
+            await CollaboratorDirectoryService(self.db).refresh()
+            self._add_cursor_log(
+                "employees",
+                started_at,
+                sync_result,
+                triggered_by,
+                {"synced_at": started_at.isoformat()},
+            )
+            await PlanChargeCache(self.db).invalidate()
             await self.db.commit()
             logger.info(f"Employee sync completed: {sync_result}")
 
@@ -167,13 +276,16 @@ class PayfitSyncService:
 
         return sync_result
 
-    async def sync_contracts(self) -> Dict[str, int]:
-        """Sync contracts from Payfit"""
-        sync_result = {"created": 0, "updated": 0, "failed": 0}
+    async def sync_contracts(
+        self, payfit_contracts: Optional[List[Dict]] = None
+    ) -> Dict[str, int]:
+        """Sync contracts from Payfit, or the already fetched ones"""
+        sync_result = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0}
 
         try:
             # Get all contracts from Payfit
-            payfit_contracts = await self.client.get_all_contracts()
+            if payfit_contracts is None:
+                payfit_contracts = await self.client.get_all_contracts()
 
             for contract_data in payfit_contracts:
                 try:
@@ -187,15 +299,22 @@ class PayfitSyncService:
                     # Parse contract data
                     contract_dict = self._parse_contract_data(contract_data)
 
-                    if existing:
+                    source_hash = content_hash(contract_dict)
+                    if existing and existing.source_hash == source_hash:
+                        # Nothing changed since the last sync
+                        sync_result["unchanged"] += 1
+                    elif existing:
                         # Update existing contract
                         for key, value in contract_dict.items():
                             setattr(existing, key, value)
+                        existing.source_hash = source_hash
                         existing.last_synced_at = datetime.utcnow()
                         sync_result["updated"] += 1
                     else:
                         # Create new contract
-                        new_contract = PayfitContract(**contract_dict)
+                        new_contract = PayfitContract(
+                            **contract_dict, source_hash=source_hash
+                        )
                         self.db.add(new_contract)
                         sync_result["created"] += 1
 
@@ -205,6 +324,7 @@ class PayfitSyncService:
                     )
                     sync_result["failed"] += 1
 
+            await CollaboratorDirectoryService(self.db).refresh()
             await self.db.commit()
             logger.info(f"Contract sync completed: {sync_result}")
 
@@ -215,46 +335,50 @@ class PayfitSyncService:
         return sync_result
 
     async def sync_absences(
-        self, start_date: Optional[date] = None, end_date: Optional[date] = None
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        absences: Optional[List[Dict]] = None,
+        plan: Optional[Dict[str, Any]] = None,
+        triggered_by: str = "system",
     ) -> Dict[str, int]:
-        """Sync absences from Payfit"""
-        sync_result = {"created": 0, "updated": 0, "failed": 0}
-
-        # Default to 6 months before and 6 months after current date
-        today = date.today()
-        if not start_date:
-            # 6 months before today
-            start_date = today - timedelta(days=180)
-        if not end_date:
-            # 6 months after today
-            end_date = today + timedelta(days=180)
+        """
+        Sync absences from Payfit, or the already fetched ones
+        With a plan (see plan_sync), its window is synced and recorded as the
+        absence cursor; an explicit date range leaves the cursor untouched.
+        """
+        sync_result = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0}
+        started_at = datetime.utcnow()
+        if plan is not None:
+            start_date, end_date = plan["start_date"], plan["end_date"]
+        start_date, end_date = _absence_window(start_date, end_date)
 
         try:
-            # Build a mapping of contract ID to employee ID
-            contract_employee_map = {}
-            stmt = select(PayfitContract)
-            db_result = await self.db.execute(stmt)
-            contracts = db_result.scalars().all()
-            for contract in contracts:
-                if contract.payfit_id and contract.payfit_employee_id:
-                    contract_employee_map[
-                        contract.payfit_id
-                    ] = contract.payfit_employee_id
+            # Resolve contracts and employees in memory
+            db_result = await self.db.execute(
+                select(PayfitContract.payfit_id, PayfitContract.payfit_employee_id)
+            )
+            contract_employee_map = {
+                contract_id: employee_id
+                for contract_id, employee_id in db_result
+                if contract_id and employee_id
+            }
+            db_result = await self.db.execute(select(PayfitEmployee.payfit_id))
+            employee_ids = set(db_result.scalars().all())
 
             # Get all absences from Payfit
-            payfit_absences = await self.client.get_all_absences(
-                start_date=start_date, end_date=end_date
-            )
+            payfit_absences = absences
+            if payfit_absences is None:
+                payfit_absences = await self.client.get_all_absences(
+                    start_date=start_date, end_date=end_date
+                )
 
+            rows = []
+            missing_dates = []
+            missing_employee = []
+            orphans: Dict[str, List[str]] = {}
             for absence_data in payfit_absences:
                 try:
-                    # Check if absence already exists
-                    stmt = select(PayfitAbsence).where(
-                        PayfitAbsence.payfit_id == absence_data["id"]
-                    )
-                    db_result = await self.db.execute(stmt)
-                    existing = db_result.scalar_one_or_none()
-
                     # Add the contract-to-employee mapping if we have a contractId
                     contract_id = absence_data.get("contractId")
                     if contract_id and contract_id in contract_employee_map:
@@ -265,39 +389,24 @@ class PayfitSyncService:
                     # Parse absence data
                     absence_dict = self._parse_absence_data(absence_data)
 
+                    # Start and end dates are required columns
+                    if not absence_dict["start_date"] or not absence_dict["end_date"]:
+                        missing_dates.append(absence_dict["payfit_id"])
+                        continue
+
                     # Skip if we don't have a valid employee ID
                     if not absence_dict.get("payfit_employee_id"):
-                        logger.warning(
-                            f"Skipping absence {absence_data.get('id')} - no employee ID found"
-                        )
-                        sync_result["failed"] += 1
+                        missing_employee.append(absence_dict["payfit_id"])
                         continue
 
-                    # Verify that the employee exists
-                    stmt_emp = select(PayfitEmployee).where(
-                        PayfitEmployee.payfit_id == absence_dict["payfit_employee_id"]
-                    )
-                    emp_result = await self.db.execute(stmt_emp)
-                    employee = emp_result.scalar_one_or_none()
-
-                    if not employee:
-                        logger.warning(
-                            f"Skipping absence {absence_data.get('id')} - employee {absence_dict['payfit_employee_id']} not found"
-                        )
-                        sync_result["failed"] += 1
+                    # Skip absences of employees we do not know
+                    if absence_dict["payfit_employee_id"] not in employee_ids:
+                        orphans.setdefault(
+                            absence_dict["payfit_employee_id"], []
+                        ).append(absence_dict["payfit_id"])
                         continue
 
-                    if existing:
-                        # Update existing absence
-                        for key, value in absence_dict.items():
-                            setattr(existing, key, value)
-                        existing.last_synced_at = datetime.utcnow()
-                        sync_result["updated"] += 1
-                    else:
-                        # Create new absence
-                        new_absence = PayfitAbsence(**absence_dict)
-                        self.db.add(new_absence)
-                        sync_result["created"] += 1
+                    rows.append(absence_dict)
 
                 except Exception as e:
                     logger.error(
@@ -305,6 +414,56 @@ class PayfitSyncService:
                     )
                     sync_result["failed"] += 1
 
+            # Report skipped absences once, not one warning each
+            if missing_dates:
+                logger.warning(
+                    f"Skipping {len(missing_dates)} absences without dates: "
+                    f"{', '.join(missing_dates[:20])}"
+                )
+            if missing_employee:
+                logger.warning(
+                    f"Skipping {len(missing_employee)} absences without employee ID: "
+                    f"{', '.join(missing_employee[:20])}"
+                )
+            if orphans:
+                logger.warning(
+                    f"Skipping {sum(len(ids) for ids in orphans.values())} absences "
+                    f"of {len(orphans)} unknown employees: "
+                    f"{', '.join(list(orphans)[:20])}"
+                )
+            sync_result["failed"] += (
+                len(missing_dates)
+                + len(missing_employee)
+                + sum(len(ids) for ids in orphans.values())
+            )
+
+            await self._upsert(PayfitAbsence, rows, sync_result)
+
+            if plan is not None:
+                last_full_sync_at = plan["last_full_sync_at"]
+                if plan["mode"] == SYNC_MODE_FULL:
+                    last_full_sync_at = started_at
+                self._add_cursor_log(
+                    "absences",
+                    started_at,
+                    sync_result,
+                    triggered_by,
+                    {
+                        "mode": plan["mode"],
+                        "start_date": start_date.isoformat(),
+                        "end_date": end_date.isoformat(),
+                        "last_full_sync_at": (
+                            last_full_sync_at.isoformat() if last_full_sync_at else None
+                        ),
+                    },
+                )
+
+            # Absences can extend past the sync window: invalidate every date
+            # actually written as well as the window itself
+            await PlanChargeCache(self.db).invalidate(
+                min([start_date] + [row["start_date"] for row in rows]),
+                max([end_date] + [row["end_date"] for row in rows]),
+            )
             await self.db.commit()
             logger.info(f"Absence sync completed: {sync_result}")
 
@@ -460,6 +619,90 @@ class PayfitSyncService:
         except:
             return None
 
+    def _add_cursor_log(
+        self,
+        resource: str,
+        started_at: datetime,
+        sync_result: Dict[str, int],
+        triggered_by: str,
+        cursor: Dict[str, Any],
+    ) -> None:
+        """Log a successful resource sync, its metadata being the next cursor"""
+        completed_at = datetime.utcnow()
+        self.db.add(
+            PayfitSyncLog(
+                sync_type=resource,
+                sync_status="success",
+                started_at=started_at,
+                completed_at=completed_at,
+                duration_seconds=int((completed_at - started_at).total_seconds()),
+                records_synced=sync_result["created"] + sync_result["updated"],
+                records_created=sync_result["created"],
+                records_updated=sync_result["updated"],
+                records_unchanged=sync_result["unchanged"],
+                records_failed=sync_result["failed"],
+                triggered_by=triggered_by,
+                sync_metadata=cursor,
+            )
+        )
+
+    async def _last_sync_metadata(self, resource: str) -> Dict[str, Any]:
+        """Metadata (cursor) of the last successful sync of a resource"""
+        result = await self.db.execute(
+            select(PayfitSyncLog.sync_metadata)
+            .where(
+                PayfitSyncLog.sync_type == resource,
+                PayfitSyncLog.sync_status == "success",
+            )
+            .order_by(PayfitSyncLog.started_at.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none() or {}
+
+    async def _upsert(
+        self, model: Any, rows: List[Dict[str, Any]], result: Dict[str, int]
+    ) -> None:
+        """
+        Write rows with INSERT ... ON CONFLICT (payfit_id) DO UPDATE, in chunks
+        Rows whose source_hash did not change are left untouched. Created and
+        updated counts come from RETURNING, the rest is unchanged.
+        """
+        # A payfit_id may only appear once per statement (last one wins)
+        rows = list({row["payfit_id"]: row for row in rows}.values())
+        now = datetime.utcnow()
+
+        for start in range(0, len(rows), SYNC_CHUNK_SIZE):
+            chunk = [
+                {
+                    "id": uuid.uuid4(),
+                    **row,
+                    "source_hash": content_hash(row),
+                    "last_synced_at": now,
+                }
+                for row in rows[start : start + SYNC_CHUNK_SIZE]
+            ]
+            statement = insert(model).values(chunk)
+            statement = statement.on_conflict_do_update(
+                index_elements=[model.payfit_id],
+                set_={
+                    **{
+                        name: statement.excluded[name]
+                        for name in chunk[0]
+                        if name not in ("id", "payfit_id")
+                    },
+                    "updated_at": now,
+                },
+                where=model.source_hash.is_distinct_from(
+                    statement.excluded.source_hash
+                ),
+            ).returning(literal_column("xmax = 0").label("inserted"))
+
+            written = 0
+            for row in await self.db.execute(statement):
+                result["created" if row.inserted else "updated"] += 1
+                written += 1
+            result["unchanged"] += len(chunk) - written
+
     async def _link_employee_to_user(self, employee: PayfitEmployee):
         """Try to link Payfit employee with local user by email"""
         if not employee.email:
@@ -521,3 +764,14 @@ class PayfitSyncService:
             },
             "api_connected": await self.client.test_connection(),
         }
+
+
+def _absence_window(
+    start_date: Optional[date] = None, end_date: Optional[date] = None
+) -> Tuple[date, date]:
+    """Default absence window: 6 months before and 6 months after today"""
+    today = date.today()
+    return (
+        start_date or today - timedelta(days=180),
+        end_date or today + timedelta(days=180),
+    )
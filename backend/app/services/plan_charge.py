@@ -0,0 +1,581 @@
+"""
+Plan de charge assembly service
+Builds the monthly plan de charge grid from Gryzzly declarations and Payfit absences
+"""
+
+import json
+import logging
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.collaborator_directory import SCOPE_ACTIVE, UnifiedCollaborator
+from app.models.forecast import Forecast
+from app.models.gryzzly import GryzzlyDeclaration, GryzzlyProject
+from app.models.payfit import PayfitAbsence
+from app.services.collaborator_directory import CollaboratorDirectoryService
+from app.services.columnar import (
+    FORMAT_COLUMNAR,
+    FORMAT_NESTED,
+    encode_plan_charge_month,
+)
+from app.services.plan_charge_cache import PlanChargeCache, compute_etag
+
+logger = logging.getLogger(__name__)
+
+# Absence statuses displayed in the plan de charge
+DISPLAYED_ABSENCE_STATUSES = ["approved", "pending"]
+
+# Response modes: one dict per declaration, or hours summed per day and project
+MODE_DETAILED = "detailed"
+MODE_AGGREGATED = "aggregated"
+
+MonthKey = Tuple[int, int]
+
+# Longest range served by the streaming range endpoint
+MAX_RANGE_MONTHS = 24
+
+
+def month_bounds(year: int, month: int) -> Tuple[date, date]:
+    """Return the first and last day of a month"""
+    _, last_day = monthrange(year, month)
+    return date(year, month, 1), date(year, month, last_day)
+
+
+def shift_month(year: int, month: int, offset: int) -> MonthKey:
+    """Return the (year, month) located `offset` months away"""
+    index = year * 12 + (month - 1) + offset
+    return index // 12, index % 12 + 1
+
+
+def parse_month(value: str) -> MonthKey:
+    """Parse a YYYY-MM string into a (year, month) key"""
+    year, month = value.split("-")
+    return int(year), int(month)
+
+
+def iter_months(start: MonthKey, end: MonthKey) -> List[MonthKey]:
+    """List every (year, month) between start and end, both included"""
+    months = []
+    current = start
+    while current <= end:
+        months.append(current)
+        current = shift_month(current[0], current[1], 1)
+    return months
+
+
+class PlanChargeService:
+    """Service assembling plan de charge months for all active collaborators"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_month(
+        self,
+        year: int,
+        month: int,
+        neighbour_months: int = 0,
+        mode: str = MODE_DETAILED,
+        response_format: str = FORMAT_NESTED,
+    ) -> Dict[str, Any]:
+        """
+        Build the plan de charge for a month
+
+        When neighbour_months is set, the months before and after the requested
+        one are computed from the same queries and returned under "neighbours",
+        so the client can prefetch them for navigation.
+        The columnar format is always built from aggregated hours.
+        """
+        first_month = shift_month(year, month, -neighbour_months)
+        last_month = shift_month(year, month, neighbour_months)
+        months = iter_months(first_month, last_month)
+
+        if response_format == FORMAT_COLUMNAR:
+            built = await self.build_months(months, mode=MODE_AGGREGATED)
+            built = {
+                key: encode_plan_charge_month(value) for key, value in built.items()
+            }
+        else:
+            built = await self.build_months(months, mode=mode)
+
+        payload = built[(year, month)]
+        if neighbour_months:
+            payload["neighbours"] = [
+                built[key] for key in months if key != (year, month)
+            ]
+        return payload
+
+    async def get_month_snapshot(
+        self,
+        year: int,
+        month: int,
+        neighbour_months: int = 0,
+        mode: str = MODE_DETAILED,
+        response_format: str = FORMAT_NESTED,
+    ) -> Dict[str, str]:
+        """
+        Return the serialized plan de charge of a month with its ETag
+        Served from the materialized cache, built and stored on a miss
+        """
+        if response_format == FORMAT_COLUMNAR:
+            mode = MODE_AGGREGATED
+
+        if not settings.PLAN_CHARGE_CACHE_ENABLED:
+            payload = await self.get_month(
+                year, month, neighbour_months, mode, response_format
+            )
+            serialized = json.dumps(payload, separators=(",", ":"), default=str)
+            return {"etag": compute_etag(serialized), "payload": serialized}
+
+        range_start, _ = month_bounds(*shift_month(year, month, -neighbour_months))
+        _, range_end = month_bounds(*shift_month(year, month, neighbour_months))
+
+        return await PlanChargeCache(self.session).get_or_build(
+            year,
+            month,
+            f"format={response_format}&mode={mode}&neighbours={neighbour_months}",
+            range_start,
+            range_end,
+            lambda: self.get_month(
+                year, month, neighbour_months, mode, response_format
+            ),
+        )
+
+    async def build_months(
+        self, months: List[MonthKey], mode: str = MODE_DETAILED
+    ) -> Dict[MonthKey, Dict]:
+        """Build the plan de charge for consecutive months in a single pass"""
+        range_start, _ = month_bounds(*months[0])
+        _, range_end = month_bounds(*months[-1])
+
+        collaborators = await self._load_collaborators()
+        if mode == MODE_AGGREGATED:
+            declarations = await self._load_aggregated_hours(range_start, range_end)
+        else:
+            declarations = await self._load_declarations(range_start, range_end)
+        absences = await self._load_absences(range_start, range_end)
+
+        return {
+            key: self._assemble_month(
+                key,
+                collaborators,
+                declarations.get(key, {}),
+                absences.get(key, {}),
+                mode,
+            )
+            for key in months
+        }
+
+    async def stream_months(
+        self,
+        months: List[MonthKey],
+        mode: str = MODE_DETAILED,
+        response_format: str = FORMAT_NESTED,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield the plan de charge of consecutive months, in order, with forecasts
+
+        Declarations are read through a server-side cursor ordered by date, so a
+        month is assembled and yielded as soon as the cursor moves past it.
+        Absences and forecasts are loaded once for the whole range.
+        """
+        if response_format == FORMAT_COLUMNAR:
+            mode = MODE_AGGREGATED
+        aggregated = mode == MODE_AGGREGATED
+
+        range_start, _ = month_bounds(*months[0])
+        _, range_end = month_bounds(*months[-1])
+
+        collaborators = await self._load_collaborators()
+        absences = await self._load_absences(range_start, range_end)
+        forecasts = await self._load_forecasts(range_start, range_end)
+
+        def finish(key: MonthKey, bucket: Dict) -> Dict[str, Any]:
+            payload = self._assemble_month(
+                key,
+                collaborators,
+                bucket,
+                absences.get(key, {}),
+                mode,
+            )
+            self._attach_forecasts(payload, forecasts.get(key, []), mode)
+            if response_format == FORMAT_COLUMNAR:
+                return encode_plan_charge_month(payload)
+            return payload
+
+        if aggregated:
+            query = self._aggregated_hours_query(range_start, range_end)
+        else:
+            query = self._declarations_query(range_start, range_end)
+
+        pending = iter(months)
+        current = next(pending)
+        bucket = _new_declaration_bucket(mode)
+
+        result = await self.session.stream(query)
+        async for row in result:
+            key = (row.date.year, row.date.month)
+            while current < key:
+                yield finish(current, bucket)
+                current = next(pending)
+                bucket = _new_declaration_bucket(mode)
+            if aggregated:
+                _add_aggregated_row(bucket, row)
+            else:
+                _add_declaration_row(bucket, row)
+
+        yield finish(current, bucket)
+        for key in pending:
+            yield finish(key, _new_declaration_bucket(mode))
+
+    async def get_cell_details(
+        self, collaborator_id: str, day: date, project_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Return the declarations behind one aggregated plan de charge cell"""
+        query = (
+            select(
+                GryzzlyDeclaration.id,
+                GryzzlyDeclaration.project_id,
+                GryzzlyDeclaration.task_id,
+                GryzzlyDeclaration.duration_hours,
+                GryzzlyDeclaration.description,
+                GryzzlyDeclaration.status,
+                GryzzlyDeclaration.is_billable,
+                GryzzlyProject.name,
+                GryzzlyProject.code,
+            )
+            .outerjoin(
+                GryzzlyProject, GryzzlyDeclaration.project_id == GryzzlyProject.id
+            )
+            .where(
+                and_(
+                    GryzzlyDeclaration.collaborator_id == collaborator_id,
+                    GryzzlyDeclaration.date == day,
+                )
+            )
+        )
+        if project_id:
+            query = query.where(GryzzlyDeclaration.project_id == project_id)
+
+        result = await self.session.execute(query)
+        return [
+            {
+                "id": str(row.id),
+                "project_id": str(row.project_id),
+                "project_name": row.name or "Unknown",
+                "project_code": row.code,
+                "task_id": str(row.task_id) if row.task_id else None,
+                "hours": row.duration_hours,
+                "description": row.description,
+                "status": row.status,
+                "is_billable": row.is_billable,
+            }
+            for row in result
+        ]
+
+    async def _load_collaborators(self) -> List[UnifiedCollaborator]:
+        """Load active collaborators merged by email from the directory"""
+        return await CollaboratorDirectoryService(self.session).list_collaborators(
+            SCOPE_ACTIVE
+        )
+
+    def _declarations_query(self, start_date: date, end_date: date):
+        """Declarations of the date range with their project, ordered by date"""
+        return (
+            select(
+                GryzzlyDeclaration.collaborator_id,
+                GryzzlyDeclaration.date,
+                GryzzlyDeclaration.project_id,
+                GryzzlyDeclaration.duration_hours,
+                GryzzlyDeclaration.description,
+                GryzzlyDeclaration.status,
+                GryzzlyDeclaration.is_billable,
+                GryzzlyProject.name,
+                GryzzlyProject.code,
+            )
+            .outerjoin(
+                GryzzlyProject, GryzzlyDeclaration.project_id == GryzzlyProject.id
+            )
+            .where(
+                and_(
+                    GryzzlyDeclaration.date >= start_date,
+                    GryzzlyDeclaration.date <= end_date,
+                )
+            )
+            .order_by(GryzzlyDeclaration.date)
+        )
+
+    async def _load_declarations(
+        self, start_date: date, end_date: date
+    ) -> Dict[MonthKey, Dict[Any, Dict[str, List[Dict]]]]:
+        """
+        Load declarations for the date range and bucket them by
+        month, collaborator and date in a single pass
+        """
+        result = await self.session.execute(
+            self._declarations_query(start_date, end_date)
+        )
+
+        buckets: Dict[MonthKey, Dict[Any, Dict[str, List[Dict]]]] = defaultdict(
+            lambda: _new_declaration_bucket(MODE_DETAILED)
+        )
+        for row in result:
+            _add_declaration_row(buckets[(row.date.year, row.date.month)], row)
+
+        return buckets
+
+    def _aggregated_hours_query(self, start_date: date, end_date: date):
+        """
+        Hours summed per collaborator, day and project in Postgres, ordered by date
+        Project name and code are grouped along since they depend on the project id
+        """
+        return (
+            select(
+                GryzzlyDeclaration.collaborator_id,
+                GryzzlyDeclaration.date,
+                GryzzlyDeclaration.project_id,
+                GryzzlyProject.name,
+                GryzzlyProject.code,
+                func.sum(GryzzlyDeclaration.duration_hours).label("hours"),
+            )
+            .outerjoin(
+                GryzzlyProject, GryzzlyDeclaration.project_id == GryzzlyProject.id
+            )
+            .where(
+                and_(
+                    GryzzlyDeclaration.date >= start_date,
+                    GryzzlyDeclaration.date <= end_date,
+                )
+            )
+            .group_by(
+                GryzzlyDeclaration.collaborator_id,
+                GryzzlyDeclaration.date,
+                GryzzlyDeclaration.project_id,
+                GryzzlyProject.name,
+                GryzzlyProject.code,
+            )
+            .order_by(GryzzlyDeclaration.date)
+        )
+
+    async def _load_aggregated_hours(
+        self, start_date: date, end_date: date
+    ) -> Dict[MonthKey, Dict[str, Any]]:
+        """
+        Sum declared hours per collaborator, day and project in Postgres
+        Each month gets its own project table; hours are [day, project index, hours]
+        """
+        result = await self.session.execute(
+            self._aggregated_hours_query(start_date, end_date)
+        )
+
+        buckets: Dict[MonthKey, Dict[str, Any]] = defaultdict(
+            lambda: _new_declaration_bucket(MODE_AGGREGATED)
+        )
+        for row in result:
+            _add_aggregated_row(buckets[(row.date.year, row.date.month)], row)
+
+        return buckets
+
+    async def _load_forecasts(
+        self, start_date: date, end_date: date
+    ) -> Dict[MonthKey, List[Any]]:
+        """Load forecasts of the date range with their project, bucketed by month"""
+        query = (
+            select(
+                Forecast.id,
+                Forecast.collaborator_id,
+                Forecast.date,
+                Forecast.project_id,
+                Forecast.task_id,
+                Forecast.hours,
+                GryzzlyProject.name,
+                GryzzlyProject.code,
+            )
+            .outerjoin(GryzzlyProject, Forecast.project_id == GryzzlyProject.id)
+            .where(and_(Forecast.date >= start_date, Forecast.date <= end_date))
+            .order_by(Forecast.date)
+        )
+        result = await self.session.execute(query)
+
+        buckets: Dict[MonthKey, List[Any]] = defaultdict(list)
+        for row in result:
+            buckets[(row.date.year, row.date.month)].append(row)
+        return buckets
+
+    async def _load_absences(
+        self, start_date: date, end_date: date
+    ) -> Dict[MonthKey, Dict[str, List[Dict]]]:
+        """
+        Load absences overlapping the date range and bucket them by
+        month and Payfit employee, clipped to each month they cover
+        """
+        query = select(PayfitAbsence).where(
+            and_(
+                PayfitAbsence.start_date <= end_date,
+                PayfitAbsence.end_date >= start_date,
+                PayfitAbsence.status.in_(DISPLAYED_ABSENCE_STATUSES),
+            )
+        )
+        result = await self.session.execute(query)
+
+        buckets: Dict[MonthKey, Dict[str, List[Dict]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+        for absence in result.scalars().all():
+            first = max(absence.start_date, start_date)
+            last = min(absence.end_date, end_date)
+            for key in iter_months((first.year, first.month), (last.year, last.month)):
+                month_start, month_end = month_bounds(*key)
+                buckets[key][absence.payfit_employee_id].append(
+                    {
+                        "type": absence.absence_type,
+                        "start_date": max(absence.start_date, month_start).isoformat(),
+                        "end_date": min(absence.end_date, month_end).isoformat(),
+                        "duration_days": absence.duration_days,
+                        "status": absence.status,
+                    }
+                )
+
+        return buckets
+
+    def _attach_forecasts(
+        self, payload: Dict[str, Any], forecasts: List[Any], mode: str
+    ) -> None:
+        """
+        Add each collaborator's forecasts to an assembled month
+        Aggregated months get [day, project index, hours] in `forecast_hours`,
+        extending the month's project table when needed
+        """
+        aggregated = mode == MODE_AGGREGATED
+        by_collaborator: Dict[str, Any] = defaultdict(
+            lambda: [] if aggregated else defaultdict(list)
+        )
+
+        if aggregated:
+            project_index = {
+                project[0]: index for index, project in enumerate(payload["projects"])
+            }
+            summed: Dict[Tuple[str, int, int], float] = defaultdict(float)
+            for row in forecasts:
+                project_id = str(row.project_id)
+                if project_id not in project_index:
+                    project_index[project_id] = len(payload["projects"])
+                    payload["projects"].append(
+                        [project_id, row.name or "Unknown", row.code]
+                    )
+                summed[
+                    (str(row.collaborator_id), row.date.day, project_index[project_id])
+                ] += row.hours
+            for (collaborator_id, day, index), hours in summed.items():
+                by_collaborator[collaborator_id].append([day, index, hours])
+        else:
+            for row in forecasts:
+                by_collaborator[str(row.collaborator_id)][row.date.isoformat()].append(
+                    {
+                        "id": str(row.id),
+                        "project_id": str(row.project_id),
+                        "project_name": row.name or "Unknown",
+                        "project_code": row.code,
+                        "task_id": str(row.task_id) if row.task_id else None,
+                        "hours": row.hours,
+                    }
+                )
+
+        field = "forecast_hours" if aggregated else "forecasts"
+        for entry in payload["collaborators"]:
+            found = by_collaborator.get(entry["collaborator_id"])
+            if aggregated:
+                entry[field] = found or []
+            else:
+                entry[field] = dict(found) if found else {}
+
+    def _assemble_month(
+        self,
+        key: MonthKey,
+        collaborators: List[UnifiedCollaborator],
+        declarations: Dict[Any, Any],
+        absences: Dict[str, List[Dict]],
+        mode: str = MODE_DETAILED,
+    ) -> Dict[str, Any]:
+        """Assemble the response for one month from pre-bucketed data"""
+        month_start, month_end = month_bounds(*key)
+        plan_charge_data = []
+
+        aggregated = mode == MODE_AGGREGATED
+        if aggregated:
+            hours = declarations.get("hours", {})
+
+        # Payfit-only employees have no Gryzzly declarations
+        for collab in collaborators:
+            plan_charge_data.append(
+                {
+                    "collaborator_id": collab.collaborator_key,
+                    "name": collab.name,
+                    "email": collab.email,
+                    "matricule": collab.matricule,
+                    "gryzzly_id": collab.gryzzly_id,
+                    "payfit_id": collab.payfit_id,
+                    "absences": absences.get(collab.payfit_id, []),
+                }
+            )
+            if aggregated:
+                plan_charge_data[-1]["hours"] = hours.get(
+                    collab.gryzzly_collaborator_id, []
+                )
+            else:
+                plan_charge_data[-1]["declarations"] = dict(
+                    declarations.get(collab.gryzzly_collaborator_id, {})
+                )
+
+        payload = {
+            "year": key[0],
+            "month": key[1],
+            "start_date": month_start.isoformat(),
+            "end_date": month_end.isoformat(),
+            "collaborators": plan_charge_data,
+        }
+        if aggregated:
+            payload["mode"] = MODE_AGGREGATED
+            payload["projects"] = declarations.get("projects", [])
+        return payload
+
+
+def _new_declaration_bucket(mode: str) -> Dict[Any, Any]:
+    """Empty per-month declaration bucket for the given mode"""
+    if mode == MODE_AGGREGATED:
+        return {"projects": [], "project_index": {}, "hours": defaultdict(list)}
+    return defaultdict(lambda: defaultdict(list))
+
+
+def _add_declaration_row(bucket: Dict[Any, Any], row: Any) -> None:
+    """Add a declaration row to a detailed month bucket"""
+    bucket[row.collaborator_id][row.date.isoformat()].append(
+        {
+            "project_id": str(row.project_id),
+            "project_name": row.name or "Unknown",
+            "project_code": row.code,
+            "hours": row.duration_hours,
+            "description": row.description,
+            "status": row.status,
+            "is_billable": row.is_billable,
+        }
+    )
+
+
+def _add_aggregated_row(bucket: Dict[str, Any], row: Any) -> None:
+    """Add a summed (collaborator, day, project) row to an aggregated month bucket"""
+    project_index = bucket["project_index"].get(row.project_id)
+    if project_index is None:
+        project_index = len(bucket["projects"])
+        bucket["project_index"][row.project_id] = project_index
+        bucket["projects"].append(
+            [str(row.project_id), row.name or "Unknown", row.code]
+        )
+    bucket["hours"][row.collaborator_id].append(
+        [row.date.day, project_index, row.hours]
+    )
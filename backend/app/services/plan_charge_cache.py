@@ -0,0 +1,181 @@
+"""
+Materialized plan de charge cache
+Stores serialized plan de charge months so unchanged months are served without
+being rebuilt, and drops them when the underlying data changes
+"""
+
+import hashlib
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import and_, delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.plan_charge import PlanChargeCacheState, PlanChargeSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+def compute_etag(payload: str) -> str:
+    """Build a strong entity tag from a serialized payload"""
+    return '"' + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an entity tag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        # Weak comparison is enough for GET revalidation
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class PlanChargeCache:
+    """Per-(year, month, variant) plan de charge snapshots stored in the database"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(
+        self, year: int, month: int, variant: str = "default"
+    ) -> Optional[PlanChargeSnapshot]:
+        """Return the stored snapshot for a month and variant, if any"""
+        result = await self.session.execute(
+            select(PlanChargeSnapshot).where(
+                and_(
+                    PlanChargeSnapshot.year == year,
+                    PlanChargeSnapshot.month == month,
+                    PlanChargeSnapshot.variant == variant,
+                )
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def store(
+        self,
+        year: int,
+        month: int,
+        variant: str,
+        range_start: date,
+        range_end: date,
+        payload: Dict[str, Any],
+        generation: Optional[int] = None,
+    ) -> Dict[str, str]:
+        """
+        Serialize and store a snapshot, replacing any previous one
+        With the cache generation read before building the payload, the
+        snapshot is only stored if no invalidation happened since.
+        """
+        serialized = json.dumps(payload, separators=(",", ":"), default=str)
+        etag = compute_etag(serialized)
+
+        if generation is not None:
+            # FOR SHARE waits for an invalidation still in flight
+            current = await self._generation(lock=True)
+            if current != generation:
+                logger.debug(
+                    f"Plan charge snapshot {year}-{month:02d} ({variant}) not "
+                    "stored: invalidated while building"
+                )
+                await self.session.commit()
+                return {"etag": etag, "payload": serialized}
+
+        stmt = insert(PlanChargeSnapshot).values(
+            year=year,
+            month=month,
+            variant=variant,
+            range_start=range_start,
+            range_end=range_end,
+            etag=etag,
+            payload=serialized,
+            generated_at=datetime.utcnow(),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["year", "month", "variant"],
+            set_={
+                "range_start": stmt.excluded.range_start,
+                "range_end": stmt.excluded.range_end,
+                "etag": stmt.excluded.etag,
+                "payload": stmt.excluded.payload,
+                "generated_at": stmt.excluded.generated_at,
+            },
+        )
+        await self.session.execute(stmt)
+        await self.session.commit()
+
+        return {"etag": etag, "payload": serialized}
+
+    async def get_or_build(
+        self,
+        year: int,
+        month: int,
+        variant: str,
+        range_start: date,
+        range_end: date,
+        builder: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, str]:
+        """Return the cached snapshot, building and storing it on a miss"""
+        snapshot = await self.get(year, month, variant)
+        if snapshot:
+            return {"etag": snapshot.etag, "payload": snapshot.payload}
+
+        logger.debug(f"Plan charge cache miss for {year}-{month:02d} ({variant})")
+        generation = await self._generation()
+        payload = await builder()
+        return await self.store(
+            year, month, variant, range_start, range_end, payload, generation
+        )
+
+    async def invalidate(
+        self, start_date: Optional[date] = None, end_date: Optional[date] = None
+    ) -> int:
+        """
+        Drop snapshots whose covered dates overlap [start_date, end_date]
+        Drops every snapshot when no bound is given.
+        Does not commit: callers invalidate inside the transaction that changes data.
+        """
+        # Bump the generation first, so snapshots being built from the old data
+        # are not stored, and lock it before the snapshot rows
+        now = datetime.utcnow()
+        bump = insert(PlanChargeCacheState).values(
+            id=1, generation=1, invalidated_at=now
+        )
+        bump = bump.on_conflict_do_update(
+            index_elements=["id"],
+            set_={
+                "generation": PlanChargeCacheState.generation + 1,
+                "invalidated_at": now,
+            },
+        )
+        await self.session.execute(bump)
+
+        stmt = delete(PlanChargeSnapshot)
+        if start_date:
+            stmt = stmt.where(PlanChargeSnapshot.range_end >= start_date)
+        if end_date:
+            stmt = stmt.where(PlanChargeSnapshot.range_start <= end_date)
+
+        result = await self.session.execute(stmt)
+        if result.rowcount:
+            logger.info(f"Invalidated {result.rowcount} plan charge snapshots")
+        return result.rowcount or 0
+
+    async def _generation(self, lock: bool = False) -> int:
+        """Current cache generation (0 before any invalidation)"""
+        stmt = select(PlanChargeCacheState.generation).where(
+            PlanChargeCacheState.id == 1
+        )
+        if lock:
+            stmt = stmt.with_for_update(read=True)
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none() or 0
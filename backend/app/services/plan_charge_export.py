@@ -0,0 +1,337 @@
+"""
+Plan de charge spreadsheet export
+Streams declarations, forecasts and absences per collaborator and day as CSV or
+XLSX, reading the database through server-side cursors
+"""
+
+import asyncio
+import csv
+import io
+import logging
+import os
+import tempfile
+from datetime import date, timedelta
+from typing import Any, AsyncIterator, Iterable, List, Tuple
+
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.collaborator_directory import SCOPE_ALL, UnifiedCollaborator
+from app.models.forecast import Forecast
+from app.models.gryzzly import GryzzlyDeclaration, GryzzlyProject, GryzzlyTask
+from app.models.payfit import PayfitAbsence
+from app.services.forecast import working_days
+from app.services.plan_charge import DISPLAYED_ABSENCE_STATUSES
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # pragma: no cover - optional dependency
+    Workbook = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CSV = "csv"
+EXPORT_XLSX = "xlsx"
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Rows fetched per round trip from the server-side cursors
+EXPORT_BATCH_SIZE = 2000
+# Bytes per chunk when sending the finished XLSX file
+XLSX_CHUNK_SIZE = 64 * 1024
+
+COLUMNS = [
+    "Type",
+    "Date",
+    "Collaborateur",
+    "Email",
+    "Matricule",
+    "Projet",
+    "Code projet",
+    "Tâche",
+    "Heures",
+    "Absence",
+    "Statut",
+    "Description",
+]
+
+# One XLSX sheet per row type
+SHEETS = [
+    ("declaration", "Déclarations"),
+    ("forecast", "Prévisionnel"),
+    ("absence", "Absences"),
+]
+
+
+def xlsx_available() -> bool:
+    """Check whether the optional openpyxl dependency is installed"""
+    return Workbook is not None
+
+
+class PlanChargeExporter:
+    """Export the plan de charge of a date range, one row per collaborator/day/item"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def iter_rows(
+        self, start_date: date, end_date: date
+    ) -> AsyncIterator[Tuple[str, List[List[Any]]]]:
+        """
+        Yield (row type, rows) batches: declarations, then forecasts, then
+        absences, each ordered by collaborator and date
+        """
+        async for rows in self._declaration_rows(start_date, end_date):
+            yield "declaration", rows
+        async for rows in self._forecast_rows(start_date, end_date):
+            yield "forecast", rows
+        async for rows in self._absence_rows(start_date, end_date):
+            yield "absence", rows
+
+    async def stream_csv(self, start_date: date, end_date: date) -> AsyncIterator[str]:
+        """Stream a semicolon separated CSV, one chunk per fetched batch"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=";", lineterminator="\n")
+
+        # BOM so that Excel detects UTF-8
+        buffer.write("\ufeff")
+        writer.writerow(COLUMNS)
+        yield _drain(buffer)
+
+        async for _, rows in self.iter_rows(start_date, end_date):
+            writer.writerows(rows)
+            yield _drain(buffer)
+
+    async def stream_xlsx(
+        self, start_date: date, end_date: date
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream an XLSX workbook with one sheet per row type
+
+        Rows go through an openpyxl write-only workbook, which spools them to
+        temporary files instead of memory. The zip container can only be
+        written once complete, so the file is sent in chunks after that.
+        """
+        workbook = Workbook(write_only=True)
+        sheets = {}
+        for row_type, title in SHEETS:
+            sheets[row_type] = workbook.create_sheet(title=title)
+            sheets[row_type].append(COLUMNS)
+
+        async for row_type, rows in self.iter_rows(start_date, end_date):
+            sheet = sheets[row_type]
+            for row in rows:
+                sheet.append(row)
+
+        handle, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(handle)
+        try:
+            await asyncio.to_thread(workbook.save, path)
+            with open(path, "rb") as output:
+                while True:
+                    chunk = await asyncio.to_thread(output.read, XLSX_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            os.remove(path)
+
+    async def _declaration_rows(
+        self, start_date: date, end_date: date
+    ) -> AsyncIterator[List[List[Any]]]:
+        """Declarations of the range with collaborator, project and task names"""
+        query = (
+            select(
+                GryzzlyDeclaration.date,
+                GryzzlyDeclaration.duration_hours,
+                GryzzlyDeclaration.duration_minutes,
+                GryzzlyDeclaration.status,
+                GryzzlyDeclaration.description,
+                UnifiedCollaborator.name.label("collaborator_name"),
+                UnifiedCollaborator.email,
+                UnifiedCollaborator.matricule,
+                GryzzlyProject.name.label("project_name"),
+                GryzzlyProject.code.label("project_code"),
+                GryzzlyTask.name.label("task_name"),
+            )
+            .outerjoin(
+                UnifiedCollaborator,
+                and_(
+                    UnifiedCollaborator.gryzzly_collaborator_id
+                    == GryzzlyDeclaration.collaborator_id,
+                    UnifiedCollaborator.scope == SCOPE_ALL,
+                ),
+            )
+            .outerjoin(
+                GryzzlyProject, GryzzlyDeclaration.project_id == GryzzlyProject.id
+            )
+            .outerjoin(GryzzlyTask, GryzzlyDeclaration.task_id == GryzzlyTask.id)
+            .where(
+                and_(
+                    GryzzlyDeclaration.date >= start_date,
+                    GryzzlyDeclaration.date <= end_date,
+                )
+            )
+            .order_by(
+                UnifiedCollaborator.sort_name,
+                GryzzlyDeclaration.collaborator_id,
+                GryzzlyDeclaration.date,
+            )
+        )
+
+        async for partition in self._partitions(query):
+            yield [
+                [
+                    "declaration",
+                    row.date,
+                    row.collaborator_name,
+                    row.email,
+                    row.matricule,
+                    row.project_name,
+                    row.project_code,
+                    row.task_name,
+                    round(
+                        (row.duration_hours or 0) + (row.duration_minutes or 0) / 60, 2
+                    ),
+                    None,
+                    row.status,
+                    row.description,
+                ]
+                for row in partition
+            ]
+
+    async def _forecast_rows(
+        self, start_date: date, end_date: date
+    ) -> AsyncIterator[List[List[Any]]]:
+        """Forecasts of the range with collaborator, project and task names"""
+        query = (
+            select(
+                Forecast.date,
+                Forecast.hours,
+                Forecast.description,
+                UnifiedCollaborator.name.label("collaborator_name"),
+                UnifiedCollaborator.email,
+                UnifiedCollaborator.matricule,
+                GryzzlyProject.name.label("project_name"),
+                GryzzlyProject.code.label("project_code"),
+                GryzzlyTask.name.label("task_name"),
+            )
+            .outerjoin(
+                UnifiedCollaborator,
+                and_(
+                    UnifiedCollaborator.gryzzly_collaborator_id
+                    == Forecast.collaborator_id,
+                    UnifiedCollaborator.scope == SCOPE_ALL,
+                ),
+            )
+            .outerjoin(GryzzlyProject, Forecast.project_id == GryzzlyProject.id)
+            .outerjoin(GryzzlyTask, Forecast.task_id == GryzzlyTask.id)
+            .where(and_(Forecast.date >= start_date, Forecast.date <= end_date))
+            .order_by(
+                UnifiedCollaborator.sort_name, Forecast.collaborator_id, Forecast.date
+            )
+        )
+
+        async for partition in self._partitions(query):
+            yield [
+                [
+                    "forecast",
+                    row.date,
+                    row.collaborator_name,
+                    row.email,
+                    row.matricule,
+                    row.project_name,
+                    row.project_code,
+                    row.task_name,
+                    row.hours,
+                    None,
+                    None,
+                    row.description,
+                ]
+                for row in partition
+            ]
+
+    async def _absence_rows(
+        self, start_date: date, end_date: date
+    ) -> AsyncIterator[List[List[Any]]]:
+        """Absences overlapping the range, expanded to one row per working day"""
+        open_days = set(working_days(start_date, end_date))
+        query = (
+            select(
+                PayfitAbsence.start_date,
+                PayfitAbsence.end_date,
+                PayfitAbsence.absence_type,
+                PayfitAbsence.status,
+                PayfitAbsence.comment,
+                UnifiedCollaborator.name.label("collaborator_name"),
+                UnifiedCollaborator.email,
+                UnifiedCollaborator.matricule,
+            )
+            .outerjoin(
+                UnifiedCollaborator,
+                and_(
+                    UnifiedCollaborator.payfit_id == PayfitAbsence.payfit_employee_id,
+                    UnifiedCollaborator.scope == SCOPE_ALL,
+                ),
+            )
+            .where(
+                and_(
+                    PayfitAbsence.start_date <= end_date,
+                    PayfitAbsence.end_date >= start_date,
+                    PayfitAbsence.status.in_(DISPLAYED_ABSENCE_STATUSES),
+                )
+            )
+            .order_by(
+                UnifiedCollaborator.sort_name,
+                PayfitAbsence.payfit_employee_id,
+                PayfitAbsence.start_date,
+            )
+        )
+
+        async for partition in self._partitions(query):
+            rows = []
+            for row in partition:
+                for day in _days(
+                    max(row.start_date, start_date), min(row.end_date, end_date)
+                ):
+                    if day not in open_days:
+                        continue
+                    rows.append(
+                        [
+                            "absence",
+                            day,
+                            row.collaborator_name,
+                            row.email,
+                            row.matricule,
+                            None,
+                            None,
+                            None,
+                            None,
+                            row.absence_type,
+                            row.status,
+                            row.comment,
+                        ]
+                    )
+            yield rows
+
+    async def _partitions(self, query) -> AsyncIterator[Iterable[Any]]:
+        """Run a query through a server-side cursor, EXPORT_BATCH_SIZE rows at a time"""
+        result = await self.session.stream(
+            query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for partition in result.partitions():
+            yield partition
+
+
+def _days(start_date: date, end_date: date) -> Iterable[date]:
+    """Every day from start_date to end_date, both included"""
+    for offset in range((end_date - start_date).days + 1):
+        yield start_date + timedelta(days=offset)
+
+
+def _drain(buffer: io.StringIO) -> str:
+    """Return and clear the content of a text buffer"""
+    content = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+    return content
@@ -0,0 +1,246 @@
+"""
+Sync orchestration
+Runs sync stages as a dependency graph: every API fetch starts at once, while
+DB writes run one at a time, each once its own fetch and the writes it depends
+on are done
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Stage statuses
+STAGE_PENDING = "pending"
+STAGE_SUCCESS = "success"
+STAGE_FAILED = "failed"
+STAGE_SKIPPED = "skipped"  # a stage it depends on failed
+
+# Counters reported by every sync stage
+SYNC_COUNTERS = ("created", "updated", "unchanged", "failed")
+
+
+class SyncStage:
+    """
+    One sync step: an optional API fetch, which must not touch the database,
+    and a write of the fetched data (None without fetch) returning counters
+    """
+
+    def __init__(
+        self,
+        name: str,
+        write: Callable[[Any], Awaitable[Dict[str, Any]]],
+        fetch: Optional[Callable[[], Awaitable[Any]]] = None,
+        after: Iterable[str] = (),
+    ):
+        self.name = name
+        self.write = write
+        self.fetch = fetch
+        self.after = tuple(after)
+
+
+def shared_fetch(fetch: Callable[[], Awaitable[Any]]) -> Callable[[], Awaitable[Any]]:
+    """
+    Wrap a fetch so the stages calling it share one request: the first call
+    starts it, every call awaits the same result. Cancelling one caller (a
+    skipped stage) leaves the request running for the others.
+    """
+    pending: List["asyncio.Future[Any]"] = []
+
+    async def shared() -> Any:
+        if not pending:
+            pending.append(asyncio.ensure_future(fetch()))
+        return await asyncio.shield(pending[0])
+
+    return shared
+
+
+class SyncOrchestrator:
+    """Run sync stages concurrently where their dependencies allow it"""
+
+    def __init__(self, session: AsyncSession, stages: List[SyncStage]):
+        self.session = session
+        self.stages = stages
+        self._check_graph()
+
+    async def run(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Run every stage and report, per stage name, its status, result or
+        error, and fetch/write durations in seconds
+
+        A failed stage skips the stages depending on it; independent stages go
+        on. Writes share the session, so they never overlap.
+        """
+        reports = {stage.name: {"status": STAGE_PENDING} for stage in self.stages}
+        fetches = {
+            stage.name: asyncio.ensure_future(self._fetch(stage, reports[stage.name]))
+            for stage in self.stages
+        }
+        pending = list(self.stages)
+
+        try:
+            while pending:
+                for stage in list(pending):
+                    if any(
+                        reports[dependency]["status"] in (STAGE_FAILED, STAGE_SKIPPED)
+                        for dependency in stage.after
+                    ):
+                        logger.warning(f"Sync stage {stage.name} skipped")
+                        reports[stage.name]["status"] = STAGE_SKIPPED
+                        fetches[stage.name].cancel()
+                        pending.remove(stage)
+
+                ready = [
+                    stage
+                    for stage in pending
+                    if all(
+                        reports[dependency]["status"] == STAGE_SUCCESS
+                        for dependency in stage.after
+                    )
+                ]
+                if not ready:
+                    break
+
+                # Write the first ready stage whose data arrived, in declaration
+                # order, or wait for one
+                stage = next((s for s in ready if fetches[s.name].done()), None)
+                if stage is None:
+                    await asyncio.wait(
+                        [fetches[s.name] for s in ready],
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    continue
+
+                pending.remove(stage)
+                await self._write(stage, fetches[stage.name], reports[stage.name])
+        finally:
+            for fetch in fetches.values():
+                if not fetch.done():
+                    fetch.cancel()
+                elif not fetch.cancelled():
+                    # Mark errors of fetches never written as retrieved
+                    fetch.exception()
+
+        return reports
+
+    async def _fetch(self, stage: SyncStage, report: Dict[str, Any]) -> Any:
+        """Run the fetch of a stage, timing it"""
+        if stage.fetch is None:
+            return None
+
+        started = time.monotonic()
+        try:
+            return await stage.fetch()
+        finally:
+            report["fetch_seconds"] = round(time.monotonic() - started, 3)
+
+    async def _write(
+        self, stage: SyncStage, fetch: "asyncio.Future[Any]", report: Dict[str, Any]
+    ) -> None:
+        """Write the fetched data of a stage, recording its outcome"""
+        started = time.monotonic()
+        try:
+            report["result"] = await stage.write(await fetch)
+            report["status"] = STAGE_SUCCESS
+        except Exception as e:
+            logger.error(f"Sync stage {stage.name} failed: {str(e)}")
+            await self.session.rollback()
+            report["status"] = STAGE_FAILED
+            report["error"] = str(e)
+        finally:
+            report["write_seconds"] = round(time.monotonic() - started, 3)
+
+    def _check_graph(self) -> None:
+        """Refuse unknown dependencies and cycles"""
+        names = [stage.name for stage in self.stages]
+        if len(set(names)) != len(names):
+            raise ValueError("Sync stage names must be unique")
+
+        dependencies = {stage.name: set(stage.after) for stage in self.stages}
+        for stage in self.stages:
+            unknown = dependencies[stage.name] - set(names)
+            if unknown:
+                raise ValueError(f"Sync stage {stage.name} depends on {unknown}")
+
+        resolved = set()
+        while len(resolved) < len(names):
+            layer = {
+                name
+                for name in names
+                if name not in resolved and dependencies[name] <= resolved
+            }
+            if not layer:
+                raise ValueError("Sync stages have a dependency cycle")
+            resolved |= layer
+
+
+async def record_stages(
+    session: AsyncSession,
+    sync_log: Any,
+    reports: Dict[str, Dict[str, Any]],
+    keys: Dict[str, str],
+) -> Dict[str, Any]:
+    """
+    Fill a Gryzzly or Payfit sync log from stage reports and return the sync
+    results, keyed by `keys` (stage name -> result key); stages left out of
+    the run report zero counters
+    """
+    # A failed write rolled back the session, expiring the committed log
+    await session.refresh(sync_log)
+
+    results = {"errors": []}
+    totals = dict.fromkeys(SYNC_COUNTERS, 0)
+    statuses = []
+
+    for name, key in keys.items():
+        report = reports.get(name)
+        if report is None:
+            # Stage not planned for this run
+            results[key] = dict.fromkeys(SYNC_COUNTERS, 0)
+            continue
+        statuses.append(report["status"])
+        result = report.get("result") or dict.fromkeys(SYNC_COUNTERS, 0)
+        results[key] = result
+        for counter in SYNC_COUNTERS:
+            totals[counter] += result.get(counter, 0)
+        if report["status"] == STAGE_FAILED:
+            results["errors"].append(f"{key}: {report['error']}")
+        elif report["status"] == STAGE_SKIPPED:
+            results["errors"].append(f"{key}: skipped")
+
+    if all(status == STAGE_SUCCESS for status in statuses):
+        sync_log.sync_status = "success"
+    elif STAGE_SUCCESS in statuses:
+        sync_log.sync_status = "partial"
+    else:
+        sync_log.sync_status = "failed"
+
+    sync_log.completed_at = datetime.utcnow()
+    sync_log.duration_seconds = int(
+        (sync_log.completed_at - sync_log.started_at).total_seconds()
+    )
+    sync_log.records_synced = totals["created"] + totals["updated"]
+    sync_log.records_created = totals["created"]
+    sync_log.records_updated = totals["updated"]
+    sync_log.records_unchanged = totals["unchanged"]
+    sync_log.records_failed = totals["failed"]
+    if results["errors"]:
+        sync_log.error_message = "; ".join(results["errors"])
+    sync_log.sync_metadata = {
+        "stages": {
+            key: {
+                "status": reports[name]["status"],
+                "fetch_seconds": reports[name].get("fetch_seconds"),
+                "write_seconds": reports[name].get("write_seconds"),
+            }
+            for name, key in keys.items()
+            if name in reports
+        }
+    }
+
+    return results
@@ -12,8 +12,13 @@ import holidays
 from sqlalchemy import and_, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models.collaborator_directory import SCOPE_ALL, UnifiedCollaborator
 from app.models.gryzzly import GryzzlyCollaborator
 from app.models.payfit import PayfitAbsence, PayfitEmployee
+from app.services.collaborator_directory import (
+    CollaboratorDirectoryService,
+    tr_rights_eligibility,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -199,82 +204,26 @@ class TRService:
         Calculate TR rights for all employees eligible for TR
         Determines eligibility based on active Payfit contracts and manual overrides
         """
-        # Import necessary models
-        from sqlalchemy.orm import selectinload
-
-        from app.models.payfit import PayfitContract
-        from app.models.tr_eligibility import TREligibilityOverride
-
-        # Get all active Gryzzly collaborators with matricule
-        collaborators_query = select(GryzzlyCollaborator).where(
-            and_(
-                GryzzlyCollaborator.matricule.isnot(None),
-                GryzzlyCollaborator.is_active == True,
-            )
-        )
-        collaborators_result = await self.session.execute(collaborators_query)
-        gryzzly_collabs = collaborators_result.scalars().all()
-
-        # Get all Payfit employees with their contracts
-        payfit_query = select(PayfitEmployee).options(
-            selectinload(PayfitEmployee.contracts)
+        # Active Gryzzly collaborators with a matricule, merged with Payfit
+        directory = CollaboratorDirectoryService(self.session)
+        rows = await directory.list_collaborators(
+            SCOPE_ALL,
+            UnifiedCollaborator.gryzzly_collaborator_id.isnot(None),
+            UnifiedCollaborator.matricule.isnot(None),
+            UnifiedCollaborator.is_active == True,
+            tr_rights_eligibility == True,
         )
-        payfit_result = await self.session.execute(payfit_query)
-        payfit_employees = payfit_result.scalars().all()
-
-        # Create a map of Payfit employees by email
-        payfit_map = {}
-        for emp in payfit_employees:
-            if emp.email:
-                email_lower = emp.email.lower()
-                # Keep the most recently created employee record if duplicates
-                if email_lower not in payfit_map:
-                    payfit_map[email_lower] = emp
-                elif emp.created_at and payfit_map[email_lower].created_at:
-                    if emp.created_at > payfit_map[email_lower].created_at:
-                        payfit_map[email_lower] = emp
-
-        # Get all TR eligibility overrides
-        overrides_result = await self.session.execute(select(TREligibilityOverride))
-        overrides = overrides_result.scalars().all()
-        overrides_by_email = {
-            override.email.lower(): override for override in overrides
-        }
-
-        # Build list of eligible collaborators
-        eligible_collaborators = []
-        for collab in gryzzly_collabs:
-            if not collab.email:
-                continue
 
-            email_lower = collab.email.lower()
-
-            # Check for manual override first
-            override = overrides_by_email.get(email_lower)
-            if override:
-                eligible_tr = override.is_eligible
-            else:
-                # Check if there's an active Payfit contract
-                eligible_tr = False
-                payfit_emp = payfit_map.get(email_lower)
-                if payfit_emp and payfit_emp.contracts:
-                    # Check if there's at least one active contract
-                    active_contracts = [c for c in payfit_emp.contracts if c.is_active]
-                    eligible_tr = len(active_contracts) > 0
-                else:
-                    # If no Payfit data, default to eligible for active Gryzzly collaborators
-                    eligible_tr = True
-
-            if eligible_tr:
-                eligible_collaborators.append(
-                    {
-                        "email": collab.email,
-                        "matricule": collab.matricule,
-                        "actif": collab.is_active,
-                        "eligibleTR": eligible_tr,
-                        "nom": f"{collab.first_name or ''} {collab.last_name or ''}".strip(),
-                    }
-                )
+        eligible_collaborators = [
+            {
+                "email": row.email,
+                "matricule": row.matricule,
+                "actif": row.is_active,
+                "eligibleTR": True,
+                "nom": f"{row.first_name or ''} {row.last_name or ''}".strip(),
+            }
+            for row in rows
+        ]
 
         logger.info(
             f"Found {len(eligible_collaborators)} eligible collaborators for TR rights calculation"
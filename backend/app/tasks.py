@@ -5,11 +5,15 @@ NOTE: Most async tasks are placeholders for future implementation.
 See tasks_future.py.example for detailed implementation plans.
 """
 
+import asyncio
 from typing import Any
 
 from celery import Celery
 
 from app.config import settings
+from app.database import AsyncSessionLocal, async_engine
+from app.services.external_sync import sync_external_data as run_external_sync
+from app.services.http_client import close_http_client
 
 # Create Celery app
 celery_app = Celery(
@@ -35,16 +39,27 @@ celery_app.conf.beat_schedule = {}
 
 
 # Active tasks (currently implemented)
-# None at the moment - all tasks are placeholders
-
-# Placeholder tasks - return success for compatibility
-# These will be implemented when needed (see tasks_future.py.example)
 
 
 @celery_app.task(name="app.tasks.sync_external_data")
-def sync_external_data() -> dict[str, str]:
-    """Placeholder for external data sync. See tasks_future.py.example for implementation plan."""
-    return {"status": "skipped", "message": "Task not yet implemented"}
+def sync_external_data() -> dict[str, Any]:
+    """Sync Gryzzly and Payfit data in one orchestrated run."""
+    return asyncio.run(_sync_external_data())
+
+
+async def _sync_external_data() -> dict[str, Any]:
+    try:
+        async with AsyncSessionLocal() as session:
+            results = await run_external_sync(session, triggered_by="celery")
+    finally:
+        # Pooled connections belong to this task's event loop
+        await close_http_client()
+        await async_engine.dispose()
+    return {"status": "completed", "results": results}
+
+
+# Placeholder tasks - return success for compatibility
+# These will be implemented when needed (see tasks_future.py.example)
 
 
 @celery_app.task(name="app.tasks.calculate_utilization")
@@ -0,0 +1,67 @@
+"""Response encoding negotiation utilities."""
+
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """
+    Check whether the client asks for MessagePack and it is available.
+
+    MessagePack must be listed explicitly with a non-zero quality, and at least
+    as preferred as JSON; wildcards keep the JSON default.
+    """
+    if msgpack is None or not accept:
+        return False
+    qualities = _media_qualities(accept)
+    msgpack_quality = max(qualities.get(t, 0.0) for t in MSGPACK_MEDIA_TYPES)
+    json_quality = max(
+        qualities.get(t, 0.0) for t in ("application/json", "application/*", "*/*")
+    )
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+
+def _media_qualities(accept: str) -> Dict[str, float]:
+    """Quality of each media range of an Accept header (highest if repeated)."""
+    qualities: Dict[str, float] = {}
+    for media_range in accept.split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, param_value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = min(max(float(param_value), 0.0), 1.0)
+                except ValueError:
+                    quality = 0.0
+        media_type = media_type.lower()
+        qualities[media_type] = max(qualities.get(media_type, 0.0), quality)
+    return qualities
+
+
+def json_to_msgpack(payload: str) -> bytes:
+    """Re-encode a serialized JSON document as MessagePack."""
+    return msgpack.packb(json.loads(payload), use_bin_type=True)
+
+
+def msgpack_response(
+    data: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Build a MessagePack response from JSON-compatible data."""
+    return Response(
+        content=msgpack.packb(data, use_bin_type=True, default=str),
+        status_code=status_code,
+        media_type=MSGPACK_MEDIA_TYPES[0],
+        headers=headers,
+    )
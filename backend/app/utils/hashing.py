@@ -0,0 +1,11 @@
+"""Content hashing utilities."""
+
+import hashlib
+import json
+from typing import Any, Dict
+
+
+def content_hash(values: Dict[str, Any]) -> str:
+    """SHA-256 of a canonical JSON rendering of values (key order independent)."""
+    payload = json.dumps(values, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
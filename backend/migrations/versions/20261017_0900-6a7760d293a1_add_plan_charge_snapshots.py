@@ -0,0 +1,66 @@
+"""Add plan charge snapshots table
+
+Revision ID: 6a7760d293a1
+Revises: fix_forecast_timestamps_20250816
+Create Date: 2026-10-17 09:00:00
+
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "6a7760d293a1"
+down_revision = "fix_forecast_timestamps_20250816"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create materialized plan de charge table
+    op.create_table(
+        "plan_charge_snapshots",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Integer(), nullable=False),
+        sa.Column("variant", sa.String(length=255), nullable=False),
+        sa.Column("range_start", sa.Date(), nullable=False),
+        sa.Column("range_end", sa.Date(), nullable=False),
+        sa.Column("etag", sa.String(length=64), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("generated_at", sa.DateTime(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "uq_plan_charge_snapshots_month_variant",
+        "plan_charge_snapshots",
+        ["year", "month", "variant"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_plan_charge_snapshots_range",
+        "plan_charge_snapshots",
+        ["range_start", "range_end"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_plan_charge_snapshots_range", table_name="plan_charge_snapshots")
+    op.drop_index(
+        "uq_plan_charge_snapshots_month_variant", table_name="plan_charge_snapshots"
+    )
+    op.drop_table("plan_charge_snapshots")
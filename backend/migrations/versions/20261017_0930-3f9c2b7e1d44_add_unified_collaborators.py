@@ -0,0 +1,110 @@
+"""Add unified collaborators table
+
+Revision ID: 3f9c2b7e1d44
+Revises: 6a7760d293a1
+Create Date: 2026-10-17 09:30:00
+
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3f9c2b7e1d44"
+down_revision = "6a7760d293a1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create precomputed collaborator directory (filled by syncs and TR override edits)
+    op.create_table(
+        "unified_collaborators",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("scope", sa.String(length=20), nullable=False),
+        sa.Column("collaborator_key", sa.String(length=64), nullable=False),
+        sa.Column("source", sa.String(length=20), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("sort_name", sa.String(length=255, collation="C"), nullable=False),
+        sa.Column("first_name", sa.String(length=100), nullable=True),
+        sa.Column("last_name", sa.String(length=100), nullable=True),
+        sa.Column("matricule", sa.String(length=50), nullable=True),
+        sa.Column("department", sa.String(length=255), nullable=True),
+        sa.Column("position", sa.String(length=255), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column(
+            "gryzzly_collaborator_id", postgresql.UUID(as_uuid=True), nullable=True
+        ),
+        sa.Column("gryzzly_id", sa.String(length=255), nullable=True),
+        sa.Column("payfit_employee_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("payfit_id", sa.String(length=255), nullable=True),
+        sa.Column("has_contracts", sa.Boolean(), nullable=False),
+        sa.Column("has_active_contract", sa.Boolean(), nullable=False),
+        sa.Column("override_eligible", sa.Boolean(), nullable=True),
+        sa.Column("eligible_tr", sa.Boolean(), nullable=False),
+        sa.Column("last_synced_at", sa.DateTime(), nullable=True),
+        sa.Column("refreshed_at", sa.DateTime(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "uq_unified_collaborators_scope_key",
+        "unified_collaborators",
+        ["scope", "collaborator_key"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_unified_collaborators_scope_name",
+        "unified_collaborators",
+        ["scope", "sort_name"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_unified_collaborators_email",
+        "unified_collaborators",
+        ["email"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_unified_collaborators_gryzzly_collaborator_id",
+        "unified_collaborators",
+        ["gryzzly_collaborator_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_unified_collaborators_payfit_id",
+        "unified_collaborators",
+        ["payfit_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_unified_collaborators_payfit_id", table_name="unified_collaborators"
+    )
+    op.drop_index(
+        "ix_unified_collaborators_gryzzly_collaborator_id",
+        table_name="unified_collaborators",
+    )
+    op.drop_index("ix_unified_collaborators_email", table_name="unified_collaborators")
+    op.drop_index(
+        "ix_unified_collaborators_scope_name", table_name="unified_collaborators"
+    )
+    op.drop_index(
+        "uq_unified_collaborators_scope_key", table_name="unified_collaborators"
+    )
+    op.drop_table("unified_collaborators")
@@ -0,0 +1,50 @@
+"""Add unique forecast slot index
+
+Revision ID: 8b1e4d2a6c57
+Revises: 3f9c2b7e1d44
+Create Date: 2026-10-17 10:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8b1e4d2a6c57"
+down_revision = "3f9c2b7e1d44"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep only the most recently updated forecast of each duplicated slot
+    op.execute(
+        """
+        DELETE FROM forecasts
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY collaborator_id, project_id,
+                        COALESCE(task_id, '00000000-0000-0000-0000-000000000000'::uuid),
+                        date
+                    ORDER BY updated_at DESC, created_at DESC
+                ) AS position
+                FROM forecasts
+            ) ranked
+            WHERE ranked.position > 1
+        )
+    """
+    )
+
+    op.execute(
+        """
+        CREATE UNIQUE INDEX uq_forecasts_slot ON forecasts (
+            collaborator_id,
+            project_id,
+            COALESCE(task_id, '00000000-0000-0000-0000-000000000000'::uuid),
+            date
+        )
+    """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_forecasts_slot", table_name="forecasts")
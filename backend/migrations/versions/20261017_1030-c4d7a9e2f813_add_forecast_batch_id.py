@@ -0,0 +1,31 @@
+"""Add batch id to forecasts
+
+Revision ID: c4d7a9e2f813
+Revises: 8b1e4d2a6c57
+Create Date: 2026-10-17 10:30:00
+
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c4d7a9e2f813"
+down_revision = "8b1e4d2a6c57"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows keep a NULL batch id and are grouped by creation time
+    op.add_column(
+        "forecasts",
+        sa.Column("batch_id", postgresql.UUID(as_uuid=True), nullable=True),
+    )
+    op.create_index("ix_forecasts_batch_id", "forecasts", ["batch_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_forecasts_batch_id", table_name="forecasts")
+    op.drop_column("forecasts", "batch_id")
@@ -0,0 +1,45 @@
+"""Add source hashes to synced rows and unchanged counts to sync logs
+
+Revision ID: 5e2a8f6c9b31
+Revises: c4d7a9e2f813
+Create Date: 2026-10-17 11:00:00
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5e2a8f6c9b31"
+down_revision = "c4d7a9e2f813"
+branch_labels = None
+depends_on = None
+
+# Existing rows get a NULL hash and are rewritten once by the next sync
+HASHED_TABLES = [
+    "gryzzly_collaborators",
+    "gryzzly_projects",
+    "gryzzly_tasks",
+    "gryzzly_declarations",
+    "payfit_employees",
+    "payfit_contracts",
+    "payfit_absences",
+]
+
+SYNC_LOG_TABLES = ["gryzzly_sync_logs", "payfit_sync_logs"]
+
+
+def upgrade() -> None:
+    for table in HASHED_TABLES:
+        op.add_column(table, sa.Column("source_hash", sa.String(64), nullable=True))
+    for table in SYNC_LOG_TABLES:
+        op.add_column(
+            table, sa.Column("records_unchanged", sa.Integer(), nullable=True)
+        )
+
+
+def downgrade() -> None:
+    for table in SYNC_LOG_TABLES:
+        op.drop_column(table, "records_unchanged")
+    for table in HASHED_TABLES:
+        op.drop_column(table, "source_hash")
@@ -0,0 +1,46 @@
+"""Make Gryzzly project memberships unique per collaborator and project
+
+Revision ID: 9d3b6e1f4a72
+Revises: 5e2a8f6c9b31
+Create Date: 2026-10-17 12:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9d3b6e1f4a72"
+down_revision = "5e2a8f6c9b31"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep the most recently updated row of each duplicated membership
+    op.execute(
+        """
+        DELETE FROM gryzzly_collaborator_projects
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY collaborator_id, project_id
+                    ORDER BY updated_at DESC NULLS LAST
+                ) AS position
+                FROM gryzzly_collaborator_projects
+            ) ranked
+            WHERE position > 1
+        )
+        """
+    )
+    op.create_unique_constraint(
+        "uq_gryzzly_collaborator_projects_collaborator_project",
+        "gryzzly_collaborator_projects",
+        ["collaborator_id", "project_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        "uq_gryzzly_collaborator_projects_collaborator_project",
+        "gryzzly_collaborator_projects",
+        type_="unique",
+    )
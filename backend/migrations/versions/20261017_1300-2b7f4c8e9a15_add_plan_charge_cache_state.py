@@ -0,0 +1,46 @@
+"""Add plan charge cache generation
+
+Revision ID: 2b7f4c8e9a15
+Revises: 9d3b6e1f4a72
+Create Date: 2026-10-17 13:00:00
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "2b7f4c8e9a15"
+down_revision = "9d3b6e1f4a72"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "plan_charge_cache_state",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("generation", sa.BigInteger(), nullable=False),
+        sa.Column("invalidated_at", sa.DateTime(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # Seed the single row, so the first invalidation locks an existing row
+    op.execute("INSERT INTO plan_charge_cache_state (id, generation) VALUES (1, 0)")
+    # Snapshots stored before generations existed may be stale
+    op.execute("DELETE FROM plan_charge_snapshots")
+
+
+def downgrade() -> None:
+    op.drop_table("plan_charge_cache_state")
@@ -0,0 +1,60 @@
+"""Populate the unified collaborator directory
+
+Revision ID: e7a1c5d9b203
+Revises: 2b7f4c8e9a15
+Create Date: 2026-10-17 14:00:00
+
+"""
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, selectinload
+
+from alembic import op
+from app.models.collaborator_directory import UnifiedCollaborator
+from app.models.gryzzly import GryzzlyCollaborator
+from app.models.payfit import PayfitEmployee
+from app.models.tr_eligibility import TREligibilityOverride
+from app.services.collaborator_directory import directory_rows
+
+# revision identifiers, used by Alembic.
+revision = "e7a1c5d9b203"
+down_revision = "2b7f4c8e9a15"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Reads no longer build the directory: backfill it from the data already
+    # synced, later syncs and TR override edits keep it up to date
+    bind = op.get_bind()
+    synced = bind.execute(
+        sa.text(
+            "SELECT EXISTS (SELECT 1 FROM gryzzly_collaborators) "
+            "OR EXISTS (SELECT 1 FROM payfit_employees)"
+        )
+    ).scalar()
+    if not synced:
+        return
+
+    session = Session(bind=bind)
+    gryzzly_collaborators = list(session.scalars(sa.select(GryzzlyCollaborator)))
+    payfit_employees = list(
+        session.scalars(
+            sa.select(PayfitEmployee).options(selectinload(PayfitEmployee.contracts))
+        )
+    )
+    overrides = {
+        row.email.lower(): row.is_eligible
+        for row in session.execute(
+            sa.select(TREligibilityOverride.email, TREligibilityOverride.is_eligible)
+        )
+    }
+
+    rows = directory_rows(gryzzly_collaborators, payfit_employees, overrides)
+    session.execute(sa.delete(UnifiedCollaborator))
+    if rows:
+        session.execute(sa.insert(UnifiedCollaborator), rows)
+    session.flush()
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM unified_collaborators")
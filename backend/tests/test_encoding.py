@@ -0,0 +1,25 @@
+"""Test response encoding negotiation."""
+
+import pytest
+
+from app.utils.encoding import wants_msgpack
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, False),
+        ("application/json", False),
+        ("*/*", False),
+        ("application/msgpack", True),
+        ("application/x-msgpack, application/json;q=0.9", True),
+        ("application/msgpack;q=0, application/json", False),
+        ("application/json, application/msgpack;q=0.5", False),
+        ("application/msgpack;q=0.8, */*;q=0.1", True),
+        ("application/msgpack;q=invalid", False),
+        ("text/html;x=application/msgpack", False),
+    ],
+)
+def test_wants_msgpack_honours_quality(accept, expected):
+    """MessagePack is chosen only when asked for and preferred over JSON."""
+    assert wants_msgpack(accept) is expected
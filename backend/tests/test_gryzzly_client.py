@@ -0,0 +1,48 @@
+"""Test the Gryzzly API client listings."""
+
+from datetime import date
+
+from app.config import settings
+from app.services import gryzzly_client
+from app.services.gryzzly_client import GryzzlyAPIClient
+
+
+async def test_declarations_are_read_page_by_page(monkeypatch):
+    """Users with more than a page of declarations get all of them."""
+    monkeypatch.setattr(settings, "GRYZZLY_API_KEY", "test-key")
+    monkeypatch.setattr(gryzzly_client, "USE_MOCK", False)
+    monkeypatch.setattr(gryzzly_client, "PAGE_SIZE", 2)
+
+    declarations = {
+        "u1": [{"id": f"d{i}", "user_id": "u1", "task_id": "t1"} for i in range(5)],
+        "u2": [{"id": "e0", "user_id": "u2", "task_id": "t1"}],
+    }
+    requests = []
+
+    async def make_request(endpoint, params):
+        assert endpoint == "declarations.list"
+        requests.append(params)
+        user_declarations = declarations[params["user_ids"][0]]
+        offset = params["offset"]
+        return {"data": user_declarations[offset : offset + params["limit"]]}
+
+    async def reference(key, fetch):
+        if key == "tasks":
+            return [{"id": "t1", "projectId": "p1", "isBillable": True}]
+        return [{"id": "u1"}, {"id": "u2"}]
+
+    client = GryzzlyAPIClient()
+    client._make_request = make_request
+    client._reference = reference
+
+    batches = [
+        batch
+        async for batch in client.iter_declaration_batches(
+            date(2026, 10, 1), date(2026, 10, 31)
+        )
+    ]
+    ids = sorted(decl["id"] for batch in batches for decl in batch)
+    assert ids == ["d0", "d1", "d2", "d3", "d4", "e0"]
+    assert all(decl["projectId"] == "p1" for batch in batches for decl in batch)
+    # 3 pages for u1, a short first page for u2
+    assert len(requests) == 4
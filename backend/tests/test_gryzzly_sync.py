@@ -0,0 +1,96 @@
+"""Test the Gryzzly declaration sync helpers."""
+
+import asyncio
+from contextlib import aclosing
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.config import settings
+from app.services.gryzzly_sync import (
+    SYNC_MODE_FULL,
+    SYNC_MODE_INCREMENTAL,
+    SYNC_MODE_RANGE,
+    _buffered,
+    _next_watermarks,
+)
+
+STARTED_AT = datetime(2026, 10, 17, 12, 0)
+PREVIOUS = datetime(2026, 10, 16, 12, 0, tzinfo=timezone.utc)
+
+
+def plan(mode, watermark=PREVIOUS, last_full_sync_at=None):
+    return {
+        "mode": mode,
+        "start_date": date(2026, 9, 12),
+        "end_date": date(2027, 4, 30),
+        "watermark": watermark,
+        "last_full_sync_at": last_full_sync_at,
+    }
+
+
+def test_watermark_held_back_from_run_start():
+    """The watermark trails the run start, whatever the declarations reported."""
+    watermark, last_full_sync_at = _next_watermarks(
+        plan(SYNC_MODE_INCREMENTAL), STARTED_AT, True
+    )
+    margin = timedelta(minutes=settings.GRYZZLY_WATERMARK_SAFETY_MARGIN_MINUTES)
+    assert watermark == STARTED_AT.replace(tzinfo=timezone.utc) - margin
+    assert watermark < STARTED_AT.replace(tzinfo=timezone.utc)
+    assert last_full_sync_at is None
+
+
+def test_full_sync_records_reconciliation():
+    """A complete full run records its start as the last full sync."""
+    started = STARTED_AT.replace(tzinfo=timezone.utc)
+    watermark, last_full_sync_at = _next_watermarks(
+        plan(SYNC_MODE_FULL, watermark=None), STARTED_AT, True
+    )
+    assert watermark < started
+    assert last_full_sync_at == started
+
+
+@pytest.mark.parametrize(
+    "mode, complete",
+    [(SYNC_MODE_INCREMENTAL, False), (SYNC_MODE_FULL, False), (SYNC_MODE_RANGE, True)],
+)
+def test_watermark_kept(mode, complete):
+    """Failed user fetches and explicit ranges leave the watermarks untouched."""
+    assert _next_watermarks(plan(mode), STARTED_AT, complete) == (PREVIOUS, None)
+
+
+async def numbers(count, produced, fail_at=None):
+    for number in range(count):
+        if number == fail_at:
+            raise ConnectionError("API down")
+        produced.append(number)
+        yield number
+
+
+async def test_buffered_yields_in_order():
+    """Buffered items come out in the order they were produced."""
+    produced = []
+    items = [item async for item in _buffered(numbers(10, produced), 2)]
+    assert items == list(range(10))
+
+
+async def test_buffered_raises_producer_errors():
+    """A producer error is raised to the consumer after the items before it."""
+    items = []
+    with pytest.raises(ConnectionError, match="API down"):
+        async for item in _buffered(numbers(10, [], fail_at=3), 2):
+            items.append(item)
+    assert items == [0, 1, 2]
+
+
+async def test_buffered_stops_producer_on_close():
+    """Closing early stops the producer, at most maxsize items ahead."""
+    produced = []
+    async with aclosing(_buffered(numbers(100, produced), 2)) as items:
+        async for item in items:
+            await asyncio.sleep(0.01)
+            break
+    count = len(produced)
+    await asyncio.sleep(0.01)
+    assert len(produced) == count
+    assert count <= 4
@@ -0,0 +1,26 @@
+"""Test content hashing."""
+
+from datetime import date
+from decimal import Decimal
+
+from app.utils.hashing import content_hash
+
+
+def test_hash_ignores_key_order():
+    """The same values hash the same whatever their key order."""
+    assert content_hash({"a": 1, "b": "x"}) == content_hash({"b": "x", "a": 1})
+
+
+def test_hash_detects_changes():
+    """Any changed, added or removed value changes the hash."""
+    base = content_hash({"a": 1, "b": "x"})
+    assert content_hash({"a": 2, "b": "x"}) != base
+    assert content_hash({"a": 1, "b": "x", "c": None}) != base
+    assert content_hash({"a": 1}) != base
+
+
+def test_hash_renders_non_json_values():
+    """Dates and decimals are hashed through their string form."""
+    values = {"date": date(2026, 10, 17), "hours": Decimal("7.5")}
+    assert content_hash(values) == content_hash({"date": "2026-10-17", "hours": "7.5"})
+    assert len(content_hash(values)) == 64
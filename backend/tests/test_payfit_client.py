@@ -0,0 +1,50 @@
+"""Test the Payfit absence sharding."""
+
+from datetime import date
+
+from app.services.payfit_client import PayfitAPIClient, _monthly_shards
+
+
+def test_monthly_shards_split_at_month_boundaries():
+    """A window is split at month boundaries, keeping its own bounds."""
+    assert _monthly_shards(date(2026, 1, 15), date(2026, 3, 10)) == [
+        (date(2026, 1, 15), date(2026, 1, 31)),
+        (date(2026, 2, 1), date(2026, 2, 28)),
+        (date(2026, 3, 1), date(2026, 3, 10)),
+    ]
+    assert _monthly_shards(date(2026, 12, 1), date(2027, 1, 1)) == [
+        (date(2026, 12, 1), date(2026, 12, 31)),
+        (date(2027, 1, 1), date(2027, 1, 1)),
+    ]
+
+
+def test_monthly_shards_keep_open_windows_whole():
+    """An open or inverted window is a single shard."""
+    assert _monthly_shards(None, date(2026, 3, 10)) == [(None, date(2026, 3, 10))]
+    assert _monthly_shards(date(2026, 1, 1), None) == [(date(2026, 1, 1), None)]
+    inverted = (date(2026, 3, 1), date(2026, 1, 1))
+    assert _monthly_shards(*inverted) == [inverted]
+
+
+async def test_iter_absences_yields_each_absence_once():
+    """Absences spanning several shards, or pages, are yielded once."""
+    pages = {
+        (date(2026, 1, 1), None): (
+            [{"id": "a1"}, {"id": "spanning"}],
+            "next",
+        ),
+        (date(2026, 1, 1), "next"): ([{"id": "a2"}, {"id": "a1"}], None),
+        (date(2026, 2, 1), None): ([{"id": "spanning"}, {"id": "b1"}], None),
+    }
+
+    async def get_absences(begin_date, next_page_token, **kwargs):
+        absences, token = pages[(begin_date, next_page_token)]
+        return {"absences": absences, "meta": {"nextPageToken": token}}
+
+    client = PayfitAPIClient()
+    client.get_absences = get_absences
+    absences = [
+        absence["id"]
+        async for absence in client.iter_absences(date(2026, 1, 1), date(2026, 2, 28))
+    ]
+    assert sorted(absences) == ["a1", "a2", "b1", "spanning"]
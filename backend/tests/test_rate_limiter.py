@@ -0,0 +1,47 @@
+"""Test the Gryzzly API rate limiter."""
+
+import pytest
+
+from app.services.gryzzly_client import RateLimiter, parse_retry_after
+
+
+def test_burst_then_steady_rate():
+    """Requests up to the budget pass at once, then are spaced evenly."""
+    limiter = RateLimiter(5, 10)
+    delays = [limiter.reserve() for _ in range(7)]
+    assert delays[:5] == [0.0] * 5
+    assert delays[5] == pytest.approx(2.0, abs=0.05)
+    assert delays[6] == pytest.approx(4.0, abs=0.05)
+
+
+def test_endpoint_budget():
+    """An endpoint budget throttles that endpoint before the global budget."""
+    limiter = RateLimiter(50, 10, {"declarations.list": 2})
+    assert limiter.reserve("declarations.list") == 0.0
+    assert limiter.reserve("declarations.list") == 0.0
+    assert limiter.reserve("declarations.list") == pytest.approx(5.0, abs=0.05)
+    assert limiter.reserve("tasks.list") == 0.0
+
+
+def test_penalty_holds_back_requests():
+    """A Retry-After penalty delays the next request by that duration."""
+    limiter = RateLimiter(50, 10)
+    limiter.penalize(3)
+    assert limiter.reserve() == pytest.approx(3.0, abs=0.05)
+    assert limiter.stats()["penalties"] == 1
+
+
+def test_endpoint_penalty_holds_back_every_endpoint():
+    """A 429 on a budgeted endpoint holds back the other endpoints too."""
+    for endpoint in ["tasks.list", "declarations.list"]:
+        limiter = RateLimiter(50, 10, {"declarations.list": 2})
+        limiter.penalize(3, "declarations.list")
+        assert limiter.reserve(endpoint) == pytest.approx(3.0, abs=0.05)
+
+
+def test_parse_retry_after():
+    """Retry-After is accepted in seconds or as an HTTP date."""
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
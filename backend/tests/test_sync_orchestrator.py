@@ -0,0 +1,192 @@
+"""Test the sync stage orchestrator."""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.services.sync_orchestrator import (
+    STAGE_FAILED,
+    STAGE_SKIPPED,
+    STAGE_SUCCESS,
+    SyncOrchestrator,
+    SyncStage,
+    record_stages,
+    shared_fetch,
+)
+
+
+class FakeSyncLog:
+    """Sync log whose attributes expire on rollback, like a mapped instance."""
+
+    def __init__(self):
+        self.expired = False
+        self._started_at = datetime.utcnow()
+
+    @property
+    def started_at(self):
+        if self.expired:
+            raise RuntimeError("lazy load of an expired attribute")
+        return self._started_at
+
+
+class FakeSession:
+    """Session recording rollbacks and refreshing expired logs."""
+
+    def __init__(self, *logs):
+        self.logs = logs
+        self.rollbacks = 0
+
+    async def rollback(self):
+        self.rollbacks += 1
+        for log in self.logs:
+            log.expired = True
+
+    async def refresh(self, log):
+        log.expired = False
+
+
+def counters(created=0):
+    return {"created": created, "updated": 0, "unchanged": 0, "failed": 0}
+
+
+async def value(data):
+    return data
+
+
+async def write_ok(data):
+    return counters(created=len(data or []))
+
+
+async def write_failing(data):
+    raise ValueError("constraint violated")
+
+
+async def test_failed_stage_records_partial_log():
+    """A failed write skips its dependents and the log ends up partial."""
+    sync_log = FakeSyncLog()
+    session = FakeSession(sync_log)
+    stages = [
+        SyncStage("a", write=write_ok, fetch=lambda: value([1, 2])),
+        SyncStage("b", write=write_failing),
+        SyncStage("c", write=write_ok, after=["b"]),
+    ]
+
+    reports = await SyncOrchestrator(session, stages).run()
+    assert session.rollbacks == 1
+    assert reports["a"]["status"] == STAGE_SUCCESS
+    assert reports["b"]["status"] == STAGE_FAILED
+    assert reports["c"]["status"] == STAGE_SKIPPED
+
+    results = await record_stages(
+        session, sync_log, reports, {"a": "first", "b": "second", "c": "third"}
+    )
+    assert sync_log.sync_status == "partial"
+    assert sync_log.records_created == 2
+    assert results["errors"] == ["second: constraint violated", "third: skipped"]
+    assert sync_log.sync_metadata["stages"]["third"]["status"] == STAGE_SKIPPED
+
+
+def test_graph_rejects_unknown_dependencies_and_cycles():
+    """Stages must be unique and depend on known stages, without cycles."""
+    session = FakeSession()
+    with pytest.raises(ValueError, match="depends on"):
+        SyncOrchestrator(session, [SyncStage("a", write=write_ok, after=["x"])])
+    with pytest.raises(ValueError, match="cycle"):
+        SyncOrchestrator(
+            session,
+            [
+                SyncStage("a", write=write_ok, after=["b"]),
+                SyncStage("b", write=write_ok, after=["a"]),
+            ],
+        )
+    with pytest.raises(ValueError, match="unique"):
+        SyncOrchestrator(
+            session, [SyncStage("a", write=write_ok), SyncStage("a", write=write_ok)]
+        )
+
+
+async def test_failed_fetch_skips_transitive_dependents():
+    """A failed fetch fails its stage and skips everything downstream of it."""
+
+    async def fetch_failing():
+        raise ConnectionError("API down")
+
+    stages = [
+        SyncStage("a", write=write_ok, fetch=fetch_failing),
+        SyncStage("b", write=write_ok, after=["a"]),
+        SyncStage("c", write=write_ok, after=["b"]),
+        SyncStage("d", write=write_ok, fetch=lambda: value([1])),
+    ]
+
+    reports = await SyncOrchestrator(FakeSession(), stages).run()
+    assert reports["a"]["status"] == STAGE_FAILED
+    assert reports["b"]["status"] == STAGE_SKIPPED
+    assert reports["c"]["status"] == STAGE_SKIPPED
+    assert reports["d"]["result"] == counters(created=1)
+
+
+async def test_writes_follow_dependencies():
+    """A stage is written only after the stages it depends on."""
+    written = []
+
+    def writer(name):
+        async def write(data):
+            written.append(name)
+            return counters()
+
+        return write
+
+    async def slow_fetch():
+        await asyncio.sleep(0.01)
+
+    stages = [
+        SyncStage("tasks", write=writer("tasks"), after=["projects"]),
+        SyncStage("projects", write=writer("projects"), fetch=slow_fetch),
+    ]
+
+    await SyncOrchestrator(FakeSession(), stages).run()
+    assert written == ["projects", "tasks"]
+
+
+async def test_shared_fetch_survives_cancelled_caller():
+    """Callers share one request, which outlives a cancelled caller."""
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return [1, 2]
+
+    shared = shared_fetch(fetch)
+    cancelled = asyncio.ensure_future(shared())
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await shared() == [1, 2]
+    assert calls == [1]
+
+
+@pytest.mark.parametrize(
+    "statuses, expected",
+    [
+        ([STAGE_SUCCESS, STAGE_SUCCESS], "success"),
+        ([STAGE_SUCCESS, STAGE_SKIPPED], "partial"),
+        ([STAGE_FAILED, STAGE_SKIPPED], "failed"),
+    ],
+)
+async def test_record_stages_rolls_up_status(statuses, expected):
+    """The log status is success, partial or failed from the stage statuses."""
+    sync_log = FakeSyncLog()
+    reports = {
+        name: {"status": status, "error": "boom", "result": counters(created=1)}
+        for name, status in zip(["a", "b"], statuses)
+    }
+
+    results = await record_stages(
+        FakeSession(), sync_log, reports, {"a": "first", "b": "second", "c": "third"}
+    )
+    assert sync_log.sync_status == expected
+    # Stages left out of the run report zero counters
+    assert results["third"] == counters()
+    assert "third" not in sync_log.sync_metadata["stages"]